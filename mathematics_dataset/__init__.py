@@ -11,3 +11,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+
+"""Generates mathematics questions and answers.
+
+See `stream` for generating questions from Python (or `generation.Generator`,
+for more control over what is generated), and `generate` and `generate_to_file`
+for the command line scripts.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+
+def stream(*args, **kwargs):
+  """Yields generated questions; see `mathematics_dataset.streaming.stream`."""
+  # Imported here rather than at the top, so that running one of the scripts
+  # (e.g., `python -m mathematics_dataset.generate`) does not first import it
+  # (and define its flags) a second time under the package name.
+  from mathematics_dataset import streaming  # pylint: disable=g-import-not-at-top
+  return streaming.stream(*args, **kwargs)
@@ -0,0 +1,385 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks the generation speed of each module.
+
+For each module (restricted by --filter) in each regime, this samples
+--num_examples problems after --warmup_examples untimed ones, and reports:
+
+*   `problems_per_second`: accepted problems per second;
+*   `latency_p50_ms`, `latency_p99_ms`: percentiles of the time to sample one
+    accepted problem (including any samples dropped along the way);
+*   `drop_rate`: fraction of samples dropped for being too long, and
+    `dropped_per_accepted`;
+*   `peak_rss_mb`: peak resident memory of the process sampling the module.
+
+With --allocations, this also samples --num_examples problems with allocation
+tracing enabled (which is much slower, so these are not timed), and reports:
+
+*   `allocated_kb_p50`, `allocated_kb_max`: percentiles of the peak memory
+    allocated while sampling one problem (as traced by `tracemalloc`);
+*   `gc_collections_per_problem`: garbage collector runs per problem (which
+    are triggered by allocating many container objects).
+
+With --startup, this also times starting a fresh python process that samples
+from the module (as a worker generating only that module would), and reports:
+
+*   `startup_import_ms`: time to import `generation`;
+*   `startup_module_ms`: time to then build the module (via `make_module`,
+    which imports only its package) and sample one problem from it;
+*   `startup_total_ms`: wall time of the whole process, including starting the
+    interpreter.
+
+With --dispatch, this also records the calls made to choose the sampler of each
+value in a composed problem (`composition.Context._sampler`) while sampling
+--num_examples problems, then times them again, and reports:
+
+*   `dispatch_calls_per_problem`: samplers chosen per problem (zero for modules
+    that are not composed, which report no times);
+*   `dispatch_us_per_call`: time to choose one, looking up the samplers for the
+    class of the value;
+*   `dispatch_all_filters_us_per_call`: time to choose one by calling every
+    sampler's filter on the value instead, and `dispatch_speedup`, the ratio.
+
+Each module is seeded from --seed (default 0), and benchmarked in a fresh
+process, so that its peak memory (and sympy's caches) are not affected by the
+other modules. The results are written as JSON to --output_path (or stdout), for
+comparing between runs, e.g.:
+
+```
+python -m mathematics_dataset.benchmark --filter=algebra \
+    --output_path=/tmp/benchmark.json
+```
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+# Dependency imports
+from absl import app
+from absl import flags
+from absl import logging
+from mathematics_dataset import generate  # pylint: disable=unused-import
+from mathematics_dataset import generation
+from mathematics_dataset.util import composition
+from mathematics_dataset.util import seeding
+import numpy as np
+import six
+from six.moves import range
+import sympy
+
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string('output_path', None,
+                    'Where to write the JSON results (default: stdout)')
+flags.DEFINE_integer('num_examples', 100,
+                     'Number of timed examples per module and regime')
+flags.DEFINE_integer('warmup_examples', 5,
+                     'Number of untimed examples to sample first')
+flags.DEFINE_boolean('allocations', False,
+                     'Whether to also measure memory allocated per problem')
+flags.DEFINE_boolean('startup', False,
+                     'Whether to also measure the startup time of a process '
+                     'sampling from a single module')
+flags.DEFINE_boolean('dispatch', False,
+                     'Whether to also time choosing the samplers of composed '
+                     'problems, with and without looking them up by value '
+                     'class')
+
+
+def _peak_rss_mb():
+  """Returns peak resident memory of this process in megabytes."""
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # Linux reports kilobytes, macOS bytes.
+  if sys.platform == 'darwin':
+    return peak / 2**20
+  return peak / 2**10
+
+
+def benchmark_module(module, num_examples, warmup_examples=0):
+  """Returns dict of timing statistics for sampling from `module`.
+
+  Args:
+    module: Callable returning a `Problem`.
+    num_examples: Number of accepted problems to time.
+    warmup_examples: Number of problems to sample (untimed) first.
+
+  Returns:
+    Dict of statistics; see the module docstring.
+  """
+  for _ in range(warmup_examples):
+    generation.sample_from_module(module)
+
+  latencies = np.zeros(num_examples)
+  num_dropped = 0
+  for i in range(num_examples):
+    start = timeit.default_timer()
+    _, extra_dropped = generation.sample_from_module(module)
+    latencies[i] = timeit.default_timer() - start
+    num_dropped += extra_dropped
+
+  seconds = float(np.sum(latencies))
+  return {
+      'examples': num_examples,
+      'seconds': seconds,
+      'problems_per_second': num_examples / seconds if seconds > 0 else None,
+      'latency_p50_ms': 1000 * float(np.percentile(latencies, 50)),
+      'latency_p99_ms': 1000 * float(np.percentile(latencies, 99)),
+      'dropped': num_dropped,
+      'drop_rate': num_dropped / (num_dropped + num_examples),
+      'dropped_per_accepted': num_dropped / num_examples,
+  }
+
+
+def _gc_collections():
+  """Returns total number of garbage collections so far, over generations."""
+  return sum(stats['collections'] for stats in gc.get_stats())
+
+
+def allocation_stats(module, num_examples):
+  """Returns dict of memory allocation statistics for sampling from `module`.
+
+  Args:
+    module: Callable returning a `Problem`.
+    num_examples: Number of accepted problems to sample.
+
+  Returns:
+    Dict of statistics; see the module docstring.
+  """
+  allocated = np.zeros(num_examples)
+  gc.collect()
+  collections_before = _gc_collections()
+  tracemalloc.start()
+  try:
+    for i in range(num_examples):
+      tracemalloc.clear_traces()
+      generation.sample_from_module(module)
+      allocated[i] = tracemalloc.get_traced_memory()[1] / 2**10
+  finally:
+    tracemalloc.stop()
+  return {
+      'allocated_kb_p50': float(np.percentile(allocated, 50)),
+      'allocated_kb_max': float(np.max(allocated)),
+      'gc_collections_per_problem':
+          (_gc_collections() - collections_before) / num_examples,
+  }
+
+
+def _sampler_from_all_filters(unused_context, value, sample_args):
+  """Like `composition.Context._sampler`, but calls every sampler's filter."""
+  # pylint: disable=protected-access
+  valid = [sampler for filter_, sampler in composition._FILTERS_AND_SAMPLERS
+           if filter_(value)]
+  # pylint: enable=protected-access
+  if not valid:
+    raise ValueError('No valid samplers found: value={} sample_args={}'
+                     .format(value, sample_args))
+  return random.choice(valid)
+
+
+def dispatch_stats(module, num_examples, repeats=10):
+  """Returns dict of the time to choose samplers for composed problems.
+
+  Args:
+    module: Callable returning a `Problem`.
+    num_examples: Number of accepted problems to sample, recording the calls of
+        `composition.Context._sampler`.
+    repeats: Number of times to time each recorded call.
+
+  Returns:
+    Dict of statistics; see the module docstring.
+  """
+  calls = []
+  original = composition.Context._sampler  # pylint: disable=protected-access
+
+  def record(context, value, sample_args):
+    calls.append((context, value, sample_args))
+    return original(context, value, sample_args)
+
+  composition.Context._sampler = record  # pylint: disable=protected-access
+  try:
+    for _ in range(num_examples):
+      generation.sample_from_module(module)
+  finally:
+    composition.Context._sampler = original  # pylint: disable=protected-access
+
+  result = {'dispatch_calls_per_problem': len(calls) / num_examples}
+  if not calls:
+    result.update({
+        'dispatch_us_per_call': None,
+        'dispatch_all_filters_us_per_call': None,
+        'dispatch_speedup': None,
+    })
+    return result
+
+  def us_per_call(sampler_fn):
+    start = timeit.default_timer()
+    for _ in range(repeats):
+      for context, value, sample_args in calls:
+        sampler_fn(context, value, sample_args)
+    return 1e6 * (timeit.default_timer() - start) / (repeats * len(calls))
+
+  result['dispatch_us_per_call'] = us_per_call(original)
+  result['dispatch_all_filters_us_per_call'] = us_per_call(
+      _sampler_from_all_filters)
+  result['dispatch_speedup'] = (result['dispatch_all_filters_us_per_call']
+                                / result['dispatch_us_per_call'])
+  return result
+
+
+# Run in a fresh process by `startup_stats`; prints the times (in seconds) to
+# import `generation`, and to build the module and sample a problem from it.
+_STARTUP_SCRIPT = """
+import timeit
+start = timeit.default_timer()
+from mathematics_dataset import generation
+imported = timeit.default_timer()
+generation.sample_from_module(
+    generation.make_module({regime!r}, {module_name!r}))
+print(imported - start, timeit.default_timer() - imported)
+"""
+
+
+def startup_stats(regime, module_name):
+  """Returns dict of startup times of a process sampling from a module.
+
+  Args:
+    regime: Regime name, e.g., `'train'`.
+    module_name: Flattened module name, e.g., `'algebra__linear_1d'`.
+
+  Returns:
+    Dict of statistics; see the module docstring.
+  """
+  script = _STARTUP_SCRIPT.format(regime=regime, module_name=module_name)
+  # Imports this copy of `mathematics_dataset`, even if not installed.
+  env = dict(os.environ)
+  root = os.path.dirname(os.path.dirname(os.path.abspath(generation.__file__)))
+  env['PYTHONPATH'] = os.pathsep.join(
+      [root] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []))
+  start = timeit.default_timer()
+  output = subprocess.check_output([sys.executable, '-c', script], env=env)
+  total_seconds = timeit.default_timer() - start
+  import_seconds, module_seconds = [
+      float(value) for value in output.decode('utf-8').split()[-2:]]
+  return {
+      'startup_import_ms': 1000 * import_seconds,
+      'startup_module_ms': 1000 * module_seconds,
+      'startup_total_ms': 1000 * total_seconds,
+  }
+
+
+def _seed():
+  """Returns the global seed; benchmarks are always seeded, to be comparable."""
+  return 0 if FLAGS.seed is None else FLAGS.seed
+
+
+def _init_worker(argv):
+  if not FLAGS.is_parsed():
+    FLAGS(argv)
+
+
+def _benchmark(regime_and_module_name):
+  """Benchmarks one module in one regime; run in a fresh process."""
+  regime, module_name = regime_and_module_name
+  seeding.seed_all(seeding.derive_seed(_seed(), regime, module_name))
+  module = generation.make_module(regime, module_name)
+  result = {'regime': regime, 'module': module_name}
+  result.update(benchmark_module(
+      module, FLAGS.num_examples, warmup_examples=FLAGS.warmup_examples))
+  if FLAGS.allocations:
+    result.update(allocation_stats(module, FLAGS.num_examples))
+  if FLAGS.dispatch:
+    result.update(dispatch_stats(module, FLAGS.num_examples))
+  if FLAGS.startup:
+    result.update(startup_stats(regime, module_name))
+  result['peak_rss_mb'] = _peak_rss_mb()
+  return result
+
+
+def main(argv):
+  generator = generation.Generator(generation.GenerationConfig(
+      filter_=FLAGS.filter, train_split=FLAGS.train_split))
+
+  tasks = []
+  for regime, flat_modules in six.iteritems(generator.modules):
+    for module_name in flat_modules:
+      tasks.append((regime, module_name))
+  logging.info('Benchmarking %d modules', len(tasks))
+
+  # A new process per module, so that peak memory is measured per module.
+  pool = multiprocessing.Pool(
+      FLAGS.num_workers, initializer=_init_worker, initargs=(argv,),
+      maxtasksperchild=1)
+  results = []
+  for result in pool.imap(_benchmark, tasks):
+    logging.info('%s/%s: %.1f problems/sec, p50 %.1fms, p99 %.1fms, '
+                 'drop rate %.2f, peak RSS %.0fMB',
+                 result['regime'], result['module'],
+                 result['problems_per_second'] or 0, result['latency_p50_ms'],
+                 result['latency_p99_ms'], result['drop_rate'],
+                 result['peak_rss_mb'])
+    results.append(result)
+  pool.close()
+  pool.join()
+
+  total_seconds = sum(result['seconds'] for result in results)
+  output = {
+      'config': {
+          'filter': FLAGS.filter,
+          'num_examples': FLAGS.num_examples,
+          'warmup_examples': FLAGS.warmup_examples,
+          'train_split': FLAGS.train_split,
+          'allocations': FLAGS.allocations,
+          'startup': FLAGS.startup,
+          'dispatch': FLAGS.dispatch,
+          'seed': _seed(),
+          'python': platform.python_version(),
+          'numpy': np.__version__,
+          'sympy': sympy.__version__,
+      },
+      'total_seconds': total_seconds,
+      'results': results,
+  }
+
+  # Summarize which modules dominate the generation time.
+  for result in sorted(results, key=lambda result: -result['seconds'])[:10]:
+    logging.info('%5.1f%% of time: %s/%s',
+                 100 * result['seconds'] / max(total_seconds, 1e-9),
+                 result['regime'], result['module'])
+
+  text = json.dumps(output, indent=2, sort_keys=True)
+  if FLAGS.output_path is None:
+    print(text)
+  else:
+    with open(FLAGS.output_path, 'w') as output_file:
+      output_file.write(text + '\n')
+    logging.info('Written %s', FLAGS.output_path)
+
+
+if __name__ == '__main__':
+  app.run(main)
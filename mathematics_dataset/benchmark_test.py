@@ -0,0 +1,83 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.benchmark."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from absl.testing import absltest
+from mathematics_dataset import benchmark
+from mathematics_dataset import example
+from mathematics_dataset import generate_settings
+from mathematics_dataset import generation
+
+
+class BenchmarkTest(absltest.TestCase):
+
+  def testBenchmarkModule(self):
+    count = [0]
+
+    def alternating_module():
+      """Alternates between a problem that is dropped and one that is not."""
+      count[0] += 1
+      if count[0] % 2:
+        question = 'x' * (generate_settings.MAX_QUESTION_LENGTH + 1)
+      else:
+        question = 'What is 1?'
+      return example.Problem(question=question, answer='1')
+
+    result = benchmark.benchmark_module(
+        alternating_module, num_examples=10, warmup_examples=2)
+    self.assertEqual(result['examples'], 10)
+    self.assertEqual(result['dropped'], 10)
+    self.assertAlmostEqual(result['drop_rate'], 0.5)
+    self.assertAlmostEqual(result['dropped_per_accepted'], 1.0)
+    self.assertLessEqual(result['latency_p50_ms'], result['latency_p99_ms'])
+    self.assertGreater(result['problems_per_second'], 0)
+
+  def testAllocationStats(self):
+    def module():
+      return example.Problem(question='What is 1?', answer=len([0] * 1000))
+
+    result = benchmark.allocation_stats(module, num_examples=5)
+    self.assertGreater(result['allocated_kb_p50'], 0)
+    self.assertLessEqual(result['allocated_kb_p50'], result['allocated_kb_max'])
+    self.assertGreaterEqual(result['gc_collections_per_problem'], 0)
+
+  def testDispatchStats(self):
+    module = generation.make_module('train', 'numbers__place_value_composed')
+    result = benchmark.dispatch_stats(module, num_examples=5, repeats=2)
+    self.assertGreater(result['dispatch_calls_per_problem'], 0)
+    self.assertGreater(result['dispatch_us_per_call'], 0)
+    self.assertGreater(result['dispatch_all_filters_us_per_call'], 0)
+
+    result = benchmark.dispatch_stats(
+        lambda: example.Problem(question='What is 1?', answer='1'),
+        num_examples=5)
+    self.assertEqual(result['dispatch_calls_per_problem'], 0)
+    self.assertIsNone(result['dispatch_speedup'])
+
+  def testStartupStats(self):
+    result = benchmark.startup_stats('train', 'measurement__time')
+    self.assertGreater(result['startup_import_ms'], 0)
+    self.assertGreater(result['startup_module_ms'], 0)
+    self.assertGreater(result['startup_total_ms'],
+                       result['startup_import_ms'] + result['startup_module_ms'])
+
+
+if __name__ == '__main__':
+  absltest.main()
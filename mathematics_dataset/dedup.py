@@ -0,0 +1,627 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Detects duplicate questions, and test questions leaked from training data.
+
+Example usage:
+
+```
+deduplicator = dedup.Deduplicator('/tmp/maths/dedup')
+duplicate, leaked = deduplicator.check(
+    'interpolate', 'algebra__linear_1d', questions)
+deduplicator.close()
+print(dedup.format_stats(deduplicator.stats()))
+```
+
+A question is a *duplicate* if the same question was checked earlier for the
+same regime and module, and is *leaked* if it is in a test regime (i.e., not
+`train*`) and the same question was checked earlier for any training regime.
+So to find all leaks, the training data must be checked first.
+
+Questions are identified by 64-bit fingerprints, which are held in
+`DiskHashSet`s: sets sharded over sorted files on disk, so the corpus need not
+fit in memory. Each set has an in-memory `BloomFilter` in front of it, so that
+the files are only searched for questions that are probably in the set (i.e.,
+the duplicates, and a small fraction of the others). Distinct questions with the
+same fingerprint are treated as the same; at a billion questions, this happens
+for about one pair in 40 million.
+
+`Deduplicator.commit` stores the sets as a numbered checkpoint, which can be
+reopened later (e.g., when resuming generation), discarding any questions
+checked after it. The latest two checkpoints are kept.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import hashlib
+import json
+import math
+import os
+
+# Dependency imports
+import numpy as np
+import six
+from six.moves import range
+
+
+# Default number of questions that the Bloom filters are sized for. More can be
+# added, at the cost of more false positives (and so more searches on disk).
+DEFAULT_EXPECTED_SIZE = 10**7
+
+# Default false positive rate of the Bloom filters, when holding the expected
+# number of questions.
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+
+# Default number of shards of a `DiskHashSet`.
+DEFAULT_NUM_SHARDS = 256
+
+# Number of fingerprints added to a shard of a `DiskHashSet` that are held in
+# memory before being written to disk.
+_MAX_PENDING_PER_SHARD = 2**14
+
+# Number of fingerprints added to all the shards of a `DiskHashSet` that are
+# held in memory; beyond this, the shard with the most is written to disk. The
+# pending fingerprints take at most `16 * _MAX_PENDING` bytes (since their
+# buffers at most double), plus `8 * _MIN_PENDING_CAPACITY` bytes per shard.
+_MAX_PENDING = 2**18
+
+# Initial size of the buffer of pending fingerprints of each shard.
+_MIN_PENDING_CAPACITY = 64
+
+_RUN_SUFFIX = '.npy'
+
+_CHECKPOINT_PREFIX = 'checkpoint-'
+_CHECKPOINT_SUFFIX = '.json'
+
+# Batches with fewer fingerprints than this are added or looked up one at a
+# time, which is faster for a handful of fingerprints (given the fixed overhead
+# of the numpy calls), e.g., when checking one streamed question at a time.
+MIN_BATCH_SIZE = 32
+
+
+def _checkpoint_path(directory, checkpoint):
+  return os.path.join(directory, '{}{:010d}{}'.format(
+      _CHECKPOINT_PREFIX, checkpoint, _CHECKPOINT_SUFFIX))
+
+
+def _checkpoints(directory):
+  """Returns sorted list of the checkpoints stored in `directory`."""
+  return sorted(
+      int(filename[len(_CHECKPOINT_PREFIX):-len(_CHECKPOINT_SUFFIX)])
+      for filename in os.listdir(directory)
+      if filename.startswith(_CHECKPOINT_PREFIX)
+      and filename.endswith(_CHECKPOINT_SUFFIX))
+
+
+def checkpoints(directory):
+  """Returns sorted list of the checkpoints of a `Deduplicator` directory."""
+  if not os.path.exists(directory):
+    return []
+  return _checkpoints(directory)
+
+
+def _resolve_checkpoint(directory, checkpoint):
+  """Returns the checkpoint to open, removing any later ones.
+
+  Args:
+    directory: Directory holding the checkpoints.
+    checkpoint: Integer checkpoint, 0 for none (i.e., empty), or None for the
+        latest.
+
+  Raises:
+    ValueError: If `checkpoint` is not stored in `directory`.
+  """
+  checkpoints = _checkpoints(directory)
+  if checkpoint is None:
+    checkpoint = checkpoints[-1] if checkpoints else 0
+  if checkpoint != 0 and checkpoint not in checkpoints:
+    raise ValueError('{} has no checkpoint {} (has {})'.format(
+        directory, checkpoint, checkpoints))
+  for later in checkpoints:
+    if later > checkpoint:
+      os.remove(_checkpoint_path(directory, later))
+  return checkpoint
+
+
+def _read_checkpoint(directory, checkpoint):
+  with open(_checkpoint_path(directory, checkpoint)) as checkpoint_file:
+    return json.load(checkpoint_file)
+
+
+def _write_checkpoint(directory, checkpoint, contents):
+  """Writes the checkpoint, and removes those before the previous one."""
+  path = _checkpoint_path(directory, checkpoint)
+  # Renamed into place, so that only complete checkpoints are read.
+  with open(path + '.tmp', 'w') as checkpoint_file:
+    json.dump(contents, checkpoint_file)
+  os.rename(path + '.tmp', path)
+  for earlier in _checkpoints(directory):
+    if earlier < checkpoint - 1:
+      os.remove(_checkpoint_path(directory, earlier))
+
+
+def fingerprints(texts):
+  """Returns uint64 array of the 64-bit fingerprints of the strings `texts`."""
+  digests = b''.join(hashlib.md5(text.encode('utf-8')).digest()[:8]
+                     for text in texts)
+  return np.frombuffer(digests, dtype='<u8').astype(np.uint64)
+
+
+class BloomFilter(object):
+  """Set of fingerprints that may have false positives, held in memory."""
+
+  def __init__(self, num_bits, num_hashes):
+    """Initializes an empty `BloomFilter`.
+
+    Args:
+      num_bits: Integer >= 1; the size of the filter.
+      num_hashes: Integer >= 1; the number of bits set per fingerprint.
+    """
+    if num_bits < 1 or num_hashes < 1:
+      raise ValueError('num_bits={} and num_hashes={} must be positive'.format(
+          num_bits, num_hashes))
+    self._num_bits = int(num_bits)
+    self._num_hashes = int(num_hashes)
+    self._bits = np.zeros((self._num_bits + 7) // 8, dtype=np.uint8)
+
+  @classmethod
+  def for_size(cls, expected_size, false_positive_rate):
+    """Returns a `BloomFilter` with the given false positive rate when full."""
+    if not 0 < false_positive_rate < 1:
+      raise ValueError('false_positive_rate={} must be in (0, 1)'.format(
+          false_positive_rate))
+    expected_size = max(1, expected_size)
+    num_bits = int(math.ceil(
+        -expected_size * math.log(false_positive_rate) / math.log(2)**2))
+    num_hashes = max(1, int(round(num_bits / expected_size * math.log(2))))
+    return cls(num_bits, num_hashes)
+
+  def _positions(self, fingerprints_):
+    """Returns array of shape `[num_hashes, len(fingerprints_)]` of bits."""
+    # Double hashing, from the two halves of the fingerprints.
+    low = fingerprints_ & np.uint64(0xffffffff)
+    high = (fingerprints_ >> np.uint64(32)) | np.uint64(1)
+    multiples = np.arange(self._num_hashes, dtype=np.uint64)[:, np.newaxis]
+    return (low + multiples * high) % np.uint64(self._num_bits)
+
+  def _positions_one(self, fingerprint):
+    """Returns list of the bits of the python int `fingerprint`."""
+    low = fingerprint & 0xffffffff
+    high = (fingerprint >> 32) | 1
+    return [(low + multiple * high) % self._num_bits
+            for multiple in range(self._num_hashes)]
+
+  def add_one(self, fingerprint):
+    """Adds the python int `fingerprint`."""
+    for position in self._positions_one(fingerprint):
+      self._bits[position >> 3] |= 1 << (position & 7)
+
+  def contains_one(self, fingerprint):
+    """Returns whether the python int `fingerprint` may have been added."""
+    bits = self._bits
+    return all(bits[position >> 3] >> (position & 7) & 1
+               for position in self._positions_one(fingerprint))
+
+  def add(self, fingerprints_):
+    """Adds the uint64 array of fingerprints."""
+    positions = self._positions(np.asarray(fingerprints_, dtype=np.uint64))
+    np.bitwise_or.at(
+        self._bits, (positions >> np.uint64(3)).ravel(),
+        (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)).ravel())
+
+  def contains(self, fingerprints_):
+    """Returns bool array of whether each fingerprint may have been added."""
+    positions = self._positions(np.asarray(fingerprints_, dtype=np.uint64))
+    bits = self._bits[positions >> np.uint64(3)] >> (
+        positions & np.uint64(7)).astype(np.uint8)
+    return np.all(bits & 1, axis=0)
+
+
+class DiskHashSet(object):
+  """Set of fingerprints, sharded over sorted files in a directory.
+
+  Each shard is a list of sorted runs (`.npy` files), which are memory-mapped
+  and binary searched. Added fingerprints are held in a per-shard buffer until
+  the shard has `_MAX_PENDING_PER_SHARD` of them (or all the shards have
+  `_MAX_PENDING`, when the largest buffer is written), and then written as a
+  new run; runs of similar size are merged, so that each shard has a
+  logarithmic number of runs.
+
+  The set is stored by `commit` (or `close`) as a checkpoint listing its runs,
+  and reopened by passing the same directory (and number of shards). Runs
+  merged away are only removed once no kept checkpoint lists them, and runs
+  written after the reopened checkpoint are removed.
+  """
+
+  def __init__(self, directory, expected_size=DEFAULT_EXPECTED_SIZE,
+               false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE,
+               num_shards=DEFAULT_NUM_SHARDS, checkpoint=None):
+    """Opens the set in `directory`, creating it if it does not exist.
+
+    Args:
+      directory: Path of the directory holding the shards.
+      expected_size: Number of fingerprints to size the Bloom filter for.
+      false_positive_rate: False positive rate of the Bloom filter, when
+          holding `expected_size` fingerprints.
+      num_shards: Number of shards to split the fingerprints between.
+      checkpoint: Integer checkpoint to open (one of the latest two committed),
+          0 to open an empty set, or None for the latest checkpoint.
+
+    Raises:
+      ValueError: If `checkpoint` is not stored in `directory`, or the set
+          was stored with more shards.
+    """
+    self._directory = directory
+    self._num_shards = num_shards
+    self._bloom_filter = BloomFilter.for_size(
+        expected_size, false_positive_rate)
+    # Buffers of the pending fingerprints of each shard, of which the first
+    # `_num_pending[shard]` are filled.
+    self._pending = [np.empty(_MIN_PENDING_CAPACITY, dtype=np.uint64)
+                     for _ in range(num_shards)]
+    self._num_pending = np.zeros(num_shards, dtype=np.int64)
+    self._total_pending = 0
+    # Pairs `(path, memory-mapped array)` of the runs of each shard, oldest
+    # first.
+    self._runs = [[] for _ in range(num_shards)]
+    # Paths of the runs merged away, which may still be listed by a checkpoint.
+    self._obsolete = []
+    self._next_run_id = 0
+    self._size = 0
+    if not os.path.exists(directory):
+      os.makedirs(directory)
+    self._checkpoint = _resolve_checkpoint(directory, checkpoint)
+    # Names of the runs listed by the opened (or last committed) checkpoint,
+    # and by the one before it.
+    self._committed = self._listed_runs(self._checkpoint)
+    self._previous = self._listed_runs(self._checkpoint - 1)
+    for filename in os.listdir(directory):
+      if filename.startswith(_CHECKPOINT_PREFIX):
+        continue
+      path = os.path.join(directory, filename)
+      if filename not in self._committed:
+        if filename in self._previous:
+          self._obsolete.append(path)
+        else:
+          # Written after the checkpoint, or left partially written.
+          os.remove(path)
+        continue
+      shard, run_id = [int(part) for part in filename[:-4].split('-')]
+      if shard >= num_shards:
+        raise ValueError('{} has more than {} shards'.format(
+            directory, num_shards))
+      run = np.load(path, mmap_mode='r')
+      self._bloom_filter.add(run)
+      self._size += len(run)
+      self._runs[shard].append((path, run))
+      self._next_run_id = max(self._next_run_id, run_id + 1)
+    for runs in self._runs:
+      runs.sort(key=lambda path_and_run: -len(path_and_run[1]))
+
+  def __len__(self):
+    return self._size
+
+  def _listed_runs(self, checkpoint):
+    """Returns set of the names of the runs listed by `checkpoint`."""
+    if checkpoint < 1 or not os.path.exists(
+        _checkpoint_path(self._directory, checkpoint)):
+      return set()
+    return set(_read_checkpoint(self._directory, checkpoint)['runs'])
+
+  def _remove_run(self, path):
+    """Removes the run at `path`, unless a kept checkpoint lists it."""
+    filename = os.path.basename(path)
+    if filename in self._committed or filename in self._previous:
+      self._obsolete.append(path)
+    else:
+      os.remove(path)
+
+  def _shards(self, fingerprints_):
+    return (fingerprints_ % np.uint64(self._num_shards)).astype(np.int64)
+
+  def _shard_contains(self, shard, fingerprints_):
+    """Returns bool array of whether each fingerprint is in the shard."""
+    found = np.zeros(len(fingerprints_), dtype=bool)
+    for _, run in self._runs[shard]:
+      indices = np.minimum(np.searchsorted(run, fingerprints_), len(run) - 1)
+      found |= run[indices] == fingerprints_
+    if self._num_pending[shard]:
+      found |= np.isin(fingerprints_, self._pending_fingerprints(shard))
+    return found
+
+  def _contains_one(self, fingerprint):
+    """Returns whether the python int `fingerprint` is in the set."""
+    if not self._bloom_filter.contains_one(fingerprint):
+      return False
+    shard = fingerprint % self._num_shards
+    fingerprint = np.uint64(fingerprint)
+    if np.any(self._pending_fingerprints(shard) == fingerprint):
+      return True
+    for _, run in self._runs[shard]:
+      index = np.searchsorted(run, fingerprint)
+      if index < len(run) and run[index] == fingerprint:
+        return True
+    return False
+
+  def _add_one(self, fingerprint):
+    """Adds the python int `fingerprint`, which is not in the set."""
+    self._bloom_filter.add_one(fingerprint)
+    self._size += 1
+    self._add_pending(
+        fingerprint % self._num_shards,
+        np.array([fingerprint], dtype=np.uint64))
+
+  def _pending_fingerprints(self, shard):
+    return self._pending[shard][:self._num_pending[shard]]
+
+  def _add_pending(self, shard, fingerprints_):
+    """Adds the new fingerprints to the buffer of `shard`, writing if full."""
+    start = self._num_pending[shard]
+    end = start + len(fingerprints_)
+    buffer_ = self._pending[shard]
+    if end > len(buffer_):
+      capacity = len(buffer_)
+      while capacity < end:
+        capacity *= 2
+      buffer_ = np.empty(capacity, dtype=np.uint64)
+      buffer_[:start] = self._pending[shard][:start]
+      self._pending[shard] = buffer_
+    buffer_[start:end] = fingerprints_
+    self._num_pending[shard] = end
+    self._total_pending += len(fingerprints_)
+    if end >= _MAX_PENDING_PER_SHARD:
+      self._write_run(shard)
+    while self._total_pending > _MAX_PENDING:
+      self._write_run(int(np.argmax(self._num_pending)))
+
+  def contains(self, fingerprints_):
+    """Returns bool array of whether each of the fingerprints is in the set."""
+    fingerprints_ = np.asarray(fingerprints_, dtype=np.uint64)
+    if len(fingerprints_) < MIN_BATCH_SIZE:
+      return np.array([self._contains_one(fingerprint)
+                       for fingerprint in fingerprints_.tolist()], dtype=bool)
+    found = self._bloom_filter.contains(fingerprints_)
+    candidates = np.flatnonzero(found)
+    if candidates.size:
+      shards = self._shards(fingerprints_[candidates])
+      for shard in np.unique(shards):
+        in_shard = candidates[shards == shard]
+        found[in_shard] = self._shard_contains(
+            shard, fingerprints_[in_shard])
+    return found
+
+  def add(self, fingerprints_):
+    """Adds the fingerprints to the set.
+
+    Args:
+      fingerprints_: uint64 array.
+
+    Returns:
+      Bool array of whether each fingerprint was already in the set (including
+      if it occurs earlier in `fingerprints_`).
+    """
+    fingerprints_ = np.asarray(fingerprints_, dtype=np.uint64)
+    if len(fingerprints_) < MIN_BATCH_SIZE:
+      found = []
+      for fingerprint in fingerprints_.tolist():
+        found.append(self._contains_one(fingerprint))
+        if not found[-1]:
+          self._add_one(fingerprint)
+      return np.array(found, dtype=bool)
+    unique, first_indices, inverse = np.unique(
+        fingerprints_, return_index=True, return_inverse=True)
+    unique_found = self.contains(unique)
+    new = unique[~unique_found]
+    self._bloom_filter.add(new)
+    self._size += len(new)
+    shards = self._shards(new)
+    for shard in np.unique(shards):
+      self._add_pending(shard, new[shards == shard])
+    return (unique_found[inverse]
+            | (np.arange(len(fingerprints_)) != first_indices[inverse]))
+
+  def _new_run_path(self, shard):
+    path = os.path.join(self._directory, '{:05d}-{:010d}{}'.format(
+        shard, self._next_run_id, _RUN_SUFFIX))
+    self._next_run_id += 1
+    return path
+
+  def _save_run(self, shard, run):
+    """Writes the sorted array `run` as a new run of `shard`."""
+    path = self._new_run_path(shard)
+    # Written via a file object, since `np.save` would otherwise add an
+    # extension; and renamed into place, so only complete runs are loaded.
+    with open(path + '.tmp', 'wb') as file_:
+      np.save(file_, run)
+    os.rename(path + '.tmp', path)
+    return path, np.load(path, mmap_mode='r')
+
+  def _write_run(self, shard):
+    """Writes the pending fingerprints of `shard` to disk, merging runs."""
+    if not self._num_pending[shard]:
+      return
+    runs = self._runs[shard]
+    runs.append(self._save_run(
+        shard, np.sort(self._pending_fingerprints(shard))))
+    self._total_pending -= self._num_pending[shard]
+    self._num_pending[shard] = 0
+    self._pending[shard] = np.empty(_MIN_PENDING_CAPACITY, dtype=np.uint64)
+    # Merge the newest runs while they are of similar size.
+    while len(runs) >= 2:
+      (older_path, older), (newer_path, newer) = runs[-2:]
+      if len(older) > 2 * len(newer):
+        break
+      runs[-2:] = [self._save_run(shard, np.union1d(older, newer))]
+      self._remove_run(older_path)
+      self._remove_run(newer_path)
+
+  def flush(self):
+    """Writes all the pending fingerprints to disk."""
+    for shard in range(self._num_shards):
+      self._write_run(shard)
+
+  @property
+  def checkpoint(self):
+    """The checkpoint last committed or opened (0 if none)."""
+    return self._checkpoint
+
+  def commit(self, checkpoint):
+    """Writes the set to disk, as `checkpoint` (greater than the last one)."""
+    if checkpoint <= self._checkpoint:
+      raise ValueError('checkpoint={} must be after {}'.format(
+          checkpoint, self._checkpoint))
+    self.flush()
+    runs = [os.path.basename(path)
+            for shard_runs in self._runs for path, _ in shard_runs]
+    _write_checkpoint(self._directory, checkpoint, {'runs': runs})
+    self._previous = self._committed
+    self._committed = set(runs)
+    self._checkpoint = checkpoint
+    obsolete = self._obsolete
+    self._obsolete = []
+    for path in obsolete:
+      self._remove_run(path)
+
+  def close(self):
+    self.commit(self._checkpoint + 1)
+
+
+def is_train_regime(regime):
+  """Returns whether questions of `regime` are added to the training set."""
+  return regime.startswith('train')
+
+
+class Deduplicator(object):
+  """Finds duplicate and leaked questions, and counts them per module."""
+
+  def __init__(self, directory, expected_size=DEFAULT_EXPECTED_SIZE,
+               false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE,
+               checkpoint=None):
+    """Opens the sets of questions seen so far in `directory`.
+
+    Args:
+      directory: Path of the directory to hold the sets (which are reopened,
+          if it holds them from an earlier run).
+      expected_size: Number of questions to size the Bloom filters for.
+      false_positive_rate: False positive rate of the Bloom filters, when
+          holding `expected_size` questions.
+      checkpoint: Integer checkpoint to reopen (one of the latest two returned
+          by `commit`), 0 to start empty, or None for the latest checkpoint.
+
+    Raises:
+      ValueError: If `checkpoint` is not stored in `directory`.
+    """
+    self._directory = directory
+    if not os.path.exists(directory):
+      os.makedirs(directory)
+    self._checkpoint = _resolve_checkpoint(directory, checkpoint)
+    self._seen = DiskHashSet(
+        os.path.join(directory, 'seen'), expected_size, false_positive_rate,
+        checkpoint=self._checkpoint)
+    self._train = DiskHashSet(
+        os.path.join(directory, 'train'), expected_size, false_positive_rate,
+        checkpoint=self._checkpoint)
+    # Map from `(regime, module_name)` to `[examples, duplicates, leaked]`.
+    self._counts = collections.OrderedDict()
+    if self._checkpoint:
+      for regime, module_name, counts in _read_checkpoint(
+          directory, self._checkpoint)['counts']:
+        self._counts[(regime, module_name)] = counts
+
+  def modules(self):
+    """Returns list of pairs `(regime, module_name)` of the modules checked."""
+    return list(self._counts)
+
+  def check(self, regime, module_name, questions):
+    """Records the questions, and returns which are duplicates or leaked.
+
+    Args:
+      regime: Regime name, e.g., `'train-easy'` or `'interpolate'`.
+      module_name: Flattened module name, e.g., `'algebra__linear_1d'`.
+      questions: List of strings.
+
+    Returns:
+      Pair `(duplicate, leaked)` of bool arrays of the same length as
+      `questions`.
+    """
+    prefix = regime + '/' + module_name + '\n'
+    duplicate = self._seen.add(
+        fingerprints([prefix + question for question in questions]))
+    question_fingerprints = fingerprints(questions)
+    if is_train_regime(regime):
+      self._train.add(question_fingerprints)
+      leaked = np.zeros(len(questions), dtype=bool)
+    else:
+      leaked = self._train.contains(question_fingerprints)
+    counts = self._counts.setdefault((regime, module_name), [0, 0, 0])
+    counts[0] += len(questions)
+    counts[1] += int(np.sum(duplicate))
+    counts[2] += int(np.sum(leaked))
+    return duplicate, leaked
+
+  def stats(self, regime=None, module_name=None):
+    """Returns the counts of the questions checked.
+
+    Args:
+      regime: Regime name, or None for all regimes.
+      module_name: Module name, or None for all modules.
+
+    Returns:
+      Dict mapping `'regime/module_name'` to a dict with the number of
+      `examples`, `duplicates` and `leaked` checked, and the `duplicate_rate`
+      and `leak_rate`.
+    """
+    stats_ = collections.OrderedDict()
+    for (regime_, module_name_), counts in six.iteritems(self._counts):
+      if regime not in (None, regime_):
+        continue
+      if module_name not in (None, module_name_):
+        continue
+      examples, duplicates, leaked = counts
+      stats_[regime_ + '/' + module_name_] = {
+          'examples': examples,
+          'duplicates': duplicates,
+          'leaked': leaked,
+          'duplicate_rate': duplicates / max(1, examples),
+          'leak_rate': leaked / max(1, examples),
+      }
+    return stats_
+
+  def commit(self):
+    """Writes the sets to disk as a new checkpoint, and returns it."""
+    checkpoint = self._checkpoint + 1
+    self._seen.commit(checkpoint)
+    self._train.commit(checkpoint)
+    counts = [[regime, module_name, counts]
+              for (regime, module_name), counts in six.iteritems(self._counts)]
+    _write_checkpoint(self._directory, checkpoint, {'counts': counts})
+    self._checkpoint = checkpoint
+    return checkpoint
+
+  def close(self):
+    self.commit()
+
+
+def format_stats(stats_):
+  """Returns a human-readable table of `Deduplicator.stats`."""
+  lines = []
+  for name, module_stats in six.iteritems(stats_):
+    lines.append(
+        '{:<60} {:>10d} examples {:>7.3%} duplicates {:>7.3%} leaked'.format(
+            name, module_stats['examples'], module_stats['duplicate_rate'],
+            module_stats['leak_rate']))
+  return '\n'.join(lines)
@@ -0,0 +1,216 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.dedup."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+# Dependency imports
+from absl.testing import absltest
+from absl.testing import parameterized
+from mathematics_dataset import dedup
+import numpy as np
+
+
+def _random_fingerprints(count, seed):
+  random_state = np.random.RandomState(seed)
+  return random_state.randint(
+      0, 2**63, size=count, dtype=np.int64).astype(np.uint64)
+
+
+class FingerprintsTest(absltest.TestCase):
+
+  def testFingerprints(self):
+    fingerprints = dedup.fingerprints(['What is 1 + 1?', 'Is 7 prime?', ''])
+    self.assertEqual(fingerprints.dtype, np.uint64)
+    self.assertLen(np.unique(fingerprints), 3)
+    np.testing.assert_array_equal(
+        fingerprints[:1], dedup.fingerprints(['What is 1 + 1?']))
+
+
+class BloomFilterTest(absltest.TestCase):
+
+  def testNoFalseNegatives(self):
+    bloom_filter = dedup.BloomFilter.for_size(1000, 0.01)
+    added = _random_fingerprints(1000, seed=1)
+    bloom_filter.add(added[:500])
+    for fingerprint in added[500:].tolist():
+      bloom_filter.add_one(fingerprint)
+    self.assertTrue(np.all(bloom_filter.contains(added)))
+    self.assertTrue(all(bloom_filter.contains_one(fingerprint)
+                        for fingerprint in added.tolist()))
+
+  def testFalsePositiveRate(self):
+    bloom_filter = dedup.BloomFilter.for_size(1000, 0.01)
+    bloom_filter.add(_random_fingerprints(1000, seed=1))
+    false_positives = bloom_filter.contains(_random_fingerprints(10000, seed=2))
+    self.assertLess(np.mean(false_positives), 0.03)
+
+  def testInvalidArguments(self):
+    with self.assertRaises(ValueError):
+      dedup.BloomFilter(0, 1)
+    with self.assertRaises(ValueError):
+      dedup.BloomFilter.for_size(1000, 1.5)
+
+
+class DiskHashSetTest(parameterized.TestCase):
+
+  def setUp(self):
+    super(DiskHashSetTest, self).setUp()
+    self._directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self._directory)
+    original_max_pending = dedup._MAX_PENDING_PER_SHARD
+    dedup._MAX_PENDING_PER_SHARD = 10  # so that runs are written and merged
+    self.addCleanup(
+        setattr, dedup, '_MAX_PENDING_PER_SHARD', original_max_pending)
+
+  def _set(self):
+    return dedup.DiskHashSet(
+        self._directory, expected_size=100, num_shards=4)
+
+  @parameterized.parameters(1, 1000)
+  def testAdd(self, batch_size):
+    hash_set = self._set()
+    fingerprints = _random_fingerprints(1000, seed=1)
+    for start in range(0, 1000, batch_size):
+      found = hash_set.add(fingerprints[start:start + batch_size])
+      self.assertFalse(np.any(found))
+    self.assertLen(hash_set, 1000)
+    self.assertTrue(np.all(hash_set.add(fingerprints[::7])))
+    self.assertTrue(np.all(hash_set.contains(fingerprints)))
+    self.assertFalse(np.any(
+        hash_set.contains(_random_fingerprints(1000, seed=2))))
+    self.assertLen(hash_set, 1000)
+    # Runs are merged, so each shard has few of them.
+    self.assertLess(len(os.listdir(self._directory)), 40)
+
+  @parameterized.parameters(1, 100)
+  def testPendingBounded(self, batch_size):
+    original_max_pending = dedup._MAX_PENDING
+    dedup._MAX_PENDING = 25
+    self.addCleanup(setattr, dedup, '_MAX_PENDING', original_max_pending)
+    hash_set = self._set()
+    fingerprints = _random_fingerprints(1000, seed=1)
+    max_bytes = 16 * dedup._MAX_PENDING + 8 * dedup._MIN_PENDING_CAPACITY * 4
+    for start in range(0, 1000, batch_size):
+      hash_set.add(fingerprints[start:start + batch_size])
+      self.assertLessEqual(hash_set._total_pending, dedup._MAX_PENDING)
+      self.assertLessEqual(
+          sum(buffer_.nbytes for buffer_ in hash_set._pending), max_bytes)
+    self.assertTrue(np.all(hash_set.contains(fingerprints)))
+
+  def testDuplicatesWithinBatch(self):
+    hash_set = self._set()
+    fingerprints = np.array([5, 3, 5, 5, 3, 8], dtype=np.uint64)
+    np.testing.assert_array_equal(
+        hash_set.add(fingerprints), [False, False, True, True, True, False])
+    np.testing.assert_array_equal(
+        hash_set.add(np.tile(fingerprints, 10))[:6], [True] * 6)
+    self.assertLen(hash_set, 3)
+
+  def testReopen(self):
+    hash_set = self._set()
+    fingerprints = _random_fingerprints(1000, seed=1)
+    hash_set.add(fingerprints)
+    hash_set.close()
+    hash_set = self._set()
+    self.assertLen(hash_set, 1000)
+    self.assertTrue(np.all(hash_set.contains(fingerprints)))
+    self.assertTrue(hash_set.contains(fingerprints[:1])[0])
+
+  def testReopenCheckpoint(self):
+    hash_set = self._set()
+    fingerprints = _random_fingerprints(1000, seed=1)
+    hash_set.add(fingerprints[:500])
+    hash_set.commit(1)
+    hash_set.add(fingerprints[500:])  # runs merged, and written
+    hash_set.commit(2)
+    hash_set.add(_random_fingerprints(100, seed=2))
+    hash_set.flush()
+    # Reopening the previous checkpoint discards the later fingerprints.
+    hash_set = dedup.DiskHashSet(
+        self._directory, expected_size=100, num_shards=4, checkpoint=1)
+    self.assertLen(hash_set, 500)
+    self.assertTrue(np.all(hash_set.contains(fingerprints[:500])))
+    self.assertFalse(np.any(hash_set.contains(fingerprints[500:])))
+    with self.assertRaises(ValueError):
+      dedup.DiskHashSet(self._directory, num_shards=4, checkpoint=2)
+    hash_set.add(fingerprints[500:])
+    hash_set.commit(2)
+    hash_set.add(fingerprints[:10])
+    hash_set.commit(3)
+    hash_set = self._set()  # the latest checkpoint
+    self.assertEqual(hash_set.checkpoint, 3)
+    self.assertLen(hash_set, 1000)
+    self.assertTrue(np.all(hash_set.contains(fingerprints)))
+
+
+class DeduplicatorTest(absltest.TestCase):
+
+  def setUp(self):
+    super(DeduplicatorTest, self).setUp()
+    self._directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self._directory)
+
+  def testDuplicatesAndLeaks(self):
+    deduplicator = dedup.Deduplicator(self._directory, expected_size=100)
+    duplicate, leaked = deduplicator.check(
+        'train', 'algebra', ['What is 1 + 1?', 'Is 7 prime?', 'Is 7 prime?'])
+    np.testing.assert_array_equal(duplicate, [False, False, True])
+    np.testing.assert_array_equal(leaked, [False, False, False])
+    # The same question in another module is not a duplicate.
+    duplicate, _ = deduplicator.check('train', 'numbers', ['Is 7 prime?'])
+    np.testing.assert_array_equal(duplicate, [False])
+    duplicate, leaked = deduplicator.check(
+        'interpolate', 'algebra', ['Is 7 prime?', 'Is 9 prime?'])
+    np.testing.assert_array_equal(duplicate, [False, False])
+    np.testing.assert_array_equal(leaked, [True, False])
+
+    stats = deduplicator.stats()
+    self.assertEqual(
+        list(stats), ['train/algebra', 'train/numbers', 'interpolate/algebra'])
+    self.assertEqual(stats['train/algebra']['examples'], 3)
+    self.assertEqual(stats['train/algebra']['duplicates'], 1)
+    self.assertEqual(stats['interpolate/algebra']['leaked'], 1)
+    self.assertEqual(stats['interpolate/algebra']['leak_rate'], 0.5)
+    self.assertEqual(list(deduplicator.stats(regime='interpolate')),
+                     ['interpolate/algebra'])
+    self.assertIn('interpolate/algebra', dedup.format_stats(stats))
+
+  def testReopenCheckpoint(self):
+    deduplicator = dedup.Deduplicator(self._directory, expected_size=100)
+    deduplicator.check('train', 'algebra', ['What is 1 + 1?'])
+    self.assertEqual(deduplicator.commit(), 1)
+    deduplicator.check('train', 'numbers', ['Is 7 prime?'])
+    self.assertEqual(deduplicator.commit(), 2)
+
+    deduplicator = dedup.Deduplicator(
+        self._directory, expected_size=100, checkpoint=1)
+    self.assertEqual(deduplicator.modules(), [('train', 'algebra')])
+    self.assertEqual(deduplicator.stats()['train/algebra']['examples'], 1)
+    duplicate, _ = deduplicator.check(
+        'train', 'algebra', ['What is 1 + 1?'])
+    np.testing.assert_array_equal(duplicate, [True])
+    _, leaked = deduplicator.check('interpolate', 'numbers', ['Is 7 prime?'])
+    np.testing.assert_array_equal(leaked, [False])
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -51,7 +51,9 @@ def question(context, template, **kwargs):
   prefix, kwargs = composition.expand_entities(context, **kwargs)
   if prefix:
     prefix += ' '
-  return prefix + template.format(**kwargs)
+  question_ = prefix + template.format(**kwargs)
+  composition.check_question_length(len(question_))
+  return question_
 
 
 Problem = collections.namedtuple('Problem', ('question', 'answer'))
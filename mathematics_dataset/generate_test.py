@@ -28,12 +28,6 @@ from six.moves import range
 
 class GenerateTest(parameterized.TestCase):
 
-  def testMakeEntropyFn(self):
-    entropy_full = generate._make_entropy_fn(0, 1)
-    self.assertEqual(entropy_full((2, 3)), (2, 3))
-    entropy_third = generate._make_entropy_fn(2, 3)
-    self.assertEqual(entropy_third((3, 6)), (5, 6))
-
   @parameterized.parameters('train', 'interpolate', 'extrapolate')
   def testGenerate(self, regime):
     generate.init_modules()
@@ -28,51 +28,629 @@ answer.
 
 Passing --train_split=False will create a single output directory 'train' for
 training data.
+
+Each module is generated in one or more shards of at most --examples_per_shard
+examples. Passing --num_workers > 1 generates the shards in a pool of processes;
+each shard is first written to its own file, and the shards of a module are then
+merged into the text file described above. Passing --seed makes the output
+reproducible: each shard is seeded from the global seed and its regime, module
+and shard index, so it does not depend on --num_workers.
+
+Passing --output_format=tokens instead writes a `.npy` file for each module,
+containing the questions and answers as fixed-width arrays of character indices
+(see `tokenization`), which training jobs can memory-map without any parsing.
+
+Progress is recorded in `manifest.jsonl` in the output directory, with a line
+for each finished shard (module, shard index, count, seed and checksum) and for
+each merged module. If generation is interrupted, rerunning with --resume skips
+the finished shards and modules, and regenerates only the missing or partially
+written shards.
+
+Passing --dedup=report checks each module's questions as its shards are merged,
+for duplicates within the module, and for test questions leaked from the
+training data (see `dedup`; the training modules are merged first). The numbers
+of duplicates and leaks are added to the module's manifest line, and summarized
+per module in `dedup.json`. Passing --dedup=drop also removes those examples, so
+that modules may have fewer examples than requested. The sets of questions seen
+are held on disk in the `dedup` subdirectory, sized by
+--dedup_expected_examples, and committed as each module is merged, so that
+--resume reopens them rather than checking the merged modules again.
 """
 
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
+import hashlib
+import json
+import math
+import multiprocessing
 import os
+import shutil
 
 # Dependency imports
 from absl import app
 from absl import flags
 from absl import logging
+from mathematics_dataset import dedup
 from mathematics_dataset import generate
+from mathematics_dataset import generation
+from mathematics_dataset import tokenization
+from mathematics_dataset.util import profiling
+from mathematics_dataset.util import seeding
+import numpy as np
 import six
+from six.moves import map
 from six.moves import range
 
 FLAGS = flags.FLAGS
 
 flags.DEFINE_string('output_dir', None, 'Where to write output text')
-flags.DEFINE_boolean('train_split', True,
-                     'Whether to split training data by difficulty')
+# Defined by `generate`; unlike there, training data is split by default.
+FLAGS.set_default('train_split', True)
+flags.DEFINE_integer('examples_per_shard', 100000,
+                     'Maximum number of examples in each shard')
+flags.DEFINE_boolean('resume', False,
+                     'Whether to continue generating into an existing '
+                     'output_dir, skipping the shards already finished')
+flags.DEFINE_enum('output_format', 'text', ['text', 'tokens'],
+                  'Whether to write text files, or .npy files of tokenized '
+                  'examples')
+flags.DEFINE_enum('dedup', 'off', ['off', 'report', 'drop'],
+                  'Whether to count duplicate and leaked questions, and '
+                  'whether to remove them')
+flags.DEFINE_integer('dedup_expected_examples', dedup.DEFAULT_EXPECTED_SIZE,
+                     'Number of examples to size the in-memory filters of '
+                     '--dedup for')
 flags.mark_flag_as_required('output_dir')
 
 
-def main(unused_argv):
-  generate.init_modules(FLAGS.train_split)
+_MANIFEST_FILENAME = 'manifest.jsonl'
+
+_DEDUP_DIRNAME = 'dedup'
+_DEDUP_STATS_FILENAME = 'dedup.json'
+
+# Suffix of the copy of a shard with duplicates removed, by --dedup=drop.
+_DEDUP_SUFFIX = '.dedup.tmp'
+
+# Number of examples read at a time from a module merged without --dedup, when
+# adding its questions to the sets of questions seen on resuming.
+_READ_BATCH_SIZE = 10000
+
+_EXTENSIONS = {'text': '.txt', 'tokens': '.npy'}
+
+
+# A unit of work: `count` examples from one module, written to one shard file.
+_Shard = collections.namedtuple(
+    '_Shard', ('regime', 'module_name', 'index', 'num_shards', 'count'))
+
+# Returned by a worker for each shard written. `profile` holds the sympy
+# profiling stats for the shard (see `profiling.stats`), if --profile_sympy.
+_ShardResult = collections.namedtuple(
+    '_ShardResult', ('shard', 'seed', 'checksum', 'num_dropped', 'profile'))
+
+
+class _State(object):
+  """Holds the generator of this process, configured from the flags."""
+
+  def __init__(self):
+    self.generator = None
+
+
+_STATE = _State()
+
+
+def _generator():
+  """Returns the `generation.Generator` of this process."""
+  if _STATE.generator is None:
+    _STATE.generator = generation.Generator(
+        generate.config_from_flags(FLAGS.train_split))
+  return _STATE.generator
+
+
+def _shards():
+  """Returns list of `_Shard`s covering all the examples to be generated."""
+  shards = []
+  for regime, flat_modules in six.iteritems(_generator().modules):
+    per_module = _generator().config.count(regime)
+    num_shards = max(1, int(math.ceil(per_module / FLAGS.examples_per_shard)))
+    for module_name in flat_modules:
+      for index in range(num_shards):
+        # Spread the examples as evenly as possible over the shards.
+        count = ((index + 1) * per_module // num_shards
+                 - index * per_module // num_shards)
+        shards.append(_Shard(regime, module_name, index, num_shards, count))
+  return shards
+
+
+def _module_path(output_dir, regime, module_name):
+  return os.path.join(
+      output_dir, regime, module_name + _EXTENSIONS[FLAGS.output_format])
+
+
+def _shard_path(output_dir, shard):
+  return '{}-{:05d}-of-{:05d}'.format(
+      _module_path(output_dir, shard.regime, shard.module_name),
+      shard.index, shard.num_shards)
+
+
+def _checksum(path):
+  """Returns the hex SHA-256 digest of the file at `path`."""
+  digest = hashlib.sha256()
+  with open(path, 'rb') as file_:
+    for chunk in iter(lambda: file_.read(1 << 20), b''):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+class _Manifest(object):
+  """Append-only record of the finished shards and merged modules.
+
+  Each line of the manifest file is a JSON object, describing either a shard
+  (`"type": "shard"`) or a module whose shards have been merged (`"type":
+  "module"`). Records are only appended once the corresponding file is
+  complete, so anything not in the manifest is regenerated on resuming.
+  """
+
+  def __init__(self, output_dir):
+    self._output_dir = output_dir
+    self._path = os.path.join(output_dir, _MANIFEST_FILENAME)
+    self._shards = {}
+    self._modules = {}
+    if os.path.exists(self._path):
+      with open(self._path) as manifest_file:
+        for line in manifest_file:
+          try:
+            record = json.loads(line)
+          except ValueError:
+            continue  # a line truncated by an interrupted write
+          if record['type'] == 'shard':
+            self._shards[self._shard_key(record)] = record
+          else:
+            self._modules[(record['regime'], record['module'])] = record
+
+  @staticmethod
+  def _shard_key(record):
+    return (record['regime'], record['module'], record['shard'],
+            record['num_shards'], record['count'])
+
+  def _append(self, record):
+    with open(self._path, 'a') as manifest_file:
+      manifest_file.write(json.dumps(record, sort_keys=True) + '\n')
+      manifest_file.flush()
+      os.fsync(manifest_file.fileno())
+
+  def has_shard(self, shard, seed=None):
+    """Returns whether `shard` is finished (with the given seed, if not None)."""
+    record = self._shards.get(tuple(shard))
+    if record is None or (seed is not None and record['seed'] != seed):
+      return False
+    path = _shard_path(self._output_dir, shard)
+    return os.path.exists(path) and _checksum(path) == record['checksum']
+
+  def has_module(self, regime, module_name, count):
+    """Returns whether the module has been fully generated and merged."""
+    record = self._modules.get((regime, module_name))
+    if record is None or record['count'] != count:
+      return False
+    path = _module_path(self._output_dir, regime, module_name)
+    return os.path.exists(path) and _checksum(path) == record['checksum']
+
+  def add_shard(self, result):
+    shard = result.shard
+    record = {
+        'type': 'shard',
+        'regime': shard.regime,
+        'module': shard.module_name,
+        'shard': shard.index,
+        'num_shards': shard.num_shards,
+        'count': shard.count,
+        'seed': result.seed,
+        'checksum': result.checksum,
+        'dropped': result.num_dropped,
+    }
+    self._shards[self._shard_key(record)] = record
+    self._append(record)
+
+  def num_dropped(self, regime, module_name, num_shards):
+    """Returns the total number of examples dropped in the module's shards."""
+    return sum(
+        record['dropped'] for record in six.itervalues(self._shards)
+        if (record['regime'], record['module'], record['num_shards'])
+        == (regime, module_name, num_shards))
+
+  def add_module(self, regime, module_name, count, checksum, num_dropped,
+                 dedup_counts=None):
+    """Records a merged module.
+
+    Args:
+      regime: Regime name.
+      module_name: Flattened module name.
+      count: Number of examples requested for the module.
+      checksum: Checksum of the merged file.
+      num_dropped: Number of examples dropped for being too long.
+      dedup_counts: Optional dict with the numbers of `duplicates`, `leaked`
+          and `removed` examples, and the `dedup_checkpoint` committed after
+          checking them, if deduplicated.
+    """
+    record = {
+        'type': 'module',
+        'regime': regime,
+        'module': module_name,
+        'count': count,
+        'checksum': checksum,
+        'dropped': num_dropped,
+    }
+    if dedup_counts is not None:
+      record.update(dedup_counts)
+    self._modules[(regime, module_name)] = record
+    self._append(record)
+
+  def modules(self):
+    """Returns list of the records of the merged modules."""
+    return list(six.itervalues(self._modules))
+
+
+def _init_worker(argv):
+  """Parses flags in a (possibly spawned) worker.
+
+  The modules are not built here; a spawned worker's generator only builds the
+  modules of the shards it is given (see `generation.Generator.module`).
+  """
+  if not FLAGS.is_parsed():
+    FLAGS(argv)
+  if FLAGS.profile_sympy:
+    profiling.enable()
+
+
+def _shard_seed(shard):
+  """Returns the seed for `shard`, or None if no global seed was given."""
+  if FLAGS.seed is None:
+    return None
+  return seeding.derive_seed(
+      FLAGS.seed, shard.regime, shard.module_name, shard.index)
+
+
+def _generate_shard(shard):
+  """Writes the examples of `shard`; returns a `_ShardResult`."""
+  # Each shard samples from its own random stream. Without a global seed, this
+  # is seeded randomly (rather than inherited by forked workers), and the seed
+  # is recorded in the manifest so that the shard can still be reproduced.
+  generator = _generator()
+  seed = generator.seed(shard.regime, shard.module_name, shard.index)
+  path = _shard_path(os.path.expanduser(FLAGS.output_dir), shard)
+  num_dropped = [0]
+
+  def problems():
+    for _ in range(shard.count):
+      with profiling.scope(shard.regime + '/' + shard.module_name):
+        problem, extra_dropped = generator.sample(
+            shard.regime, shard.module_name, shard.index)
+        question, answer = str(problem.question), str(problem.answer)
+      num_dropped[0] += extra_dropped
+      yield question, answer
+
+  # Write to a temporary file first, so that only complete shards ever exist.
+  if FLAGS.output_format == 'tokens':
+    examples = np.zeros(shard.count, dtype=tokenization.EXAMPLE_DTYPE)
+    for i, (question, answer) in enumerate(problems()):
+      examples[i] = tokenization.encode_example(question, answer)
+    tokenization.save(path + '.tmp', examples)
+    checksum = _checksum(path + '.tmp')
+  else:
+    digest = hashlib.sha256()
+    with open(path + '.tmp', 'w') as text_file:
+      for question, answer in problems():
+        lines = question + '\n' + answer + '\n'
+        text_file.write(lines)
+        digest.update(lines.encode('utf-8'))
+    checksum = digest.hexdigest()
+  os.rename(path + '.tmp', path)
+  profile = profiling.stats()
+  profiling.reset()
+  return _ShardResult(
+      shard=shard, seed=seed, checksum=checksum, num_dropped=num_dropped[0],
+      profile=profile)
+
+
+def _module_shard_paths(output_dir, regime, module_name, num_shards):
+  return [
+      _shard_path(output_dir, _Shard(regime, module_name, index, num_shards, 0))
+      for index in range(num_shards)]
+
+
+def _example_batches(path, batch_size):
+  """Yields the examples in a module or shard file, in batches.
+
+  Args:
+    path: Path to the file, in --output_format.
+    batch_size: Maximum number of examples per batch.
+
+  Yields:
+    Pairs `(questions, examples)`, where `questions` is a list of strings, and
+    `examples` is an array of dtype `tokenization.EXAMPLE_DTYPE`, or a list of
+    the question and answer lines of each example (for text files).
+  """
+  if FLAGS.output_format == 'tokens':
+    examples = tokenization.load(path)
+    for start in range(0, len(examples), batch_size):
+      batch = examples[start:start + batch_size]
+      questions = [tokenization.decode_example(example)[0] for example in batch]
+      yield questions, batch
+    return
+  with open(path) as text_file:
+    while True:
+      questions = []
+      examples = []
+      for question in text_file:
+        examples.append(question + next(text_file))
+        questions.append(question[:-1])
+        if len(examples) == batch_size:
+          break
+      if not examples:
+        return
+      yield questions, examples
+
+
+def _dedup_shards(deduplicator, regime, module_name, shard_paths):
+  """Checks the questions of a module's shards for duplicates and leaks.
+
+  With --dedup=drop, the shards are also copied without those examples.
+
+  Args:
+    deduplicator: A `dedup.Deduplicator`.
+    regime: Regime name.
+    module_name: Flattened module name.
+    shard_paths: List of paths to the module's shards.
+
+  Returns:
+    Pair `(shard_paths, counts)`, where `shard_paths` are the paths of the
+    shards to merge, and `counts` is a dict with the numbers of `duplicates`,
+    `leaked` and `removed` examples.
+  """
+  counts = {'duplicates': 0, 'leaked': 0, 'removed': 0}
+  drop = FLAGS.dedup == 'drop'
+  output_paths = []
+  for shard_path in shard_paths:
+    kept = []
+    for questions, examples in _example_batches(
+        shard_path, FLAGS.examples_per_shard):
+      duplicate, leaked = deduplicator.check(regime, module_name, questions)
+      removed = duplicate | leaked
+      counts['duplicates'] += int(np.sum(duplicate))
+      counts['leaked'] += int(np.sum(leaked))
+      counts['removed'] += int(np.sum(removed)) if drop else 0
+      if FLAGS.output_format == 'tokens':
+        kept.append(examples[~removed])
+      else:
+        kept.extend(
+            example for example, remove in zip(examples, removed)
+            if not remove)
+    if not drop:
+      output_paths.append(shard_path)
+      continue
+    output_path = shard_path + _DEDUP_SUFFIX
+    if FLAGS.output_format == 'tokens':
+      tokenization.save(output_path, np.concatenate(
+          kept or [np.zeros(0, dtype=tokenization.EXAMPLE_DTYPE)]))
+    else:
+      with open(output_path, 'w') as text_file:
+        text_file.writelines(kept)
+    output_paths.append(output_path)
+  return output_paths, counts
+
+
+def _open_dedup(output_dir, manifest):
+  """Returns a `dedup.Deduplicator` that has seen the merged modules.
+
+  The sets of questions seen are reopened at the last checkpoint recorded in
+  the manifest, which discards the questions of any module whose merging was
+  interrupted (so that they are checked again when it is merged). Modules
+  merged without --dedup (or after a checkpoint no longer kept) are then read
+  and checked, training regimes first.
+
+  Args:
+    output_dir: The output directory.
+    manifest: The `_Manifest` of the output directory.
+  """
+  dedup_dir = os.path.join(output_dir, _DEDUP_DIRNAME)
+  recorded = [record['dedup_checkpoint'] for record in manifest.modules()
+              if 'dedup_checkpoint' in record]
+  checkpoint = max(recorded) if recorded else 0
+  if checkpoint and checkpoint not in dedup.checkpoints(dedup_dir):
+    logging.warning('Dedup checkpoint %d is not kept in %s; checking the '
+                    'merged modules again', checkpoint, dedup_dir)
+    checkpoint = 0
+  deduplicator = dedup.Deduplicator(
+      dedup_dir, expected_size=FLAGS.dedup_expected_examples,
+      checkpoint=checkpoint)
+  checked = set(deduplicator.modules())
+  records = sorted(
+      manifest.modules(),
+      key=lambda record: not dedup.is_train_regime(record['regime']))
+  for record in records:
+    if (record['regime'], record['module']) in checked:
+      continue
+    path = _module_path(output_dir, record['regime'], record['module'])
+    if not os.path.exists(path):
+      continue
+    for questions, _ in _example_batches(path, _READ_BATCH_SIZE):
+      deduplicator.check(record['regime'], record['module'], questions)
+  return deduplicator
+
+
+def _merge_shards(output_dir, regime, module_name, shard_paths):
+  """Concatenates the shards of a module into a single file."""
+  path = _module_path(output_dir, regime, module_name)
+  if len(shard_paths) == 1:
+    os.rename(shard_paths[0], path)
+    return path
+  if FLAGS.output_format == 'tokens':
+    tokenization.concatenate(shard_paths, path + '.tmp')
+  else:
+    with open(path + '.tmp', 'w') as text_file:
+      for shard_path in shard_paths:
+        with open(shard_path) as shard_file:
+          shutil.copyfileobj(shard_file, text_file)
+  os.rename(path + '.tmp', path)
+  return path
+
+
+def _remove_shards(output_dir, regime, module_name, num_shards):
+  for shard_path in _module_shard_paths(
+      output_dir, regime, module_name, num_shards):
+    for path in (shard_path, shard_path + _DEDUP_SUFFIX):
+      if os.path.exists(path):
+        os.remove(path)
+
+
+def _write_dedup_stats(output_dir, manifest):
+  """Writes the duplicate and leak counts of each module to `dedup.json`."""
+  stats = collections.OrderedDict()
+  for record in sorted(manifest.modules(),
+                       key=lambda record: (record['regime'], record['module'])):
+    if 'duplicates' not in record:
+      continue  # merged in an earlier run without --dedup
+    count = max(1, record['count'])
+    stats[record['regime'] + '/' + record['module']] = {
+        'examples': record['count'],
+        'duplicates': record['duplicates'],
+        'leaked': record['leaked'],
+        'removed': record['removed'],
+        'duplicate_rate': record['duplicates'] / count,
+        'leak_rate': record['leaked'] / count,
+    }
+  path = os.path.join(output_dir, _DEDUP_STATS_FILENAME)
+  with open(path, 'w') as stats_file:
+    stats_file.write(json.dumps(stats, indent=2) + '\n')
+  logging.info('Duplicates and leaks per module:\n%s',
+               dedup.format_stats(stats))
+
+
+def main(argv):
+  generator = _generator()
+  if FLAGS.profile_sympy:
+    profiling.enable()
 
   output_dir = os.path.expanduser(FLAGS.output_dir)
-  if os.path.exists(output_dir):
-    logging.fatal('output dir %s already exists', output_dir)
+  if os.path.exists(output_dir) and not FLAGS.resume:
+    logging.fatal('output dir %s already exists (pass --resume to continue '
+                  'generating into it)', output_dir)
   logging.info('Writing to %s', output_dir)
-  os.makedirs(output_dir)
-
-  for regime, flat_modules in six.iteritems(generate.filtered_modules):
+  for regime in generator.modules:
     regime_dir = os.path.join(output_dir, regime)
-    os.mkdir(regime_dir)
-    per_module = generate.counts[regime]
-    for module_name, module in six.iteritems(flat_modules):
-      path = os.path.join(regime_dir, module_name + '.txt')
-      with open(path, 'w') as text_file:
-        for _ in range(per_module):
-          problem, _ = generate.sample_from_module(module)
-          text_file.write(str(problem.question) + '\n')
-          text_file.write(str(problem.answer) + '\n')
-      logging.info('Written %s', path)
+    if not os.path.exists(regime_dir):
+      os.makedirs(regime_dir)
+    # Remove files left partially written by an interrupted run.
+    for filename in os.listdir(regime_dir):
+      if filename.endswith('.tmp'):
+        os.remove(os.path.join(regime_dir, filename))
+
+  manifest = _Manifest(output_dir)
+  shards = []
+  for shard in _shards():
+    if manifest.has_module(
+        shard.regime, shard.module_name, generator.config.count(shard.regime)):
+      continue
+    shards.append(shard)
+  pending = [shard for shard in shards
+             if not manifest.has_shard(shard, seed=_shard_seed(shard))]
+  logging.info('Generating %d shards (%d already finished)',
+               len(pending), len(shards) - len(pending))
+
+  if FLAGS.dedup == 'off':
+    deduplicator = None
+  else:
+    deduplicator = _open_dedup(output_dir, manifest)
+
+  def merge(regime, module_name, num_shards):
+    shard_paths = _module_shard_paths(
+        output_dir, regime, module_name, num_shards)
+    dedup_counts = None
+    if deduplicator is not None:
+      shard_paths, dedup_counts = _dedup_shards(
+          deduplicator, regime, module_name, shard_paths)
+    path = _merge_shards(output_dir, regime, module_name, shard_paths)
+    if deduplicator is not None:
+      # Committed before the module is recorded, so that resuming reopens the
+      # sets as of the last module recorded.
+      dedup_counts['dedup_checkpoint'] = deduplicator.commit()
+    count = generator.config.count(regime)
+    num_dropped = manifest.num_dropped(regime, module_name, num_shards)
+    manifest.add_module(
+        regime, module_name, count, _checksum(path), num_dropped,
+        dedup_counts=dedup_counts)
+    # Only remove the shards once the merged module is in the manifest.
+    _remove_shards(output_dir, regime, module_name, num_shards)
+    logging.info('Written %s (dropped %d, %.2f per accepted)', path,
+                 num_dropped, num_dropped / max(1, count))
+    if dedup_counts is not None:
+      logging.info('%s/%s: %d duplicates, %d leaked, %d removed', regime,
+                   module_name, dedup_counts['duplicates'],
+                   dedup_counts['leaked'], dedup_counts['removed'])
+
+  # With --dedup, the test modules are merged after all the training modules,
+  # so that their questions are checked against all the training questions.
+  unmerged_train = set()
+  deferred = []
+
+  def finish(key):
+    regime = key[0]
+    if deduplicator is not None and not dedup.is_train_regime(regime):
+      if unmerged_train:
+        deferred.append(key)
+        return
+    merge(*key)
+    unmerged_train.discard(key)
+    if not unmerged_train:
+      while deferred:
+        merge(*deferred.pop(0))
+
+  shards_remaining = collections.OrderedDict()
+  for shard in shards:
+    key = (shard.regime, shard.module_name, shard.num_shards)
+    shards_remaining.setdefault(key, 0)
+  for shard in pending:
+    shards_remaining[(shard.regime, shard.module_name, shard.num_shards)] += 1
+  if deduplicator is not None:
+    unmerged_train.update(
+        key for key in shards_remaining if dedup.is_train_regime(key[0]))
+  # Modules whose shards all finished before being merged.
+  for key, remaining in list(six.iteritems(shards_remaining)):
+    if remaining == 0:
+      finish(key)
+
+  if FLAGS.num_workers > 1:
+    pool = multiprocessing.Pool(
+        FLAGS.num_workers, initializer=_init_worker, initargs=(argv,))
+    results = pool.imap_unordered(_generate_shard, pending)
+  else:
+    pool = None
+    results = map(_generate_shard, pending)
+
+  profile = {}
+  for result in results:
+    shard = result.shard
+    manifest.add_shard(result)
+    profile = profiling.merge(profile, result.profile)
+    key = (shard.regime, shard.module_name, shard.num_shards)
+    shards_remaining[key] -= 1
+    if shards_remaining[key] == 0:
+      finish(key)
+
+  if pool is not None:
+    pool.close()
+    pool.join()
+
+  if deduplicator is not None:
+    # Not committed again: each merged module was committed (and recorded) as
+    # it was merged, and resuming reopens the last checkpoint recorded.
+    _write_dedup_stats(output_dir, manifest)
+
+  if FLAGS.profile_sympy:
+    logging.info('Time in sympy per module:\n%s',
+                 profiling.format_stats(profile))
 
 
 if __name__ == '__main__':
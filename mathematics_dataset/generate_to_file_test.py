@@ -0,0 +1,337 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.generate_to_file."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+
+# Dependency imports
+from absl import flags
+from absl.testing import absltest
+from absl.testing import flagsaver
+from absl.testing import parameterized
+from mathematics_dataset import dedup
+from mathematics_dataset import generate_to_file
+from mathematics_dataset import tokenization
+import numpy as np
+
+FLAGS = flags.FLAGS
+
+# Small enough to generate quickly, in several shards per module.
+_FLAGS = {
+    'filter': 'numbers__gcd',
+    'per_train_module': 30,
+    'per_test_module': 10,
+    'examples_per_shard': 4,
+    'seed': 1,
+}
+
+# Modules in the train, interpolate and extrapolate regimes, for --dedup.
+_DEDUP_FLAGS = dict(_FLAGS, filter='numbers__place_value', dedup='drop')
+
+
+class _Interrupted(Exception):
+  """Raised to simulate generation being interrupted."""
+
+
+def setUpModule():
+  # Other test runners (e.g., pytest) do not parse the flags.
+  if not FLAGS.is_parsed():
+    FLAGS.mark_as_parsed()
+
+
+def _read_manifest(output_dir):
+  with open(os.path.join(output_dir, 'manifest.jsonl')) as manifest_file:
+    return [json.loads(line) for line in manifest_file]
+
+
+def _output_files(output_dir):
+  """Returns dict mapping relative path to contents of the generated files."""
+  files = {}
+  for regime in os.listdir(output_dir):
+    regime_dir = os.path.join(output_dir, regime)
+    if not os.path.isdir(regime_dir) or regime == 'dedup':
+      continue
+    for filename in os.listdir(regime_dir):
+      with open(os.path.join(regime_dir, filename), 'rb') as file_:
+        files[os.path.join(regime, filename)] = file_.read()
+  return files
+
+
+def _questions(path):
+  """Returns the questions in a module or shard file, in --output_format."""
+  return [question
+          for questions, _ in generate_to_file._example_batches(path, 100)
+          for question in questions]
+
+
+def _append_example(source_path, path):
+  """Appends the first example in `source_path` to the file at `path`."""
+  if FLAGS.output_format == 'tokens':
+    examples = np.concatenate(
+        [tokenization.load(path), tokenization.load(source_path)[:1]])
+    tokenization.save(path, examples)
+  else:
+    with open(source_path) as source_file:
+      example = next(source_file) + next(source_file)
+    with open(path, 'a') as text_file:
+      text_file.write(example)
+
+
+class GenerateToFileTest(parameterized.TestCase):
+
+  def setUp(self):
+    super(GenerateToFileTest, self).setUp()
+    self._directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self._directory)
+
+  def _run(self, name, **overrides):
+    """Runs `generate_to_file` into `name`; returns the output directory."""
+    output_dir = os.path.join(self._directory, name)
+    flag_values = dict(_FLAGS, output_dir=output_dir)
+    flag_values.update(overrides)
+    generate_to_file._STATE.generator = None  # configured from the flags
+    with flagsaver.flagsaver(**flag_values):
+      generate_to_file.main(['generate_to_file'])
+    return output_dir
+
+  def _patch_generate_shard(self, interrupt_after=None):
+    """Records the shards generated; returns the list they are added to.
+
+    Args:
+      interrupt_after: Number of shards to generate before raising
+          `_Interrupted`, or None. Stored as `self._interrupt_after`, which
+          tests may reset.
+    """
+    original = generate_to_file._generate_shard
+    generated = []
+    self._interrupt_after = interrupt_after
+
+    def generate_shard(shard):
+      if len(generated) == self._interrupt_after:
+        raise _Interrupted()
+      generated.append(shard)
+      return original(shard)
+
+    generate_to_file._generate_shard = generate_shard
+    self.addCleanup(setattr, generate_to_file, '_generate_shard', original)
+    return generated
+
+  def _patch_dedup_shards(self):
+    """Plants duplicates and a leak in the shards checked by --dedup.
+
+    Each module gets a second copy of its first example, and
+    `interpolate/numbers__place_value` also gets the first example of
+    `train-easy/numbers__place_value` (which must have been merged already).
+
+    Returns:
+      List that the `(regime, module_name)` of each module checked is added to.
+    """
+    original = generate_to_file._dedup_shards
+    checked = []
+
+    def dedup_shards(deduplicator, regime, module_name, shard_paths):
+      checked.append((regime, module_name))
+      _append_example(shard_paths[0], shard_paths[-1])
+      if (regime, module_name) == ('interpolate', 'numbers__place_value'):
+        output_dir = os.path.dirname(os.path.dirname(shard_paths[-1]))
+        _append_example(generate_to_file._module_path(
+            output_dir, 'train-easy', module_name), shard_paths[-1])
+      return original(deduplicator, regime, module_name, shard_paths)
+
+    generate_to_file._dedup_shards = dedup_shards
+    self.addCleanup(setattr, generate_to_file, '_dedup_shards', original)
+    return checked
+
+  @parameterized.parameters('text', 'tokens')
+  def testShards(self, output_format):
+    output_dir = self._run('output', output_format=output_format)
+    files = _output_files(output_dir)
+    self.assertIn('train-easy/numbers__gcd' +
+                  generate_to_file._EXTENSIONS[output_format], files)
+    self.assertNotIn('train', os.listdir(output_dir))
+    # Only the merged modules remain.
+    self.assertFalse([path for path in files if '-of-' in path])
+
+    records = _read_manifest(output_dir)
+    modules = [record for record in records if record['type'] == 'module']
+    self.assertLen(modules, len(files))
+    for module in modules:
+      shards = [record for record in records
+                if record['type'] == 'shard'
+                and record['regime'] == module['regime']
+                and record['module'] == module['module']]
+      self.assertLen(shards, 3)  # i.e., ceil(10 / 4)
+      self.assertEqual(sum(shard['count'] for shard in shards), 10)
+      self.assertEqual(module['count'], 10)
+    if output_format == 'text':
+      for contents in files.values():
+        self.assertLen(contents.splitlines(), 20)
+
+  @parameterized.parameters('text', 'tokens')
+  def testResume(self, output_format):
+    expected_dir = self._run('expected', output_format=output_format)
+    expected = _output_files(expected_dir)
+    num_shards = len([record for record in _read_manifest(expected_dir)
+                      if record['type'] == 'shard'])
+
+    generated = self._patch_generate_shard(interrupt_after=10)
+    with self.assertRaises(_Interrupted):
+      self._run('output', output_format=output_format)
+    output_dir = os.path.join(self._directory, 'output')
+    finished = list(generated)
+    # A shard written but not merged is corrupted, and left partially
+    # rewritten.
+    with flagsaver.flagsaver(output_format=output_format):
+      unmerged = [shard for shard in finished
+                  if os.path.exists(generate_to_file._shard_path(
+                      output_dir, shard))]
+      self.assertNotEmpty(unmerged)
+      corrupted = unmerged[0]
+      corrupted_path = generate_to_file._shard_path(output_dir, corrupted)
+    with open(corrupted_path, 'ab') as shard_file:
+      shard_file.write(b'corrupted')
+    with open(corrupted_path + '.tmp', 'w') as partial_file:
+      partial_file.write('partial')
+
+    del generated[:]
+    self._interrupt_after = None
+    self._run('output', output_format=output_format, resume=True)
+    # Only the missing and corrupted shards are generated.
+    self.assertIn(corrupted, generated)
+    self.assertFalse((set(finished) - {corrupted}) & set(generated))
+    self.assertLen(generated, num_shards - len(finished) + 1)
+    # The same as without interrupting, with no shards or `.tmp` files left.
+    self.assertEqual(_output_files(output_dir), expected)
+
+    # Resuming a finished run generates nothing.
+    del generated[:]
+    self._run('output', output_format=output_format, resume=True)
+    self.assertEmpty(generated)
+    self.assertEqual(_output_files(output_dir), expected)
+
+  def testResumeWithOtherSeed(self):
+    generated = self._patch_generate_shard(interrupt_after=10)
+    with self.assertRaises(_Interrupted):
+      self._run('output')
+    output_dir = os.path.join(self._directory, 'output')
+    unmerged = [shard for shard in generated
+                if os.path.exists(generate_to_file._shard_path(
+                    output_dir, shard))]
+    self.assertNotEmpty(unmerged)
+
+    # Finished shards are only skipped if generated with the same seed.
+    del generated[:]
+    self._interrupt_after = None
+    self._run('output', resume=True, seed=2)
+    self.assertContainsSubset(unmerged, generated)
+
+  @parameterized.parameters('text', 'tokens')
+  def testDedup(self, output_format):
+    output_dir = os.path.join(self._directory, 'output')
+    checked = self._patch_dedup_shards()
+    # The test modules are generated first, but merged last.
+    original_shards = generate_to_file._shards
+    generate_to_file._shards = lambda: original_shards()[::-1]
+    self.addCleanup(setattr, generate_to_file, '_shards', original_shards)
+    self._run('output', output_format=output_format, **_DEDUP_FLAGS)
+
+    records = [record for record in _read_manifest(output_dir)
+               if record['type'] == 'module']
+    self.assertEqual(
+        [(record['regime'], record['module']) for record in records], checked)
+    is_train = [dedup.is_train_regime(record['regime']) for record in records]
+    self.assertEqual(is_train, sorted(is_train, reverse=True))
+    self.assertIn(False, is_train)
+
+    with open(os.path.join(output_dir, 'dedup.json')) as stats_file:
+      stats = json.load(stats_file)
+    self.assertLen(stats, len(records))
+    train_questions = set()
+    with flagsaver.flagsaver(output_format=output_format):
+      for record in records:
+        module_stats = stats[record['regime'] + '/' + record['module']]
+        for key in ('duplicates', 'leaked', 'removed'):
+          self.assertEqual(module_stats[key], record[key])
+        self.assertEqual(module_stats['examples'], 10)
+        planted_leak = (record['regime'], record['module']) == (
+            'interpolate', 'numbers__place_value')
+        self.assertEqual(record['duplicates'], 1)
+        self.assertEqual(record['leaked'], int(planted_leak))
+        self.assertEqual(record['removed'], 1 + int(planted_leak))
+
+        questions = _questions(generate_to_file._module_path(
+            output_dir, record['regime'], record['module']))
+        self.assertLen(questions, 10)
+        self.assertLen(set(questions), len(questions))
+        if dedup.is_train_regime(record['regime']):
+          train_questions.update(questions)
+        else:
+          self.assertFalse(train_questions & set(questions))
+
+  @parameterized.parameters((1, False), (3, True))
+  def testDedupResume(self, num_lost, replayed):
+    expected_dir = os.path.join(self._directory, 'expected')
+    checked = self._patch_dedup_shards()
+    self._run('expected', **_DEDUP_FLAGS)
+    expected = _output_files(expected_dir)
+    with open(os.path.join(expected_dir, 'dedup.json')) as stats_file:
+      expected_stats = stats_file.read()
+
+    # The merged modules are left, but their last records are lost (as if
+    # interrupted after merging, but before writing to the manifest).
+    output_dir = os.path.join(self._directory, 'output')
+    shutil.copytree(expected_dir, output_dir)
+    os.remove(os.path.join(output_dir, 'dedup.json'))
+    manifest_path = os.path.join(output_dir, 'manifest.jsonl')
+    with open(manifest_path) as manifest_file:
+      lines = manifest_file.readlines()
+    lost = [index for index, line in enumerate(lines)
+            if json.loads(line)['type'] == 'module'][-num_lost:]
+    with open(manifest_path, 'w') as manifest_file:
+      manifest_file.writelines(
+          line for index, line in enumerate(lines) if index not in lost)
+
+    del checked[:]
+    original = generate_to_file._example_batches
+    read = []
+
+    def example_batches(path, batch_size):
+      read.append(path)
+      return original(path, batch_size)
+
+    generate_to_file._example_batches = example_batches
+    self.addCleanup(setattr, generate_to_file, '_example_batches', original)
+    self._run('output', resume=True, **_DEDUP_FLAGS)
+    # Only the modules whose records were lost are merged again. The other
+    # modules are only read again if the last checkpoint recorded is no longer
+    # kept (i.e., more than one record was lost).
+    self.assertLen(checked, num_lost)
+    self.assertEqual(any('-of-' not in path for path in read), replayed)
+    self.assertEqual(_output_files(output_dir), expected)
+    with open(os.path.join(output_dir, 'dedup.json')) as stats_file:
+      self.assertEqual(stats_file.read(), expected_stats)
+
+
+if __name__ == '__main__':
+  # Each test sets --output_dir.
+  FLAGS.set_default('output_dir', tempfile.gettempdir())
+  absltest.main()
@@ -0,0 +1,419 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Generates questions and answers, configured without command line flags.
+
+Example usage:
+
+```
+generator = generation.Generator(
+    generation.GenerationConfig(filter_='algebra', seed=1))
+for regime in generator.regimes():
+  for module_name in generator.modules[regime]:
+    for problem, _ in generator.problems(regime, module_name):
+      print(problem.question, problem.answer)
+```
+
+A `Generator` holds everything a generation run depends on: its
+`GenerationConfig`, the modules it samples from, and a random stream for each
+module derived from the seed. So several generators, with different
+configurations, can be used in one process (interleaved, or from several
+threads) without affecting each other's output. The `generate`,
+`generate_to_file` and `benchmark` scripts configure one from their flags.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+
+# Dependency imports
+from absl import logging
+from mathematics_dataset import example
+from mathematics_dataset import generate_settings
+from mathematics_dataset.modules import modules
+from mathematics_dataset.util import composition
+from mathematics_dataset.util import seeding
+import six
+from six.moves import range
+
+
+# Map from training regime name to pair `(level, num_levels)` of the difficulty
+# level it covers; see `_make_entropy_fn`.
+_TRAIN_LEVELS = {
+    'train': (0, 1),
+    'train-easy': (0, 3),
+    'train-medium': (1, 3),
+    'train-hard': (2, 3),
+}
+
+
+def _make_entropy_fn(level, num_levels):
+  """This returns a function that returns a subrange of entropy.
+
+  E.g., if level=1 (medium) and num_levels=3, then the returned function will
+  map the range [x, x + y] to [x + y/3, x + 2y/3].
+
+  Args:
+    level: Integer in range [0, num_levels - 1].
+    num_levels: Number of difficulty levels.
+
+  Returns:
+    Function to restrict entropy range.
+  """
+  lower = level / num_levels
+  upper = (level + 1) / num_levels
+  def modify_entropy(range_):
+    assert len(range_) == 2
+    length = range_[1] - range_[0]
+    return (range_[0] + lower * length, range_[0] + upper * length)
+  return modify_entropy
+
+
+def filter_and_flatten(modules_, filter_=''):
+  """Returns flattened dict of modules whose names contain `filter_`."""
+  flat = collections.OrderedDict()
+
+  def add(submodules, prefix=None):
+    for key, module_or_function in six.iteritems(submodules):
+      full_name = prefix + '__' + key if prefix is not None else key
+      if isinstance(module_or_function, dict):
+        add(module_or_function, full_name)
+      else:
+        if filter_ not in full_name:
+          continue
+        flat[full_name] = module_or_function
+
+  add(modules_)
+
+  # Make sure list of modules are in deterministic order. This is important when
+  # generating across multiple machines.
+  flat = collections.OrderedDict(
+      [(key, flat[key]) for key in sorted(six.iterkeys(flat))])
+
+  return flat
+
+
+def regimes(train_split=False):
+  """Returns list of the regime names, in the order they are generated."""
+  if train_split:
+    train_regimes = ['train-easy', 'train-medium', 'train-hard']
+  else:
+    train_regimes = ['train']
+  return train_regimes + ['interpolate', 'extrapolate']
+
+
+def _package_names_matching(filter_):
+  """Returns names of the module packages that may contain `filter_`.
+
+  Module names are of the form `package__module`. A filter containing `__`
+  can only match if the part before it ends the package name; otherwise the
+  filter may match within the module part, so all packages are returned.
+
+  Args:
+    filter_: String; see `filter_and_flatten`.
+
+  Returns:
+    List of package names, as for `modules.package_names`.
+  """
+  if '__' not in filter_:
+    return modules.package_names()
+  package_suffix = filter_.split('__')[0]
+  return [name for name in modules.package_names()
+          if name.endswith(package_suffix)]
+
+
+def _make_regime(regime, package_names=None):
+  """Returns nested dict of the modules of `regime`, from the given packages."""
+  if regime in _TRAIN_LEVELS:
+    return modules.train(_make_entropy_fn(*_TRAIN_LEVELS[regime]),
+                         package_names)
+  elif regime == 'interpolate':
+    return modules.test(package_names)
+  elif regime == 'extrapolate':
+    return modules.test_extra(package_names)
+  raise ValueError('Unknown regime {}'.format(regime))
+
+
+def make_modules(train_split=False, filter_=''):
+  """Returns dict mapping regime names to (nested) dicts of modules.
+
+  Args:
+    train_split: Whether to split the training data into the regimes
+        `train-easy`, `train-medium` and `train-hard` by difficulty, rather than
+        a single `train` regime.
+    filter_: String. Only the module packages that may contain modules whose
+        names contain this are imported and built (the returned dicts may still
+        include other modules; see `filter_and_flatten`).
+
+  Returns:
+    `OrderedDict` from regime name to the nested dict of module functions.
+  """
+  package_names = _package_names_matching(filter_)
+  return collections.OrderedDict(
+      [(regime, _make_regime(regime, package_names))
+       for regime in regimes(train_split)])
+
+
+def make_module(regime, module_name):
+  """Returns the module function `module_name` of `regime`.
+
+  Only the package of the module is imported, and only its modules for `regime`
+  are built, so that a process sampling from a single module (such as a worker
+  of `generate_to_file`) starts quickly.
+
+  Args:
+    regime: Regime name, e.g., `'train'` or `'interpolate'`.
+    module_name: Flattened module name, e.g., `'algebra__linear_1d'`.
+
+  Returns:
+    Callable returning a `Problem`.
+
+  Raises:
+    ValueError: If there is no such module.
+  """
+  package_name = module_name.split('__')[0]
+  if package_name not in modules.package_names():
+    raise ValueError('Unknown module {}'.format(module_name))
+  flat = filter_and_flatten(_make_regime(regime, [package_name]))
+  if module_name not in flat:
+    raise ValueError('Unknown module {} in regime {}'.format(
+        module_name, regime))
+  return flat[module_name]
+
+
+def sample_from_module(
+    module, show_dropped=False,
+    max_question_length=generate_settings.MAX_QUESTION_LENGTH,
+    max_answer_length=generate_settings.MAX_ANSWER_LENGTH):
+  """Samples a problem, ignoring samples with overly long questions / answers.
+
+  Modules may abandon a sample early (by raising `composition.TooLongError`)
+  once they know the question or answer will be too long, which is cheaper than
+  rendering it in full; these samples are also counted as dropped.
+
+  Args:
+    module: Callable returning a `Problem`.
+    show_dropped: Whether to log the questions that are dropped.
+    max_question_length: Samples with longer questions are dropped.
+    max_answer_length: Samples with longer answers are dropped.
+
+  Returns:
+    Pair `(problem, num_dropped)`, where `problem` is an instance of `Problem`
+    (with the question and answer rendered as strings, so that they are only
+    rendered once) and `num_dropped` is an integer >= 0 indicating the number
+    of samples that were dropped.
+  """
+  num_dropped = 0
+  while True:
+    try:
+      with composition.length_limits(max_question_length, max_answer_length):
+        problem = module()
+    except composition.TooLongError as error:
+      num_dropped += 1
+      if show_dropped:
+        logging.warning('Abandoning sample: %s', error)
+      continue
+    question = str(problem.question)
+    if len(question) > max_question_length:
+      num_dropped += 1
+      if show_dropped:
+        logging.warning('Dropping question: %s', question)
+      continue
+    answer = str(problem.answer)
+    if len(answer) > max_answer_length:
+      num_dropped += 1
+      if show_dropped:
+        logging.warning('Dropping question with answer: %s', answer)
+      continue
+    return example.Problem(question=question, answer=answer), num_dropped
+
+
+class GenerationConfig(collections.namedtuple(
+    'GenerationConfig',
+    ('filter_', 'train_split', 'per_train_module', 'per_test_module',
+     'max_question_length', 'max_answer_length', 'seed', 'show_dropped'))):
+  """Settings of a generation run.
+
+  Attributes:
+    filter_: Only modules whose names contain this string are generated.
+    train_split: Whether to split the training data into the regimes
+        `train-easy`, `train-medium` and `train-hard` by difficulty, rather than
+        a single `train` regime.
+    per_train_module: Number of examples per training module (divided between
+        the three training regimes if `train_split`).
+    per_test_module: Number of examples per module in each test regime.
+    max_question_length: Samples with longer questions are dropped.
+    max_answer_length: Samples with longer answers are dropped.
+    seed: Integer global seed from which the random stream of each module is
+        derived, or None for nondeterministic streams.
+    show_dropped: Whether to log the samples that are dropped.
+  """
+
+  __slots__ = ()
+
+  def __new__(cls, filter_='', train_split=False, per_train_module=10,
+              per_test_module=10,
+              max_question_length=generate_settings.MAX_QUESTION_LENGTH,
+              max_answer_length=generate_settings.MAX_ANSWER_LENGTH,
+              seed=None, show_dropped=False):
+    return super(GenerationConfig, cls).__new__(
+        cls, filter_, train_split, per_train_module, per_test_module,
+        max_question_length, max_answer_length, seed, show_dropped)
+
+  def count(self, regime):
+    """Returns the number of examples per module to generate in `regime`."""
+    if regime == 'train':
+      return self.per_train_module
+    if regime in _TRAIN_LEVELS:
+      return self.per_train_module // 3
+    return self.per_test_module
+
+
+class Generator(object):
+  """Samples problems from the modules selected by a `GenerationConfig`."""
+
+  def __init__(self, config=None):
+    """Initializes a `Generator`.
+
+    Args:
+      config: Instance of `GenerationConfig`, or None for the defaults.
+    """
+    self.config = GenerationConfig() if config is None else config
+    self._modules = None
+    # Modules built individually (before `modules` is), keyed by regime and
+    # module name.
+    self._built_modules = {}
+    # Map from stream key (see `random_state`) to pair `(seed, RandomState)`.
+    self._streams = {}
+
+  def regimes(self):
+    """Returns list of the regime names, in the order they are generated."""
+    return regimes(self.config.train_split)
+
+  def counts(self):
+    """Returns dict mapping regime name to number of examples per module."""
+    return {regime: self.config.count(regime) for regime in self.regimes()}
+
+  @property
+  def modules(self):
+    """`OrderedDict` from regime name to flat dict of the selected modules.
+
+    This is built the first time it is used.
+    """
+    if self._modules is None:
+      all_modules = make_modules(self.config.train_split, self.config.filter_)
+      self._modules = collections.OrderedDict(
+          [(regime, filter_and_flatten(modules_, self.config.filter_))
+           for regime, modules_ in six.iteritems(all_modules)])
+    return self._modules
+
+  def module(self, regime, module_name):
+    """Returns the module function `module_name` of `regime`.
+
+    If `modules` has not been built, only this module's package is imported
+    (see `make_module`).
+
+    Args:
+      regime: One of `regimes()`.
+      module_name: Flattened module name, e.g., `'algebra__linear_1d'`.
+
+    Returns:
+      Callable returning a `Problem`.
+
+    Raises:
+      ValueError: If there is no such module in this generator.
+    """
+    if regime not in self.regimes():
+      raise ValueError('Unknown regime {}; expected one of {}'.format(
+          regime, self.regimes()))
+    if self.config.filter_ not in module_name:
+      raise ValueError('Module {} does not match filter {!r}'.format(
+          module_name, self.config.filter_))
+    if self._modules is None:
+      key = (regime, module_name)
+      if key not in self._built_modules:
+        self._built_modules[key] = make_module(regime, module_name)
+      return self._built_modules[key]
+    if module_name not in self._modules[regime]:
+      raise ValueError('Unknown module {} in regime {}'.format(
+          module_name, regime))
+    return self._modules[regime][module_name]
+
+  def _stream(self, key):
+    if key not in self._streams:
+      if self.config.seed is None:
+        seed = seeding.random_seed()
+      else:
+        seed = seeding.derive_seed(self.config.seed, *key)
+      self._streams[key] = (seed, seeding.RandomState(seed))
+    return self._streams[key]
+
+  def seed(self, regime, module_name, *keys):
+    """Returns the seed of the random stream; see `random_state`."""
+    return self._stream((regime, module_name) + keys)[0]
+
+  def random_state(self, regime, module_name, *keys):
+    """Returns the `seeding.RandomState` that a module samples from.
+
+    Each module (and sequence of further `keys`, e.g., a shard index) has its
+    own stream, seeded by `seeding.derive_seed(seed, regime, module_name,
+    *keys)` (or by a random seed if the config has no seed), so its samples do
+    not depend on the other modules sampled from.
+
+    Args:
+      regime: Regime name.
+      module_name: Flattened module name.
+      *keys: Strings or integers further identifying the stream.
+
+    Returns:
+      Instance of `seeding.RandomState`, created the first time it is used.
+    """
+    return self._stream((regime, module_name) + keys)[1]
+
+  def sample(self, regime, module_name, *keys):
+    """Returns pair `(problem, num_dropped)`, as for `sample_from_module`.
+
+    Args:
+      regime: One of `regimes()`.
+      module_name: Flattened module name, e.g., `'algebra__linear_1d'`.
+      *keys: Further keys of the random stream to sample from; see
+          `random_state`.
+
+    Returns:
+      Pair `(problem, num_dropped)`.
+    """
+    module = self.module(regime, module_name)
+    with self.random_state(regime, module_name, *keys).activate():
+      return sample_from_module(
+          module, show_dropped=self.config.show_dropped,
+          max_question_length=self.config.max_question_length,
+          max_answer_length=self.config.max_answer_length)
+
+  def problems(self, regime, module_name, count=None):
+    """Yields `count` pairs `(problem, num_dropped)` sampled from a module.
+
+    Args:
+      regime: One of `regimes()`.
+      module_name: Flattened module name, e.g., `'algebra__linear_1d'`.
+      count: Number of problems, or None for `config.count(regime)`.
+
+    Yields:
+      Pairs `(problem, num_dropped)`, as for `sample`.
+    """
+    if count is None:
+      count = self.config.count(regime)
+    for _ in range(count):
+      yield self.sample(regime, module_name)
@@ -0,0 +1,127 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.generation."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import itertools
+
+# Dependency imports
+from absl.testing import absltest
+from absl.testing import parameterized
+from mathematics_dataset import generation
+from mathematics_dataset.modules import modules
+from six.moves import range
+
+
+class GenerationTest(parameterized.TestCase):
+
+  def testMakeEntropyFn(self):
+    entropy_full = generation._make_entropy_fn(0, 1)
+    self.assertEqual(entropy_full((2, 3)), (2, 3))
+    entropy_third = generation._make_entropy_fn(2, 3)
+    self.assertEqual(entropy_third((3, 6)), (5, 6))
+
+  def testPackageNamesMatching(self):
+    self.assertEqual(
+        generation._package_names_matching('numbers__'), ['numbers'])
+    self.assertEqual(generation._package_names_matching('bra__linear_1d'),
+                     ['algebra'])
+    self.assertEqual(generation._package_names_matching('linear_1d'),
+                     modules.package_names())
+
+  @parameterized.parameters(
+      ('train-easy', 'algebra__linear_1d'),
+      ('interpolate', 'measurement__time'),
+      ('extrapolate', 'numbers__round_number_big'))
+  def testMakeModule(self, regime, module_name):
+    module = generation.make_module(regime, module_name)
+    problem, _ = generation.sample_from_module(module)
+    self.assertTrue(problem.question)
+    with self.assertRaises(ValueError):
+      generation.make_module(regime, module_name + '_unknown')
+    with self.assertRaises(ValueError):
+      generation.make_module(regime, 'unknown__' + module_name)
+
+  def testSampleFromModuleLengthLimits(self):
+    module = generation.make_module('train', 'numbers__gcd')
+    problem, _ = generation.sample_from_module(
+        module, max_question_length=55, max_answer_length=2)
+    self.assertLessEqual(len(problem.question), 55)
+    self.assertLessEqual(len(problem.answer), 2)
+
+
+class GeneratorTest(absltest.TestCase):
+
+  def testCounts(self):
+    config = generation.GenerationConfig(
+        train_split=True, per_train_module=30, per_test_module=7)
+    self.assertEqual(
+        generation.Generator(config).counts(),
+        {'train-easy': 10, 'train-medium': 10, 'train-hard': 10,
+         'interpolate': 7, 'extrapolate': 7})
+
+  def testModules(self):
+    generator = generation.Generator(
+        generation.GenerationConfig(filter_='numbers__gcd'))
+    self.assertEqual(generator.regimes(),
+                     ['train', 'interpolate', 'extrapolate'])
+    self.assertEqual(list(generator.modules['train']),
+                     ['numbers__gcd', 'numbers__gcd_composed'])
+    self.assertEqual(generator.modules['extrapolate'], {})
+    with self.assertRaises(ValueError):
+      generator.module('train', 'numbers__lcm')
+    with self.assertRaises(ValueError):
+      generator.module('train-easy', 'numbers__gcd')
+
+  def testModuleBeforeModulesBuilt(self):
+    generator = generation.Generator()
+    module = generator.module('interpolate', 'numbers__gcd')
+    self.assertIs(generator.module('interpolate', 'numbers__gcd'), module)
+
+  def testIndependentGenerators(self):
+    def questions(generator, count):
+      return [problem.question for problem, _ in
+              generator.problems('train', 'numbers__gcd', count)]
+
+    config = generation.GenerationConfig(filter_='numbers__gcd', seed=1)
+    expected = questions(generation.Generator(config), 6)
+
+    # Interleaved with another generator, of a different configuration.
+    generator = generation.Generator(config)
+    other = generation.Generator(generation.GenerationConfig(
+        filter_='numbers', seed=2, max_question_length=70))
+    interleaved = []
+    for _ in range(3):
+      interleaved += questions(generator, 2)
+      other.sample('train', 'numbers__lcm')
+    self.assertEqual(interleaved, expected)
+    self.assertEqual(generation.Generator(config).seed('train', 'numbers__gcd'),
+                     generator.seed('train', 'numbers__gcd'))
+
+  def testProblemsCount(self):
+    generator = generation.Generator(generation.GenerationConfig(
+        filter_='numbers__gcd', per_test_module=4))
+    self.assertLen(list(generator.problems('interpolate', 'numbers__gcd')), 4)
+    self.assertLen(
+        list(itertools.islice(
+            generator.problems('interpolate', 'numbers__gcd', count=10), 3)),
+        3)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -179,6 +179,7 @@ def polynomial_roots(value, sample_args, context=None):
       answer = solutions[0]
     else:
       answer = display.NumberList(solutions)
+    composition.check_answer_length(len(str(answer)))
 
     if polynomial_entity.has_expression():
       equality = ops.Eq(polynomial_entity.expression, 0)
@@ -210,14 +211,13 @@ def polynomial_roots(value, sample_args, context=None):
     else:
       variable = sympy.Symbol(context.pop())
       expression = polynomial_entity.handle.apply(variable)
-    factored = sympy.factor(
-        polynomials.coefficients_to_polynomial(coeffs, variable))
     template = random.choice([
         'Factor {expression}.',
     ])
-    return example.Problem(
-        question=example.question(context, template, expression=expression),
-        answer=factored)
+    question = example.question(context, template, expression=expression)
+    factored = sympy.factor(
+        polynomials.coefficients_to_polynomial(coeffs, variable))
+    return example.Problem(question=question, answer=factored)
 
 
 def _solve_linear_system(degree, value, sample_args, context=None):
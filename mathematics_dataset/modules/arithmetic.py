@@ -587,11 +587,10 @@ def simplify_surd(value, sample_args, context=None):
   num_primes_less_than_20 = 8
   entropy -= math.log10(num_primes_less_than_20)
   exp = _sample_surd(base, entropy, max_power=2, multiples_only=False)
-  simplified = sympy.expand(sympy.simplify(exp))
 
   template = random.choice([
       'Simplify {exp}.',
   ])
-  return example.Problem(
-      question=example.question(context, template, exp=exp),
-      answer=simplified)
+  question = example.question(context, template, exp=exp)
+  simplified = sympy.expand(sympy.simplify(exp))
+  return example.Problem(question=question, answer=simplified)
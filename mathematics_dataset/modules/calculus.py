@@ -171,11 +171,11 @@ def _differentiate_polynomial(value, sample_args, context, num_variables):
 
   if is_question:
     template = _template(context.module_count, derivative_order, len(variables))
-    answer = polynomials.coefficients_to_polynomial(value, variables).sympy()
-    return example.Problem(
-        question=example.question(
-            context, template, eq=polynomial, var=variable, nth=nth),
-        answer=answer)
+    question = example.question(
+        context, template, eq=polynomial, var=variable, nth=nth)
+    answer = polynomials.coefficients_to_string(value, variables)
+    composition.check_answer_length(len(answer))
+    return example.Problem(question=question, answer=answer)
   else:
     fn_symbol = context.pop()
     variables_string = ', '.join(str(variable) for variable in variables)
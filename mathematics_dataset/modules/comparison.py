@@ -177,6 +177,24 @@ def integer_or_rational_or_decimal(entropy):
     return number.integer_or_rational(entropy, signed=True)
 
 
+def integers_or_rationals_or_decimals(entropies):
+  """Returns list, sampled as by `integer_or_rational_or_decimal` per entropy."""
+  entropies = np.asarray(entropies)
+  if len(entropies) < number.MIN_BATCH_SIZE:
+    return [integer_or_rational_or_decimal(entropy) for entropy in entropies]
+  is_decimal = np.random.randint(2, size=len(entropies)).astype(bool)
+  values = [None] * len(entropies)
+  decimal_indices = np.flatnonzero(is_decimal)
+  rational_indices = np.flatnonzero(~is_decimal)
+  for i, value in zip(decimal_indices, number.integers_or_decimals(
+      entropies[decimal_indices], signed=True)):
+    values[i] = value
+  for i, value in zip(rational_indices, number.integers_or_rationals(
+      entropies[rational_indices], signed=True)):
+    values[i] = value
+  return values
+
+
 def pair(sample_args, context=None):
   """Compares two numbers, e.g., "is 1/2 < 0.5?"."""
   if context is None:
@@ -290,14 +308,14 @@ def _unique_values(entropy, only_integers=False, count=None):
     count = random.randint(*_sort_count_range(entropy))
 
   if only_integers:
-    sampler = functools.partial(number.integer, signed=True)
+    sampler = functools.partial(number.integers, signed=True)
   else:
-    sampler = integer_or_rational_or_decimal
+    sampler = integers_or_rationals_or_decimals
 
   for _ in range(1000):
     entropies = entropy * np.random.dirichlet(np.ones(count))
     entropies = np.maximum(1, entropies)
-    values = [sampler(ent) for ent in entropies]
+    values = sampler(entropies)
     if len(sympy.FiniteSet(*values)) == len(values):
       return values
   raise ValueError('Could not generate {} unique values with entropy={}'
@@ -388,7 +406,7 @@ def closest(sample_args, count=None):
   while True:
     value_entropies = entropy_list * np.random.dirichlet(np.ones(count))
     value_entropies = np.maximum(1, value_entropies)
-    values = [integer_or_rational_or_decimal(ent) for ent in value_entropies]
+    values = integers_or_rationals_or_decimals(value_entropies)
     differences = [abs(sympy.sympify(value) - target) for value in values]
     if len(sympy.FiniteSet(*differences)) == count:  # all differences unique
       break
@@ -445,6 +463,7 @@ def sort(sample_args, count=None):
     if i > 0:
       answer += ', '
     answer += str(entity.handle)
+  composition.check_answer_length(len(answer))
 
   return example.Problem(
       question=example.question(
@@ -28,7 +28,9 @@ from mathematics_dataset.modules import train_test_split
 from mathematics_dataset.sample import number
 from mathematics_dataset.util import composition
 from mathematics_dataset.util import display
+from mathematics_dataset.util import factorization
 import six
+from six.moves import range
 import sympy
 
 
@@ -123,7 +125,7 @@ def pluralize(name):
 def _factor_non_decimal(value):
   """Extras x dividing value such that x is coprime to 2 and 5."""
   result = 1
-  factors = sympy.factorint(value)
+  factors = factorization.factorint(value)
   for factor, power in six.iteritems(factors):
     if factor not in [2, 5]:
       result *= factor ** power
@@ -227,14 +229,15 @@ def conversion(is_train, is_extrapolation):
     return _conversion_fraction(context, is_train=is_train)
 
 
+# The durations (in minutes) in `time` questions.
+_DURATIONS = train_test_split.SplitIndex(range(1, 12*60))
+
+
 def time(is_train):
   """Questions for calculating start, end, or time differences."""
   context = composition.Context()
   start_minutes = random.randint(1, 24*60 - 1)
-  while True:
-    duration_minutes = random.randint(1, 12*60 - 1)
-    if train_test_split.is_train(duration_minutes) == is_train:
-      break
+  duration_minutes = random.choice(_DURATIONS.values(is_train))
   end_minutes = start_minutes + duration_minutes
 
   def format_12hr(minutes):
@@ -12,47 +12,82 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""The various mathematics modules."""
+"""The various mathematics modules.
+
+The module packages (`algebra`, `arithmetic`, etc.) are only imported when
+their modules are first built, so that sampling from a few modules (e.g., in a
+worker generating a single module) does not import and set up all of them.
+"""
 
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from mathematics_dataset.modules import algebra
-from mathematics_dataset.modules import arithmetic
-from mathematics_dataset.modules import calculus
-from mathematics_dataset.modules import comparison
-from mathematics_dataset.modules import measurement
-from mathematics_dataset.modules import numbers
-from mathematics_dataset.modules import polynomials
-from mathematics_dataset.modules import probability
-import six
+import importlib
+
+
+# Names of the module packages, in the order they are imported.
+_PACKAGE_NAMES = (
+    'algebra',
+    'arithmetic',
+    'calculus',
+    'comparison',
+    'measurement',
+    'numbers',
+    'polynomials',
+    'probability',
+)
+
+# Packages whose modules do not compose values sampled by the other packages'
+# modules (registered via `composition.module`), so can be imported alone.
+# Importing any other package imports all of these in the order above, so that
+# the composition samplers are always registered in the same order (which the
+# random choice of sampler depends on).
+_STANDALONE_PACKAGE_NAMES = ('measurement', 'probability')
+
+
+def package_names():
+  """Returns list of the names of the module packages."""
+  return list(_PACKAGE_NAMES)
+
+
+def load(name):
+  """Imports and returns the module package `name` (e.g., `'algebra'`).
+
+  Args:
+    name: One of `package_names()`.
+
+  Returns:
+    The python module of the package.
+
+  Raises:
+    ValueError: If `name` is not the name of a module package.
+  """
+  if name not in _PACKAGE_NAMES:
+    raise ValueError('Unknown module package {}'.format(name))
+  if name not in _STANDALONE_PACKAGE_NAMES:
+    for other_name in _PACKAGE_NAMES:
+      if other_name not in _STANDALONE_PACKAGE_NAMES:
+        importlib.import_module('mathematics_dataset.modules.' + other_name)
+  return importlib.import_module('mathematics_dataset.modules.' + name)
 
 
-all_ = {
-    'algebra': algebra,
-    'arithmetic': arithmetic,
-    'calculus': calculus,
-    'comparison': comparison,
-    'measurement': measurement,
-    'numbers': numbers,
-    'polynomials': polynomials,
-    'probability': probability,
-}
+def _packages(names):
+  names = _PACKAGE_NAMES if names is None else names
+  return [(name, load(name)) for name in names]
 
 
-def train(entropy_fn):
-  """Returns dict of training modules."""
-  return {
-      name: module.train(entropy_fn) for name, module in six.iteritems(all_)
-  }
+def train(entropy_fn, names=None):
+  """Returns dict of training modules, from the packages `names` (or all)."""
+  return {name: package.train(entropy_fn)
+          for name, package in _packages(names)}
 
 
-def test():
-  """Returns dict of testing modules."""
-  return {name: module.test() for name, module in six.iteritems(all_)}
+def test(names=None):
+  """Returns dict of testing modules, from the packages `names` (or all)."""
+  return {name: package.test() for name, package in _packages(names)}
 
 
-def test_extra():
-  """Returns dict of extrapolation testing modules."""
-  return {name: module.test_extra() for name, module in six.iteritems(all_)}
+def test_extra(names=None):
+  """Returns dict of extrapolation testing modules, as for `test`."""
+  return {name: package.test_extra() for name, package in _packages(names)}
@@ -27,6 +27,8 @@ from mathematics_dataset import example
 from mathematics_dataset.sample import number
 from mathematics_dataset.util import composition
 from mathematics_dataset.util import display
+from mathematics_dataset.util import factorization
+from mathematics_dataset.util import primes
 import numpy as np
 import six
 from six.moves import range
@@ -215,12 +217,12 @@ def _semi_prime(entropy):
   # of the two factors.
   entropy_1, entropy_2 = entropy * np.random.dirichlet([1, 1])
 
-  # Need >= 2 for randprime to always work (Betrand's postulate).
+  # Need >= 2 for random_prime to always work (Betrand's postulate).
   approx_1 = number.integer(entropy_1, signed=False, min_abs=2)
   approx_2 = number.integer(entropy_2, signed=False, min_abs=2)
 
-  factor_1 = sympy.ntheory.generate.randprime(approx_1 / 2, approx_1 * 2)
-  factor_2 = sympy.ntheory.generate.randprime(approx_2 / 2, approx_2 * 2)
+  factor_1 = primes.random_prime(approx_1 / 2, approx_1 * 2)
+  factor_2 = primes.random_prime(approx_2 / 2, approx_2 * 2)
 
   return factor_1 * factor_2
 
@@ -241,7 +243,7 @@ def is_prime(value, sample_args, context=None):
   else:
     # Take the next prime after the composite, to ensure the same distribution
     # as composites. Do "composite - 4" so we occasionally see "2" as a prime.
-    integer = sympy.ntheory.generate.nextprime(composite - 4)
+    integer = primes.next_prime(composite - 4)
     is_prime_ = True
 
   (integer_entity,) = context.sample(sample_args, [integer])
@@ -312,7 +314,7 @@ def list_prime_factors(value, sample_args, context=None):
   integer = number.integer(entropy, signed=False, min_abs=2)
 
   (entity,) = context.sample(sample_args, [integer])
-  prime_factors = sorted(sympy.factorint(integer).keys())
+  prime_factors = sorted(factorization.factorint(integer).keys())
   template = random.choice([
       'What are the prime factors of {integer}?',
       'List the prime factors of {integer}.',
@@ -384,7 +386,7 @@ def lcm(value, sample_args, context=None):
 def _random_coprime_pair(entropy):
   """Returns a pair of random coprime integers."""
   coprime_product = number.integer(entropy, False, min_abs=1)
-  factors = sympy.factorint(coprime_product)
+  factors = factorization.factorint(coprime_product)
   def take():
     prime = random.choice(list(factors.keys()))
     power = factors[prime]
@@ -97,8 +97,9 @@ def coefficient_named(value, sample_args, context=None):
     expanded = polynomials.expand_coefficients(coefficients, entropy/2)
     expression = polynomials.coefficients_to_polynomial(expanded, variable)
   else:
-    expression = polynomials.sample_with_brackets(variable, degree, entropy)
-    coefficients = list(reversed(sympy.Poly(expression).all_coeffs()))
+    expression, coefficients = (
+        polynomials.sample_with_brackets_and_coefficients(
+            variable, degree, entropy))
 
   named_coeffs = [sympy.Symbol(context.pop()) for _ in range(degree + 1)]
   canonical = polynomials.coefficients_to_polynomial(named_coeffs, variable)
@@ -225,8 +226,8 @@ def add(value, sample_args, context=None):
       c1.handle * fn1.handle.apply(var) + c2.handle * fn2.handle.apply(var))
 
   if is_question:
-    answer = polynomials.coefficients_to_polynomial(value.coefficients, var)
-    answer = answer.sympy()
+    answer = polynomials.coefficients_to_string(value.coefficients, var)
+    composition.check_answer_length(len(answer))
     template = random.choice(_TEMPLATES)
     return example.Problem(
         question=example.question(context, template, composed=expression),
@@ -255,14 +256,17 @@ def expand(value, sample_args, context=None):
   max_order = 5
   order = random.randint(min_order, max_order)
   entropy -= math.log10(max_order - min_order + 1)
-  expression_ = polynomials.sample_with_brackets(variable, order, entropy)
-  expanded = sympy.expand(expression_)
+  expression_, coefficients = (
+      polynomials.sample_with_brackets_and_coefficients(
+          variable, order, entropy))
   template = random.choice([
       'Expand {expression}.'
   ])
-  return example.Problem(
-      question=example.question(context, template, expression=expression_),
-      answer=expanded)
+  # The question is built first, so that overly long questions are abandoned
+  # before the expansion.
+  question = example.question(context, template, expression=expression_)
+  expanded = polynomials.coefficients_to_string(coefficients, variable)
+  return example.Problem(question=question, answer=expanded)
 
 
 @composition.module(composition.is_polynomial)
@@ -342,17 +346,14 @@ def compose(value, sample_args, context=None):
 
   variable = sympy.var(context.pop())
 
-  poly_f = polynomials.coefficients_to_polynomial(coeffs_f, variable)
-  poly_g = polynomials.coefficients_to_polynomial(coeffs_g, variable)
-
-  poly_f_g = poly_f.sympy().subs(variable, poly_g.sympy()).expand()
-
   expression = composition.FunctionHandle(entity_f, entity_g).apply(variable)
 
   template = random.choice(_TEMPLATES)
-  return example.Problem(
-      question=example.question(context, template, composed=expression),
-      answer=poly_f_g)
+  question = example.question(context, template, composed=expression)
+
+  poly_f_g = polynomials.coefficients_to_string(
+      polynomials.compose_coefficients(coeffs_f, coeffs_g), variable)
+  return example.Problem(question=question, answer=poly_f_g)
 
 
 def simplify_power(value, sample_args, context=None):
@@ -18,6 +18,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import bisect
 import collections
 import functools
 import random
@@ -30,7 +31,6 @@ from mathematics_dataset.util import combinatorics
 from mathematics_dataset.util import composition
 from mathematics_dataset.util import display
 from mathematics_dataset.util import probability
-import numpy as np
 from six.moves import range
 from six.moves import zip
 
@@ -147,20 +147,111 @@ LetterBag = collections.namedtuple(
     ('weights', 'random_variable', 'letters_distinct', 'bag_contents'))
 
 
-def _sample_letter_bag(is_train, min_total):
-  """Samples a "container of letters" and returns info on it."""
-  while True:
+def _total_range(num_distinct_letters, min_total):
+  """Returns pair `(min, max)` of the total number of letters in a bag."""
+  return (max(num_distinct_letters, min_total),
+          min(_MAX_TOTAL_LETTERS, num_distinct_letters * _MAX_LETTER_REPEAT))
+
+
+def _all_sorted_letter_counts():
+  """Yields each sorted list of letter counts that a bag can have."""
+  for num_distinct_letters in range(1, _MAX_DISTINCT_LETTERS + 1):
+    _, max_total = _total_range(num_distinct_letters, 0)
+    for num_letters_total in range(num_distinct_letters, max_total + 1):
+      for letter_counts in combinatorics.partitions(
+          num_letters_total, num_distinct_letters):
+        yield letter_counts
+
+
+# The sorted letter counts of the bags, split by `train_test_split.is_train`.
+_SORTED_LETTER_COUNTS = train_test_split.SplitIndex(_all_sorted_letter_counts())
+
+# Map from pair `(is_train, min_total)` to pair `(sorted_letter_counts,
+# cumulative_probabilities)`, for sampling the letter counts; see
+# `_sample_letter_counts`.
+_LETTER_COUNTS_DISTRIBUTIONS = {}
+
+
+def _letter_counts_probability(sorted_letter_counts, min_total):
+  """Returns probability that `_sample_letter_counts` samples these counts.
+
+  This is without the train/test split, i.e., for `is_train=None`: the number
+  of distinct letters is sampled uniformly, then the total number of letters,
+  then the counts uniformly from those with that total.
+
+  Args:
+    sorted_letter_counts: Sorted list of integers >= 1.
+    min_total: Minimum total number of letters in the bag.
+
+  Returns:
+    Float; the probability of the counts being some ordering of these.
+  """
+  num_distinct_letters = len(sorted_letter_counts)
+  num_letters_total = sum(sorted_letter_counts)
+  min_total, max_total = _total_range(num_distinct_letters, min_total)
+  if not min_total <= num_letters_total <= max_total:
+    return 0.0
+  # Number of distinct orderings of the counts, each of which is sampled with
+  # probability 1 / binomial(total - 1, distinct - 1).
+  multiplicities = list(collections.Counter(sorted_letter_counts).values())
+  num_orderings = combinatorics.multinomial(multiplicities)
+  return (num_orderings
+          / combinatorics.binomial(num_letters_total - 1,
+                                   num_distinct_letters - 1)
+          / (max_total - min_total + 1)
+          / _MAX_DISTINCT_LETTERS)
+
+
+def _sample_letter_counts(is_train, min_total):
+  """Returns list of the number of each letter in a bag (in random order).
+
+  The counts are distributed as when sampling without the train/test split (see
+  `_letter_counts_probability`) until the counts are on the `is_train` side of
+  it, but are sampled directly from the counts on that side.
+
+  Args:
+    is_train: Boolean, or None for no split.
+    min_total: Minimum total number of letters in the bag.
+
+  Returns:
+    List of integers >= 1.
+  """
+  if is_train is None:
     num_distinct_letters = random.randint(1, _MAX_DISTINCT_LETTERS)
     num_letters_total = random.randint(
-        max(num_distinct_letters, min_total),
-        min(_MAX_TOTAL_LETTERS, num_distinct_letters * _MAX_LETTER_REPEAT))
-    letter_counts = combinatorics.uniform_positive_integers_with_sum(
+        *_total_range(num_distinct_letters, min_total))
+    return combinatorics.uniform_positive_integers_with_sum(
         num_distinct_letters, num_letters_total)
 
-    # Test/train split.
-    if (is_train is None
-        or train_test_split.is_train(sorted(letter_counts)) == is_train):
-      break
+  key = (is_train, min_total)
+  if key not in _LETTER_COUNTS_DISTRIBUTIONS:
+    sorted_letter_counts = []
+    cumulative_probabilities = []
+    total_probability = 0.0
+    for letter_counts in _SORTED_LETTER_COUNTS.values(is_train):
+      probability_ = _letter_counts_probability(letter_counts, min_total)
+      if probability_ > 0:
+        total_probability += probability_
+        sorted_letter_counts.append(letter_counts)
+        cumulative_probabilities.append(total_probability)
+    _LETTER_COUNTS_DISTRIBUTIONS[key] = (
+        sorted_letter_counts, cumulative_probabilities)
+  sorted_letter_counts, cumulative_probabilities = (
+      _LETTER_COUNTS_DISTRIBUTIONS[key])
+  index = bisect.bisect_right(
+      cumulative_probabilities,
+      random.random() * cumulative_probabilities[-1])
+  index = min(index, len(sorted_letter_counts) - 1)  # in case of rounding
+  letter_counts = list(sorted_letter_counts[index])
+  random.shuffle(letter_counts)  # uniform over the distinct orderings
+  return letter_counts
+
+
+def _sample_letter_bag(is_train, min_total):
+  """Samples a "container of letters" and returns info on it."""
+  letter_counts = _sample_letter_counts(is_train, min_total)
+  num_distinct_letters = len(letter_counts)
+  num_letters_total = sum(letter_counts)
 
   letters_distinct = random.sample(_LETTERS, num_distinct_letters)
   weights = {i: 1 for i in range(num_letters_total)}
@@ -209,14 +300,6 @@ def _swr_space(is_train, sample_range):
 def _sample_without_replacement_probability_question(
     is_train, event_fn, sample_range):
   """Question for prob of some event when sampling without replacement."""
-  def too_big(event_in_space):
-    if isinstance(event_in_space, probability.SequenceEvent):
-      size = len(event_in_space.all_sequences())
-    else:
-      assert isinstance(event_in_space, probability.FiniteProductEvent)
-      size = np.prod([len(event.values) for event in event_in_space.events])
-    return size > int(2e5)
-
   allow_trivial_prob = random.random() < _MAX_FRAC_TRIVIAL_PROB
 
   while True:
@@ -226,8 +309,6 @@ def _sample_without_replacement_probability_question(
     event, event_description = event_fn(
         values=distinct_letters, length=space.n_samples, verb='pick')
     event_in_space = random_variable.inverse(event)
-    if too_big(event_in_space):
-      continue
     answer = space.probability(event_in_space)
     if answer not in [0, 1] or allow_trivial_prob:
       break
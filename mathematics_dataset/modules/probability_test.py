@@ -0,0 +1,73 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.modules.probability."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import itertools
+
+# Dependency imports
+from absl.testing import absltest
+from absl.testing import parameterized
+from mathematics_dataset.modules import probability
+from mathematics_dataset.modules import train_test_split
+from six.moves import range
+
+
+class ProbabilityTest(parameterized.TestCase):
+
+  @parameterized.parameters(2, 5)
+  def testLetterCountsProbability(self, min_total):
+    # Probability of each sorted list of counts, by enumerating the counts
+    # sampled without the train/test split.
+    # pylint: disable=protected-access
+    expected = collections.defaultdict(float)
+    for num_distinct in range(1, probability._MAX_DISTINCT_LETTERS + 1):
+      low, high = probability._total_range(num_distinct, min_total)
+      for total in range(low, high + 1):
+        # Each choice of `num_distinct - 1` separators in `1, ..., total - 1`.
+        all_separators = list(
+            itertools.combinations(range(1, total), num_distinct - 1))
+        for separators in all_separators:
+          bounds = (0,) + separators + (total,)
+          counts = sorted(
+              right - left for left, right in zip(bounds[:-1], bounds[1:]))
+          expected[tuple(counts)] += (
+              1 / probability._MAX_DISTINCT_LETTERS / (high - low + 1)
+              / len(all_separators))
+
+    all_counts = list(probability._all_sorted_letter_counts())
+    self.assertLen(set(tuple(counts) for counts in all_counts), len(all_counts))
+    for counts in all_counts:
+      self.assertAlmostEqual(
+          probability._letter_counts_probability(counts, min_total),
+          expected.get(tuple(counts), 0.0))
+    self.assertAlmostEqual(sum(expected.values()), 1.0)
+
+  @parameterized.parameters(True, False)
+  def testSampleLetterCountsSplit(self, is_train):
+    for _ in range(100):
+      letter_counts = probability._sample_letter_counts(is_train, min_total=4)
+      self.assertEqual(
+          train_test_split.is_train(sorted(letter_counts)), is_train)
+      self.assertGreaterEqual(sum(letter_counts), 4)
+    # pylint: enable=protected-access
+
+
+if __name__ == '__main__':
+  absltest.main()
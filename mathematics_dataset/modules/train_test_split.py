@@ -12,7 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Utility for train/test split based on hash value."""
+"""Utility for train/test split based on hash value.
+
+Modules sampling from a small finite domain can use a `SplitIndex` to sample
+directly from the values on the wanted side of the split, rather than sampling
+from the whole domain until the value is on the wanted side.
+"""
 
 from __future__ import absolute_import
 from __future__ import division
@@ -25,3 +30,33 @@ def is_train(value):
   """Returns whether `value` should be used in a training question."""
   value_as_string = str(value).encode('utf-8')
   return int(hashlib.md5(value_as_string).hexdigest(), 16) % 2 == 0
+
+
+class SplitIndex(object):
+  """The values of a finite domain, split by `is_train`.
+
+  The split is computed (hashing each value once) the first time it is used,
+  and then cached.
+  """
+
+  def __init__(self, values):
+    """Initializes a `SplitIndex`.
+
+    Args:
+      values: Iterable of the values of the domain (which is only iterated over
+          when the split is first used).
+    """
+    self._values = values
+    self._split = None
+
+  def _get_split(self):
+    if self._split is None:
+      self._split = {True: [], False: []}
+      for value in self._values:
+        self._split[is_train(value)].append(value)
+      self._values = None
+    return self._split
+
+  def values(self, is_train_):
+    """Returns list of the values for which `is_train` is `is_train_`."""
+    return self._get_split()[is_train_]
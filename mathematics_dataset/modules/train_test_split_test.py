@@ -0,0 +1,48 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.modules.train_test_split."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from absl.testing import absltest
+from mathematics_dataset.modules import train_test_split
+from six.moves import range
+
+
+class TrainTestSplitTest(absltest.TestCase):
+
+  def testSplitIndex(self):
+    index = train_test_split.SplitIndex(range(100))
+    train = index.values(True)
+    test = index.values(False)
+    self.assertEqual(sorted(train + test), list(range(100)))
+    for value in train:
+      self.assertTrue(train_test_split.is_train(value))
+    for value in test:
+      self.assertFalse(train_test_split.is_train(value))
+    # Roughly half of the values are in each.
+    self.assertBetween(len(train), 30, 70)
+
+  def testSplitIndexIteratesOnce(self):
+    index = train_test_split.SplitIndex(iter([[1, 2], [3], [4, 5, 6]]))
+    self.assertLen(index.values(True) + index.values(False), 3)
+    self.assertLen(index.values(True) + index.values(False), 3)
+
+
+if __name__ == '__main__':
+  absltest.main()
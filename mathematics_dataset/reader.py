@@ -0,0 +1,196 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Random access to the files written by `generate_to_file`.
+
+Example usage:
+
+```
+dataset = reader.open_dataset('/tmp/maths/train-easy/algebra__linear_1d.txt')
+question, answer = dataset[12345]
+batch = dataset.batch(np.random.randint(len(dataset), size=32))
+```
+
+Files are memory-mapped rather than loaded, so shuffled access to a large
+corpus does not need it to fit in memory.
+
+Text files alternate between question and answer lines, so an index of the byte
+offset of each example is needed for random access. This is built by a single
+scan of the file the first time it is opened, and saved in a sidecar `.idx` file
+next to it (which is rebuilt if the text file changes). The `.npy` files written
+with `--output_format=tokens` have fixed-size records, so need no index.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+# Dependency imports
+from mathematics_dataset import tokenization
+import numpy as np
+from six.moves import range
+
+
+INDEX_SUFFIX = '.idx'
+
+# Number of bytes read at a time when building an index.
+_CHUNK_SIZE = 1 << 24
+
+_NEWLINE = ord('\n')
+
+
+def index_path(path):
+  """Returns the path of the sidecar index for the text file at `path`."""
+  return path + INDEX_SUFFIX
+
+
+def build_index(path):
+  """Returns the offsets of the examples in the text file at `path`.
+
+  Args:
+    path: Path to a text file of alternating question and answer lines.
+
+  Returns:
+    int64 numpy array of length `num_examples + 1`, where example `i` occupies
+    the bytes `[offsets[i], offsets[i + 1])` of the file. (The last entry is
+    the size of the file.)
+
+  Raises:
+    ValueError: If the file does not contain an even number of lines.
+  """
+  newlines = []
+  position = 0
+  with open(path, 'rb') as file_:
+    while True:
+      chunk = file_.read(_CHUNK_SIZE)
+      if not chunk:
+        break
+      chunk = np.frombuffer(chunk, dtype=np.uint8)
+      newlines.append(np.flatnonzero(chunk == _NEWLINE) + position)
+      position += len(chunk)
+  newlines = (np.concatenate(newlines) if newlines
+              else np.zeros(0, dtype=np.int64))
+  if len(newlines) % 2 != 0 or (position > 0 and (
+      not newlines.size or newlines[-1] != position - 1)):
+    raise ValueError('{} does not contain complete question and answer lines'
+                     .format(path))
+  # Each example ends just after every second newline.
+  offsets = np.zeros(len(newlines) // 2 + 1, dtype=np.int64)
+  offsets[1:] = newlines[1::2] + 1
+  return offsets
+
+
+def _index_is_current(path, offsets):
+  return (offsets.ndim == 1 and len(offsets) >= 1
+          and offsets[-1] == os.path.getsize(path)
+          and os.path.getmtime(index_path(path)) >= os.path.getmtime(path))
+
+
+def load_index(path):
+  """Returns the (memory-mapped) index for `path`, building it if needed."""
+  sidecar = index_path(path)
+  if os.path.exists(sidecar):
+    offsets = np.load(sidecar, mmap_mode='r')
+    if _index_is_current(path, offsets):
+      return offsets
+  offsets = build_index(path)
+  # Write to a temporary file first, so concurrent readers never see a partial
+  # index.
+  with open(sidecar + '.tmp', 'wb') as file_:
+    np.save(file_, offsets)
+  os.rename(sidecar + '.tmp', sidecar)
+  return offsets
+
+
+class TextDataset(object):
+  """Random access to the examples of a text file from `generate_to_file`."""
+
+  def __init__(self, path):
+    """Opens the text file at `path`, building its index if needed."""
+    self._path = path
+    self._offsets = load_index(path)
+    if self._offsets[-1] > 0:
+      self._data = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+      self._data = np.zeros(0, dtype=np.uint8)  # empty files cannot be mapped
+
+  def __len__(self):
+    return len(self._offsets) - 1
+
+  def _get(self, index):
+    start = self._offsets[index]
+    end = self._offsets[index + 1]
+    text = self._data[start:end - 1].tobytes().decode('utf-8')
+    question, answer = text.split('\n')
+    return question, answer
+
+  def __getitem__(self, index):
+    """Returns pair `(question, answer)`, or a list of pairs for a slice."""
+    if isinstance(index, slice):
+      return [self._get(i) for i in range(*index.indices(len(self)))]
+    return self._get(_normalize_index(index, len(self)))
+
+  def batch(self, indices):
+    """Returns list of `(question, answer)` pairs for an iterable of indices."""
+    return [self._get(_normalize_index(index, len(self))) for index in indices]
+
+
+class TokenDataset(object):
+  """Random access to the examples of a `.npy` file of tokenized examples."""
+
+  def __init__(self, path):
+    """Memory-maps the `.npy` file at `path`."""
+    self._path = path
+    self._examples = tokenization.load(path)
+
+  def __len__(self):
+    return len(self._examples)
+
+  def __getitem__(self, index):
+    """Returns pair `(question, answer)`, or a list of pairs for a slice."""
+    if isinstance(index, slice):
+      return [tokenization.decode_example(example)
+              for example in self._examples[index]]
+    return tokenization.decode_example(
+        self._examples[_normalize_index(index, len(self))])
+
+  def batch(self, indices):
+    """Returns array of records (of dtype `tokenization.EXAMPLE_DTYPE`).
+
+    E.g., `batch['question']` is a uint8 array of shape `[len(indices),
+    MAX_QUESTION_LENGTH]`.
+
+    Args:
+      indices: Array or list of integer indices.
+    """
+    return self._examples[np.asarray(indices, dtype=np.int64)]
+
+
+def _normalize_index(index, length):
+  index = int(index)
+  if index < 0:
+    index += length
+  if not 0 <= index < length:
+    raise IndexError('Index {} out of range for {} examples'.format(
+        index, length))
+  return index
+
+
+def open_dataset(path):
+  """Returns a `TextDataset` or `TokenDataset`, according to the extension."""
+  if path.endswith('.npy'):
+    return TokenDataset(path)
+  return TextDataset(path)
@@ -0,0 +1,113 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.reader."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+# Dependency imports
+from absl.testing import absltest
+from mathematics_dataset import reader
+from mathematics_dataset import tokenization
+import numpy as np
+
+
+_PAIRS = [
+    ('What is 1 + 1?', '2'),
+    ('Solve 3*x = 6 for x.', '2'),
+    ('Is 7 prime?', 'True'),
+    ('Let f = 1. What is f?', '1'),
+]
+
+
+class ReaderTest(absltest.TestCase):
+
+  def setUp(self):
+    super(ReaderTest, self).setUp()
+    self._directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self._directory)
+
+  def _write_text(self, pairs):
+    path = os.path.join(self._directory, 'module.txt')
+    with open(path, 'w') as text_file:
+      for question, answer in pairs:
+        text_file.write(question + '\n' + answer + '\n')
+    return path
+
+  def testTextDataset(self):
+    path = self._write_text(_PAIRS)
+    dataset = reader.open_dataset(path)
+    self.assertLen(dataset, 4)
+    self.assertEqual(dataset[0], _PAIRS[0])
+    self.assertEqual(dataset[-1], _PAIRS[-1])
+    self.assertEqual(dataset[1:3], _PAIRS[1:3])
+    self.assertEqual(dataset.batch(np.array([3, 0, 2])),
+                     [_PAIRS[3], _PAIRS[0], _PAIRS[2]])
+    with self.assertRaises(IndexError):
+      dataset[4]  # pylint: disable=pointless-statement
+    self.assertTrue(os.path.exists(reader.index_path(path)))
+
+  def testIndexChunked(self):
+    path = self._write_text(_PAIRS * 10)
+    original_chunk_size = reader._CHUNK_SIZE
+    reader._CHUNK_SIZE = 7
+    try:
+      offsets = reader.build_index(path)
+    finally:
+      reader._CHUNK_SIZE = original_chunk_size
+    np.testing.assert_array_equal(offsets, reader.build_index(path))
+    self.assertLen(offsets, 41)
+
+  def testIndexRebuiltWhenStale(self):
+    path = self._write_text(_PAIRS)
+    self.assertLen(reader.open_dataset(path), 4)
+    path = self._write_text(_PAIRS[:3])
+    dataset = reader.open_dataset(path)
+    self.assertLen(dataset, 3)
+    self.assertEqual(dataset[2], _PAIRS[2])
+
+  def testEmptyTextFile(self):
+    path = self._write_text([])
+    self.assertEmpty(reader.open_dataset(path))
+
+  def testIncompleteTextFile(self):
+    path = os.path.join(self._directory, 'module.txt')
+    with open(path, 'w') as text_file:
+      text_file.write('What is 1 + 1?\n')
+    with self.assertRaises(ValueError):
+      reader.open_dataset(path)
+
+  def testTokenDataset(self):
+    examples = np.zeros(len(_PAIRS), dtype=tokenization.EXAMPLE_DTYPE)
+    for i, (question, answer) in enumerate(_PAIRS):
+      examples[i] = tokenization.encode_example(question, answer)
+    path = os.path.join(self._directory, 'module.npy')
+    tokenization.save(path, examples)
+    dataset = reader.open_dataset(path)
+    self.assertLen(dataset, 4)
+    self.assertEqual(dataset[1], _PAIRS[1])
+    self.assertEqual(dataset[2:], _PAIRS[2:])
+    batch = dataset.batch([3, 1])
+    self.assertEqual(batch['question'].shape, (2, 160))
+    self.assertEqual(tokenization.decode(batch['answer'][0]), _PAIRS[3][1])
+
+
+if __name__ == '__main__':
+  absltest.main()
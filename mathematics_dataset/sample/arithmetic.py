@@ -19,13 +19,15 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import fractions
 import math
 import random
 
 # Dependency imports
-from mathematics_dataset.sample import number
 from mathematics_dataset.sample import ops
+from mathematics_dataset.sample import rational
 from mathematics_dataset.util import combinatorics
+from mathematics_dataset.util import factorization
 import numpy as np
 import six
 from six.moves import zip
@@ -43,12 +45,12 @@ class _SampleArgs(collections.namedtuple('SampleArgs', ('count', 'entropy'))):
 
   def split(self, args):
     """Splits the entropy and op counts up."""
-    non_integer_count = sum(not arg.is_Integer for arg in args)
+    non_integer_count = sum(not rational.is_integer(arg) for arg in args)
     assert non_integer_count <= self.count - 1
     count_split = combinatorics.uniform_non_negative_integers_with_sum(
         len(args), (self.count - 1) - non_integer_count)
     for i, arg in enumerate(args):
-      if not arg.is_Integer:
+      if not rational.is_integer(arg):
         count_split[i] += 1
     if all(count == 0 for count in count_split):
       assert self.entropy == 0
@@ -61,16 +63,16 @@ class _SampleArgs(collections.namedtuple('SampleArgs', ('count', 'entropy'))):
 
 
 def _add_sub_filter(value, sample_args):
-  return sample_args.count >= 2 or value.is_Integer
+  return sample_args.count >= 2 or rational.is_integer(value)
 
 
 def _add_op(value, sample_args, rationals_allowed):
   """Returns sampled args for `ops.Add`."""
   entropy, sample_args = sample_args.peel()
   if rationals_allowed and sample_args.count >= 3:
-    x = number.integer_or_rational(entropy, True)
+    x = rational.integer_or_rational(entropy, True)
   else:
-    x = number.integer(entropy, True)
+    x = rational.integer(entropy, True)
   if random.choice([False, True]):
     op_args = [x, value - x]
   else:
@@ -82,9 +84,9 @@ def _sub_op(value, sample_args, rationals_allowed):
   """Returns sampled args for `ops.Sub`."""
   entropy, sample_args = sample_args.peel()
   if rationals_allowed and sample_args.count >= 3:
-    x = number.integer_or_rational(entropy, True)
+    x = rational.integer_or_rational(entropy, True)
   else:
-    x = number.integer(entropy, True)
+    x = rational.integer(entropy, True)
   if random.choice([False, True]):
     op_args = [x, x - value]
   else:
@@ -94,23 +96,23 @@ def _sub_op(value, sample_args, rationals_allowed):
 
 def _entropy_of_factor_split(integer):
   """Returns entropy (log base 10) of decomposing: integer = a * b."""
-  assert integer.is_Integer
+  assert rational.is_integer(integer)
   if integer == 0:
     return 0
   # Gives dict of form {factor: multiplicity}
-  factors = sympy.factorint(integer)
+  factors = factorization.factorint(integer)
   return sum(math.log10(mult + 1) for mult in six.itervalues(factors))
 
 
 def _split_factors(integer):
   """Randomly factors integer into product of two integers."""
-  assert integer.is_Integer
+  assert rational.is_integer(integer)
   if integer == 0:
     return [1, 0]
   # Gives dict of form {factor: multiplicity}
-  factors = sympy.factorint(integer)
-  left = sympy.Integer(1)
-  right = sympy.Integer(1)
+  factors = factorization.factorint(integer)
+  left = 1
+  right = 1
   for factor, mult in six.iteritems(factors):
     left_mult = random.randint(0, mult)
     right_mult = mult - left_mult
@@ -122,7 +124,7 @@ def _split_factors(integer):
 def _mul_filter(value, sample_args):
   if sample_args.count >= 2:
     return True
-  if not value.is_Integer:
+  if not rational.is_integer(value):
     return False
   return sample_args.entropy <= _entropy_of_factor_split(value)
 
@@ -131,7 +133,7 @@ def _mul_op(value, sample_args, rationals_allowed):
   """Returns sampled args for `ops.Mul`."""
   if sample_args.count >= 3:
     _, op_args, sample_args = _div_op(value, sample_args, rationals_allowed)
-    op_args = [op_args[0], sympy.Integer(1) / op_args[1]]
+    op_args = [op_args[0], 1 / fractions.Fraction(op_args[1])]
   elif sample_args.count == 1:
     entropy, sample_args = sample_args.peel()
     assert _entropy_of_factor_split(value) >= entropy
@@ -139,12 +141,12 @@ def _mul_op(value, sample_args, rationals_allowed):
   else:
     assert sample_args.count == 2
     entropy, sample_args = sample_args.peel()
-    numer = sympy.numer(value)
-    denom = sympy.denom(value)
+    numer = rational.numer(value)
+    denom = rational.denom(value)
     p1, p2 = _split_factors(numer)
     entropy -= _entropy_of_factor_split(numer)
-    mult = number.integer(entropy, signed=True, min_abs=1, coprime_to=p1)
-    op_args = [p1 / (mult * denom), p2 * mult]
+    mult = rational.integer(entropy, signed=True, min_abs=1, coprime_to=p1)
+    op_args = [fractions.Fraction(p1, mult * denom), p2 * mult]
 
   if random.choice([False, True]):
     op_args = list(reversed(op_args))
@@ -163,19 +165,19 @@ def _div_op(value, sample_args, rationals_allowed):
   assert rationals_allowed  # should be True if this function gets invoked
   entropy, sample_args = sample_args.peel()
 
-  numer = sympy.numer(value)
-  denom = sympy.denom(value)
+  numer = rational.numer(value)
+  denom = rational.denom(value)
 
   if sample_args.count == 1:
-    mult = number.integer(entropy, signed=True, min_abs=1)
+    mult = rational.integer(entropy, signed=True, min_abs=1)
     op_args = [numer * mult, denom * mult]
   elif sample_args.count == 2:
     if numer == 0 or random.choice([False, True]):
-      x = number.integer(entropy, signed=True, min_abs=1, coprime_to=denom)
-      op_args = [sympy.Rational(x * numer, denom), x]
+      x = rational.integer(entropy, signed=True, min_abs=1, coprime_to=denom)
+      op_args = [fractions.Fraction(x * numer, denom), x]
     else:
-      x = number.integer(entropy, signed=True, min_abs=1, coprime_to=numer)
-      op_args = [x, sympy.Rational(x * denom, numer)]
+      x = rational.integer(entropy, signed=True, min_abs=1, coprime_to=numer)
+      op_args = [x, fractions.Fraction(x * denom, numer)]
   else:
     assert sample_args.count >= 3
     p2, p1 = _split_factors(numer)
@@ -183,9 +185,9 @@ def _div_op(value, sample_args, rationals_allowed):
     entropy -= _entropy_of_factor_split(numer) + _entropy_of_factor_split(denom)
     entropy_r = random.uniform(0, entropy)
     entropy_s = entropy - entropy_r
-    r = number.integer(entropy_r, signed=True, min_abs=1, coprime_to=q1*p2)
-    s = number.integer(entropy_s, signed=False, min_abs=1, coprime_to=p1*q2)
-    op_args = [sympy.Rational(r*p1, s*q1), sympy.Rational(r*q2, s*p2)]
+    r = rational.integer(entropy_r, signed=True, min_abs=1, coprime_to=q1*p2)
+    s = rational.integer(entropy_s, signed=False, min_abs=1, coprime_to=p1*q2)
+    op_args = [fractions.Fraction(r*p1, s*q1), fractions.Fraction(r*q2, s*p2)]
 
   return ops.Div, op_args, sample_args
 
@@ -195,7 +197,7 @@ def _arithmetic(value, sample_args, add_sub, mul_div):
   assert sample_args.count >= 0
   if sample_args.count == 0:
     assert sample_args.entropy == 0
-    return ops.Constant(value)
+    return ops.Constant(rational.to_sympy(value))
 
   allowed = []
   if add_sub and _add_sub_filter(value, sample_args):
@@ -255,6 +257,7 @@ def arithmetic(value, entropy, length=None, add_sub=True, mul_div=True):
   # addition as the op, and is otherwise an an upper bound.
   entropy += combinatorics.log_number_binary_trees(length) / math.log(10)
 
-  value = sympy.sympify(value)
+  # Sampled with python ints and fractions, as much faster than with sympy.
+  value = rational.from_sympy(sympy.sympify(value))
   sample_args = _SampleArgs(length, entropy)
   return _arithmetic(value, sample_args, add_sub, mul_div)
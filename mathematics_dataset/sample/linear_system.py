@@ -21,12 +21,11 @@ from __future__ import print_function
 import random
 
 # Dependency imports
-from mathematics_dataset.sample import number
 from mathematics_dataset.sample import ops
 from mathematics_dataset.sample import polynomials
+from mathematics_dataset.sample import rational
 import numpy as np
 from six.moves import range
-import sympy
 
 
 def _make_equals_zero_split(monomials):
@@ -65,6 +64,45 @@ def _is_trivial_in(matrix, variable):
   return False
 
 
+def _determinant(matrix):
+  """Returns the determinant of a square matrix of python ints.
+
+  This uses fraction-free (Bareiss) elimination, so all the intermediate values
+  are exact integers (dividing entries of the previous pivot's minors exactly),
+  which is much faster than `sympy.det` for the small matrices sampled here.
+
+  Args:
+    matrix: List of rows (lists of python ints).
+
+  Returns:
+    Python int.
+  """
+  matrix = [list(row) for row in matrix]
+  size = len(matrix)
+  sign = 1
+  previous_pivot = 1
+  for k in range(size - 1):
+    if matrix[k][k] == 0:
+      # Swap in a row with non-zero pivot (negating the determinant).
+      for i in range(k + 1, size):
+        if matrix[i][k] != 0:
+          matrix[k], matrix[i] = matrix[i], matrix[k]
+          sign = -sign
+          break
+      else:
+        return 0
+    pivot = matrix[k][k]
+    for i in range(k + 1, size):
+      for j in range(k + 1, size):
+        matrix[i][j] = (
+            (matrix[i][j] * pivot - matrix[i][k] * matrix[k][j])
+            // previous_pivot)
+    previous_pivot = pivot
+  if size == 0:
+    return 1
+  return sign * matrix[-1][-1]
+
+
 def _invertible_matrix(degree, entropy, non_trivial_in):
   """Generates random invertible matrix."""
   matrix_entropies = entropy * np.random.dirichlet(np.ones(degree * degree))
@@ -72,13 +110,12 @@ def _invertible_matrix(degree, entropy, non_trivial_in):
   matrix_entropies = np.maximum(1, matrix_entropies)
 
   while True:
-    def gen(i, j):
-      return number.integer(matrix_entropies[i, j], True)
-
-    matrix = [[gen(i, j) for i in range(degree)] for j in range(degree)]  # pylint: disable=g-complex-comprehension
+    # Entry `[j, i]` has entropy `matrix_entropies[i, j]`.
+    values = rational.integers(matrix_entropies.T.ravel(), True)
+    matrix = [values[j * degree:(j + 1) * degree] for j in range(degree)]
     if non_trivial_in is not None and _is_trivial_in(matrix, non_trivial_in):
       continue
-    if sympy.det(sympy.Matrix(matrix)) != 0:
+    if _determinant(matrix) != 0:
       break
 
   matrix = np.asarray(matrix).astype(int)
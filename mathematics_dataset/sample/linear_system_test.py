@@ -38,6 +38,19 @@ class ExpressionWithValueTest(parameterized.TestCase):
     self.assertEqual(linear_system._is_trivial_in([[1, 2], [0, 3]], 0), False)
     self.assertEqual(linear_system._is_trivial_in([[1, 2], [0, 3]], 1), True)
 
+  def testDeterminant(self):
+    self.assertEqual(linear_system._determinant([]), 1)
+    self.assertEqual(linear_system._determinant([[-3]]), -3)
+    self.assertEqual(linear_system._determinant([[0, 1], [1, 0]]), -1)
+    self.assertEqual(linear_system._determinant([[1, 2], [2, 4]]), 0)
+    for _ in range(100):
+      degree = random.randint(1, 5)
+      matrix = [[random.choice([0, random.randint(-20, 20)])
+                 for _ in range(degree)]
+                for _ in range(degree)]
+      self.assertEqual(linear_system._determinant(matrix),
+                       sympy.Matrix(matrix).det())
+
   @parameterized.parameters([1, 2, 3])
   def testLinearSystem(self, degree):
     for _ in range(100):  # test a few times
@@ -22,19 +22,14 @@ import math
 import random
 
 # Dependency imports
+from mathematics_dataset.sample import rational
 from mathematics_dataset.util import display
 import numpy as np
-import six
 import sympy
 
 
-def _coprime_density(value):
-  """Returns float > 0; asymptotic density of integers coprime to `value`."""
-  factors = sympy.factorint(value)
-  density = 1.0
-  for prime in six.iterkeys(factors):
-    density *= 1 - 1 / prime
-  return density
+# Batches with fewer values than this are sampled one value at a time.
+MIN_BATCH_SIZE = rational.MIN_BATCH_SIZE
 
 
 def integer(entropy, signed, min_abs=0, coprime_to=1):
@@ -53,37 +48,13 @@ def integer(entropy, signed, min_abs=0, coprime_to=1):
   Returns:
     Integer.
   """
-  assert isinstance(min_abs, int) and not isinstance(min_abs, bool)
-  coprime_to = abs(coprime_to)
-  assert min_abs >= 0
-
-  max_ = math.pow(10, entropy)
-  max_ += min_abs
-  if coprime_to >= 2:
-    max_ = max_ / _coprime_density(coprime_to) + 1
-
-  if signed:
-    max_ = int(math.ceil(max_ / 2))
-    range_ = [-max_, max_]
-  else:
-    max_ = int(math.ceil(max_))
-    range_ = [min_abs, max_]
-
-  while True:
-    value = random.randint(*range_)
-    if abs(value) >= min_abs and sympy.gcd(value, coprime_to) == 1:
-      break
-
-  return sympy.Integer(value)
+  return sympy.Integer(
+      rational.integer(entropy, signed, min_abs=min_abs, coprime_to=coprime_to))
 
 
 def non_integer_rational(entropy, signed):
   """Similar args to `integer`. Entropy split between denom and numer."""
-  numer_entropy = random.uniform(0, entropy)
-  denom_entropy = entropy - numer_entropy
-  numer = integer(numer_entropy, signed, min_abs=1)
-  denom = integer(denom_entropy, False, min_abs=2, coprime_to=numer)
-  return sympy.Rational(numer, denom)
+  return rational.to_sympy(rational.non_integer_rational(entropy, signed))
 
 
 def integer_or_rational(entropy, signed, min_abs=0):
@@ -107,7 +78,7 @@ def non_integer_decimal(entropy, signed):
     Non-integer decimal.
   """
   while True:
-    base = integer(entropy, signed)
+    base = rational.integer(entropy, signed)
     shift = random.randint(1, int(math.ceil(entropy)))
     divisor = 10**shift
     if base % divisor != 0:
@@ -123,6 +94,75 @@ def integer_or_decimal(entropy, signed):
     return non_integer_decimal(entropy, signed)
 
 
+def integers(entropies, signed, min_abs=0):
+  """Returns list of integers, sampled as by `integer` for each entropy.
+
+  Batches of at least `MIN_BATCH_SIZE` values are drawn together from
+  `np.random`, which is faster than calling `integer` for each entropy.
+
+  Args:
+    entropies: 1D array of floats >= 0.
+    signed: Boolean. Whether to also return negative numbers.
+    min_abs: Integer >= 0. The minimum absolute value.
+
+  Returns:
+    List of `sympy.Integer`, of the same length as `entropies`.
+  """
+  return [sympy.Integer(value)
+          for value in rational.integers(entropies, signed, min_abs=min_abs)]
+
+
+def non_integer_rationals(entropies, signed):
+  """Returns list, sampled as by `non_integer_rational` for each entropy."""
+  return [rational.to_sympy(value)
+          for value in rational.non_integer_rationals(entropies, signed)]
+
+
+def integers_or_rationals(entropies, signed, min_abs=0):
+  """Returns list, sampled as by `integer_or_rational` for each entropy."""
+  return [rational.to_sympy(value) for value in rational.integers_or_rationals(
+      entropies, signed, min_abs=min_abs)]
+
+
+def non_integer_decimals(entropies, signed):
+  """Returns list, sampled as by `non_integer_decimal` for each entropy."""
+  entropies = np.asarray(entropies, dtype=np.float64)
+  if len(entropies) < MIN_BATCH_SIZE:
+    return [non_integer_decimal(entropy, signed) for entropy in entropies]
+  decimals = [None] * len(entropies)
+  pending = np.arange(len(entropies))
+  while pending.size:
+    bases = rational.integers(entropies[pending], signed)
+    shifts = np.random.randint(1, np.ceil(entropies[pending]).astype(int) + 1)
+    rejected = []
+    for i, base, shift in zip(pending, bases, shifts.tolist()):
+      divisor = 10**shift
+      if base % divisor != 0:
+        decimals[i] = display.Decimal(sympy.Rational(base, divisor))
+      else:
+        rejected.append(i)
+    pending = np.asarray(rejected, dtype=np.int64)
+  return decimals
+
+
+def integers_or_decimals(entropies, signed):
+  """Returns list, sampled as by `integer_or_decimal` for each entropy."""
+  entropies = np.asarray(entropies, dtype=np.float64)
+  if len(entropies) < MIN_BATCH_SIZE:
+    return [integer_or_decimal(entropy, signed) for entropy in entropies]
+  is_integer_ = np.random.randint(2, size=len(entropies)).astype(bool)
+  values = [None] * len(entropies)
+  integer_indices = np.flatnonzero(is_integer_)
+  decimal_indices = np.flatnonzero(~is_integer_)
+  for i, value in zip(integer_indices,
+                      integers(entropies[integer_indices], signed)):
+    values[i] = display.Decimal(value)
+  for i, value in zip(decimal_indices,
+                      non_integer_decimals(entropies[decimal_indices], signed)):
+    values[i] = value
+  return values
+
+
 def entropy_of_value(value):
   """Returns "min entropy" that would give probability of getting this value."""
   if isinstance(value, display.Decimal):
@@ -24,18 +24,14 @@ import random
 from absl.testing import absltest
 from absl.testing import parameterized
 from mathematics_dataset.sample import number
+from mathematics_dataset.util import display
+import numpy as np
 from six.moves import range
 import sympy
 
 
 class NumberTest(parameterized.TestCase):
 
-  def testCoprimeDensity(self):
-    self.assertEqual(number._coprime_density(1), 1.0)
-    self.assertEqual(number._coprime_density(2), 0.5)
-    self.assertLess(abs(number._coprime_density(3) - 2/3), 1e-6)
-    self.assertLess(abs(number._coprime_density(6) - 1/3), 1e-6)
-
   @parameterized.parameters(False, True)
   def testInteger_allowZero(self, signed):
     saw_zero = False
@@ -64,6 +60,24 @@ class NumberTest(parameterized.TestCase):
     for _ in range(10):
       number.integer_or_rational(2, signed)
 
+  @parameterized.parameters(1, number.MIN_BATCH_SIZE, 200)
+  def testBatched(self, count):
+    entropies = np.full(count, 2.0)
+    for value in number.integers(entropies, signed=False, min_abs=1):
+      self.assertIsInstance(value, sympy.Integer)
+      self.assertGreaterEqual(value, 1)
+    for value in number.non_integer_rationals(entropies, signed=True):
+      self.assertNotEqual(sympy.denom(value), 1)
+    for value in number.integers_or_rationals(entropies, signed=True):
+      self.assertTrue(number.is_integer_or_rational(value))
+    for value in number.non_integer_decimals(entropies, signed=False):
+      self.assertIsInstance(value, display.Decimal)
+      self.assertNotEqual(sympy.denom(value), 1)
+    values = number.integers_or_decimals(entropies, signed=True)
+    self.assertLen(values, count)
+    for value in values:
+      self.assertIsInstance(value, display.Decimal)
+
   def testNonIntegerDecimal(self):
     for _ in range(1000):
       sample = number.non_integer_decimal(1, False)
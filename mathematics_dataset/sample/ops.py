@@ -87,6 +87,21 @@ def bracketed(child, parent, bracket_if_same_precedence):
     return '({})'.format(child)
 
 
+class _State(object):
+  """Holds the number of times that constants have been changed.
+
+  The ops cache their string renderings; these are only reused if no
+  `Constant.value` has been set since (which may change the rendering of any
+  op containing the constant).
+  """
+
+  def __init__(self):
+    self.generation = 0
+
+
+_STATE = _State()
+
+
 def _flatten(iterable):
   """Returns list."""
   if isinstance(iterable, (list, tuple)):
@@ -118,8 +133,14 @@ class Op(object):
   This needs to support being transformed into sympy (and possibly in the future
   other types such as an appropriately formatted string), when given the op
   arguments.
+
+  Ops (like the other objects created in large numbers per problem) use
+  `__slots__`, so that each takes less memory than a dict-backed object;
+  subclasses should declare any attributes they add in their own `__slots__`.
   """
 
+  __slots__ = ('_children', '_flat_children', '_string', '_string_generation')
+
   def __init__(self, children):
     """Initialize this `Op` base class.
 
@@ -132,23 +153,40 @@ class Op(object):
                      for child in flat_children]
     children = _pack_sequence_as(children, flat_children)
     self._children = children
+    self._flat_children = flat_children
+    self._string = None
+    self._string_generation = None
 
   @property
   def children(self):
     """Returns iterable or dict over immediate children."""
     return self._children
 
+  def iter_descendants(self):
+    """Yields self, children, grandchildren, etc, in depth-first pre-order."""
+    stack = [self]
+    while stack:
+      op = stack.pop()
+      yield op
+      stack.extend(reversed(op._flat_children))  # pylint: disable=protected-access
+
   def descendants(self):
     """Returns list of all descendants (self, children, grandchildren, etc)."""
-    descendants = [self]
-    flat_children = _flatten(self._children)
-    for child in flat_children:
-      descendants += child.descendants()
-    return descendants
+    return list(self.iter_descendants())
 
-  @abc.abstractmethod
   def __str__(self):
-    """Returns a string format of this op."""
+    """Returns a string format of this op.
+
+    This is rendered once, and then reused until a `Constant.value` is changed.
+    """
+    if self._string_generation != _STATE.generation:
+      self._string = self._render()
+      self._string_generation = _STATE.generation
+    return self._string
+
+  @abc.abstractmethod
+  def _render(self):
+    """Returns a string format of this op (without caching)."""
 
   @abc.abstractmethod
   def sympy(self):
@@ -175,13 +213,15 @@ class Op(object):
 class Constant(Op):
   """Returns a constant value; a nullary op."""
 
+  __slots__ = ('_value',)
+
   def __init__(self, value):
     super(Constant, self).__init__([])
     if isinstance(value, six.integer_types):
       value = sympy.Integer(value)
     self._value = value
 
-  def __str__(self):
+  def _render(self):
     return str(self._value)
 
   def sympy(self):
@@ -194,6 +234,7 @@ class Constant(Op):
   @value.setter
   def value(self, value):
     self._value = value
+    _STATE.generation += 1
 
   def _is_simple(self):
     """Returns whether it's a simple number, rather than a division or neg."""
@@ -223,6 +264,8 @@ class Constant(Op):
 class _SumLikeOp(Op):
   """Abstract op for sum-like terms which may contain negative entries."""
 
+  __slots__ = ()
+
   @abc.abstractmethod
   def expanded_signs_and_terms(self):
     """Returns a list of arguments, plus any sub-arguments from sub-adds.
@@ -232,7 +275,7 @@ class _SumLikeOp(Op):
     the inner add have been extracted).
     """
 
-  def __str__(self):
+  def _render(self):
     signs_and_terms = self.expanded_signs_and_terms()
     if not signs_and_terms:
       return '0'
@@ -253,6 +296,8 @@ class _SumLikeOp(Op):
 class Identity(_SumLikeOp):
   """The identity op (a unitary op)."""
 
+  __slots__ = ()
+
   def __init__(self, input_):
     super(Identity, self).__init__({'input': input_})
 
@@ -262,7 +307,7 @@ class Identity(_SumLikeOp):
     else:
       return [(True, self.children['input'])]
 
-  def __str__(self):
+  def _render(self):
     return str(self.children['input'])
 
   def sympy(self):
@@ -276,6 +321,8 @@ class Identity(_SumLikeOp):
 class Neg(_SumLikeOp):
   """Negation, a unary op. Also has special display when appearing in a sum."""
 
+  __slots__ = ()
+
   def __init__(self, arg):
     super(Neg, self).__init__({'input': arg})
 
@@ -300,6 +347,8 @@ class Neg(_SumLikeOp):
 class Add(_SumLikeOp):
   """Addition."""
 
+  __slots__ = ()
+
   def __init__(self, *args):
     super(Add, self).__init__(args)
 
@@ -328,10 +377,12 @@ class Add(_SumLikeOp):
 class Sub(Op):
   """Subtraction."""
 
+  __slots__ = ()
+
   def __init__(self, left, right):
     super(Sub, self).__init__({'left': left, 'right': right})
 
-  def __str__(self):
+  def _render(self):
     return (bracketed(self.children['left'], self, False) + ' - '
             + bracketed(self.children['right'], self, True))
 
@@ -347,10 +398,12 @@ class Sub(Op):
 class Mul(Op):
   """Multiplication."""
 
+  __slots__ = ()
+
   def __init__(self, *args):
     super(Mul, self).__init__(args)
 
-  def __str__(self):
+  def _render(self):
     if not self.children:
       return '1'
     else:
@@ -368,10 +421,12 @@ class Mul(Op):
 class Div(Op):
   """Division."""
 
+  __slots__ = ()
+
   def __init__(self, numer, denom):
     super(Div, self).__init__({'numer': numer, 'denom': denom})
 
-  def __str__(self):
+  def _render(self):
     return u'{}{}{}'.format(
         bracketed(self.children['numer'], self, True), DIV_SYMBOL,
         bracketed(self.children['denom'], self, True))
@@ -388,10 +443,12 @@ class Div(Op):
 class Pow(Op):
   """Power a to the power b."""
 
+  __slots__ = ()
+
   def __init__(self, a, b):
     super(Pow, self).__init__({'a': a, 'b': b})
 
-  def __str__(self):
+  def _render(self):
     return u'{}{}{}'.format(
         bracketed(self.children['a'], self, True), POW_SYMBOL,
         bracketed(self.children['b'], self, True))
@@ -408,10 +465,12 @@ class Pow(Op):
 class Sqrt(Op):
   """Square root of a value."""
 
+  __slots__ = ()
+
   def __init__(self, a):
     super(Sqrt, self).__init__({'a': a})
 
-  def __str__(self):
+  def _render(self):
     return 'sqrt({})'.format(self.children['a'])
 
   def sympy(self):
@@ -425,10 +484,12 @@ class Sqrt(Op):
 class Eq(Op):
   """Equality."""
 
+  __slots__ = ()
+
   def __init__(self, left, right):
     super(Eq, self).__init__({'left': left, 'right': right})
 
-  def __str__(self):
+  def _render(self):
     return '{} = {}'.format(self.children['left'], self.children['right'])
 
   def sympy(self):
@@ -443,9 +504,8 @@ def number_constants(expressions):
   """Returns list of integer, rational, decimal constants in the expressions."""
   if isinstance(expressions, Op):
     expressions = [expressions]
-  descendants = []
-  for expression in expressions:
-    descendants += expression.descendants()
-  candidate_constants = [op for op in descendants if isinstance(op, Constant)]
-  return [constant for constant in candidate_constants
-          if number.is_integer_or_rational_or_decimal(constant.value)]
+  return [op
+          for expression in expressions
+          for op in expression.iter_descendants()
+          if isinstance(op, Constant)
+          and number.is_integer_or_rational_or_decimal(op.value)]
@@ -195,6 +195,20 @@ class OpsTest(absltest.TestCase):
     expression = ops.Neg(constant)
     self.assertEqual(set(expression.descendants()), set([constant, expression]))
 
+  def testDescendantsOrder(self):
+    constants = [ops.Constant(i) for i in range(3)]
+    mul = ops.Mul(constants[1], constants[2])
+    expression = ops.Add(constants[0], mul)
+    self.assertEqual(expression.descendants(),
+                     [expression, constants[0], mul, constants[1], constants[2]])
+
+  def testStrUpdatedWhenConstantChanges(self):
+    constant = ops.Constant(2)
+    expression = ops.Mul(ops.Add(constant, 3), 4)
+    self.assertEqual(str(expression), '(2 + 3)*4')
+    constant.value = sympy.Integer(-5)
+    self.assertEqual(str(expression), '(-5 + 3)*4')
+
   def testNumberConstants(self):
     constant = ops.Constant(3)
     expression = ops.Neg(constant)
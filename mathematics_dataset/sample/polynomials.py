@@ -24,7 +24,9 @@ import random
 # Dependency imports
 from mathematics_dataset.sample import number
 from mathematics_dataset.sample import ops
+from mathematics_dataset.sample import rational
 from mathematics_dataset.util import combinatorics
+from mathematics_dataset.util import factorization
 import numpy as np
 import six
 from six.moves import range
@@ -120,8 +122,7 @@ def integers_with_sum(value, count, entropy):
   term_entropies = entropy * np.random.dirichlet(np.ones(count))
   term_entropies = np.maximum(min_term_entropy, term_entropies)
 
-  terms = [number.integer(term_entropy, signed=True)
-           for term_entropy in term_entropies]
+  terms = number.integers(term_entropies, signed=True)
 
   delta = value - sum(terms)
   deltas = _split_value_equally(delta, count)
@@ -214,8 +215,8 @@ def sample_coefficients(degrees, entropy, min_non_zero=0, max_non_zero=None):
   coeffs = np.zeros(degrees + 1, dtype=np.int64)
   entropies = entropy * np.random.dirichlet(np.ones(num_non_zero))
 
-  for index, entry_entropy in zip(indices, entropies):
-    value = number.integer(entry_entropy, signed=True, min_abs=1)
+  values = rational.integers(entropies, signed=True, min_abs=1)
+  for index, value in zip(indices, values):
     coeffs.itemset(index, value)
 
   return coeffs
@@ -238,7 +239,7 @@ def expand_coefficients(coefficients, entropy, length=None):
   coefficients = np.asarray(coefficients)
   shape = coefficients.shape
 
-  expanded_coefficients = np.empty(shape, dtype=np.object)
+  expanded_coefficients = np.empty(shape, dtype=object)
 
   min_length = np.count_nonzero(coefficients) + 2
   if length is None:
@@ -253,13 +254,11 @@ def expand_coefficients(coefficients, entropy, length=None):
   counts = np.reshape(counts, shape)
   coeffs_entropy = np.reshape(coeffs_entropy, shape)
 
-  indices = list(zip(*np.indices(shape).reshape([len(shape), -1])))
-  for power in indices:
-    coeffs = integers_with_sum(
-        value=coefficients.item(power),
-        count=counts.item(power),
-        entropy=coeffs_entropy.item(power))
-    expanded_coefficients.itemset(power, coeffs)
+  for power in np.ndindex(*shape):
+    expanded_coefficients[power] = integers_with_sum(
+        value=coefficients[power],
+        count=counts[power],
+        entropy=coeffs_entropy[power])
 
   return expanded_coefficients
 
@@ -273,12 +272,8 @@ def sample_expanded_coefficients(degrees, entropy, length=None):
 def coefficients_to_polynomial(coefficients, variables):
   """Converts array of lists of coefficients to a polynomial."""
   coefficients = np.asarray(coefficients)
-  shape = coefficients.shape
-
-  indices = list(zip(*np.indices(shape).reshape([len(shape), -1])))
   monomials = []
-  for power in indices:
-    coeffs = coefficients.item(power)
+  for power, coeffs in np.ndenumerate(coefficients):
     if (number.is_integer_or_rational(coeffs)
         or isinstance(coeffs, sympy.Symbol)):
       coeffs = [coeffs]
@@ -291,9 +286,108 @@ def coefficients_to_polynomial(coefficients, variables):
   return ops.Add(*monomials)
 
 
+def coefficients_to_sympy(coefficients, variables):
+  """Returns the (expanded) sympy polynomial with the given coefficients.
+
+  Unlike `coefficients_to_polynomial`, this does not use any randomness, and
+  builds the sympy expression directly (rather than via `ops`).
+
+  Args:
+    coefficients: Array of (integer or rational) coefficients.
+    variables: List of variables, one for each axis of `coefficients`.
+
+  Returns:
+    Sympy expression.
+  """
+  coefficients = np.asarray(coefficients)
+  if not isinstance(variables, (list, tuple)):
+    variables = [variables]
+  terms = []
+  for power, coefficient in np.ndenumerate(coefficients):
+    if coefficient == 0:
+      continue
+    term = sympy.sympify(coefficient)
+    for variable, exponent in zip(variables, power):
+      if exponent > 0:
+        term *= variable ** exponent
+    terms.append(term)
+  return sympy.Add(*terms)
+
+
+def _term_to_string(coefficient, factors):
+  """Returns pair `(is_negative, string)` for a term as printed by sympy."""
+  coefficient = rational.from_sympy(coefficient)
+  numer = int(rational.numer(coefficient))
+  denom = int(rational.denom(coefficient))
+  if abs(numer) != 1 or not factors:
+    factors = [str(abs(numer))] + factors
+  string = '*'.join(factors)
+  if denom != 1:
+    string += '/' + str(denom)
+  return numer < 0, string
+
+
+def coefficients_to_string(coefficients, variables):
+  """Returns `str(coefficients_to_sympy(coefficients, variables))`.
+
+  This formats the string directly (as sympy's printer does for expanded
+  polynomials with rational coefficients), which is much faster than building
+  and printing the sympy expression: the terms are ordered lexicographically
+  by their powers (with the variables ordered by name), in decreasing order,
+  other than for sympy's special case of two terms noted below.
+
+  Args:
+    coefficients: Array of (integer or rational) coefficients.
+    variables: List of variables, one for each axis of `coefficients`.
+
+  Returns:
+    String.
+  """
+  coefficients = np.asarray(coefficients)
+  if not isinstance(variables, (list, tuple)):
+    variables = [variables]
+  names = [str(variable) for variable in variables]
+  axes = sorted(range(len(names)), key=lambda axis: names[axis])
+
+  terms = []
+  for power, coefficient in np.ndenumerate(coefficients):
+    if coefficient != 0:
+      terms.append((tuple(power[axis] for axis in axes), coefficient))
+  if not terms:
+    return '0'
+  terms.sort(key=lambda term: term[0], reverse=True)
+  # Sympy special cases a positive constant plus a negative multiple of a single
+  # power, e.g., printing "2 - x" rather than "-x + 2".
+  if (len(terms) == 2 and not any(terms[1][0]) and terms[1][1] > 0
+      and terms[0][1] < 0 and np.count_nonzero(terms[0][0]) == 1):
+    terms.reverse()
+
+  result = []
+  for powers, coefficient in terms:
+    factors = []
+    for axis, power in zip(axes, powers):
+      if power == 1:
+        factors.append(names[axis])
+      elif power > 1:
+        factors.append('{}**{}'.format(names[axis], power))
+    is_negative, string = _term_to_string(coefficient, factors)
+    if result:
+      result.append(' - ' if is_negative else ' + ')
+    elif is_negative:
+      result.append('-')
+    result.append(string)
+  return ''.join(result)
+
+
+def _sample(variables, degrees, entropy, length):
+  """As `sample`, but also returns the (unexpanded) coefficients."""
+  coefficients = sample_coefficients(degrees, entropy/2, max_non_zero=length)
+  expanded = expand_coefficients(coefficients, entropy/2, length)
+  return coefficients_to_polynomial(expanded, variables), coefficients
+
+
 def sample(variables, degrees, entropy, length=None):
-  coefficients = sample_expanded_coefficients(degrees, entropy, length)
-  return coefficients_to_polynomial(coefficients, variables)
+  return _sample(variables, degrees, entropy, length)[0]
 
 
 def add_coefficients(coeffs1, coeffs2):
@@ -317,8 +411,57 @@ def add_coefficients(coeffs1, coeffs2):
   return coeffs1 + coeffs2
 
 
+def multiply_coefficients(coeffs1, coeffs2):
+  """Multiplies together two sets of coefficients over same set of variables.
+
+  The coefficients are multiplied as python integers (or the types of the
+  entries, if not integers), so the result is exact.
+
+  Args:
+    coeffs1: Array of coefficients.
+    coeffs2: Array of coefficients, with the same number of dimensions.
+
+  Returns:
+    Numpy object array of shape `coeffs1.shape + coeffs2.shape - 1`.
+  """
+  coeffs1 = np.asarray(coeffs1).astype(object)
+  coeffs2 = np.asarray(coeffs2).astype(object)
+  assert coeffs1.ndim == coeffs2.ndim
+  shape = np.maximum(
+      0, np.array(coeffs1.shape) + np.array(coeffs2.shape) - 1)
+  result = np.zeros(shape, dtype=object)
+  # Add on `coeffs2` times each (non-zero) term of `coeffs1`.
+  for power in zip(*np.nonzero(coeffs1)):
+    slices = tuple(slice(start, start + length)
+                   for start, length in zip(power, coeffs2.shape))
+    result[slices] += coeffs1[power] * coeffs2
+  return result
+
+
+def compose_coefficients(outer, inner):
+  """Returns coefficients of `outer(inner(x))` for univariate polynomials."""
+  outer = np.asarray(outer).astype(object)
+  inner = np.asarray(inner).astype(object)
+  assert outer.ndim == 1 and inner.ndim == 1
+  # Horner's method.
+  result = np.zeros([1], dtype=object)
+  for coefficient in outer[::-1]:
+    result = add_coefficients(multiply_coefficients(result, inner),
+                              np.array([coefficient], dtype=object))
+  return trim(result)
+
+
+def degree(coefficients, axis):
+  """Returns degree of the variable of `axis` (0 for the zero polynomial)."""
+  coefficients = np.asarray(coefficients)
+  non_zero = np.not_equal(coefficients, 0)
+  other_axes = tuple(i for i in range(coefficients.ndim) if i != axis)
+  non_zero_along_axis = np.flatnonzero(np.any(non_zero, axis=other_axes))
+  return int(non_zero_along_axis[-1]) if non_zero_along_axis.size else 0
+
+
 def _random_factor(integer):
-  factors = sympy.factorint(integer)
+  factors = factorization.factorint(integer)
   result = 1
   for factor, power in six.iteritems(factors):
     result *= factor ** random.randint(0, power)
@@ -363,8 +506,8 @@ def coefficients_linear_split(coefficients, entropy):
   if random.choice([False, True]):
     a, b = b, a
 
-  coefficients_1 = np.zeros(coefficients.shape, dtype=np.object)
-  coefficients_2 = np.zeros(coefficients.shape, dtype=np.object)
+  coefficients_1 = np.zeros(coefficients.shape, dtype=object)
+  coefficients_2 = np.zeros(coefficients.shape, dtype=object)
 
   for index, coefficient in enumerate(coefficients):
     entropy_coeff = entropy_coefficients[index]
@@ -386,19 +529,15 @@ def coefficients_linear_split(coefficients, entropy):
   return a, b, coefficients_1, coefficients_2
 
 
-def _degree_of_variable(polynomial, variable):
-  polynomial = sympy.sympify(polynomial).expand()
-  if polynomial.is_constant():
-    return 0
-  polynomial = sympy.poly(polynomial)
-  if variable not in polynomial.free_symbols:
-    return 0
-  return polynomial.degree(variable)
-
-
 def _sample_with_brackets(depth, variables, degrees, entropy, length,
                           force_brackets=True):
-  """Internal recursive function for: constructs a polynomial with brackets."""
+  """Internal recursive function for: constructs a polynomial with brackets.
+
+  Returns:
+    Pair `(expression, coefficients)`, where `coefficients` are those of the
+    expanded `expression`; these are computed alongside `expression`, so that
+    its degrees can be checked without expanding it in sympy.
+  """
   # To generate arbitrary polynomial recursively, can do one of:
   # *   add two polynomials, with at least one having brackets.
   # *   multiply two polynomials.
@@ -408,7 +547,7 @@ def _sample_with_brackets(depth, variables, degrees, entropy, length,
     length = max(2, length)
 
   if not force_brackets and (random.choice([False, True]) or length < 2):
-    return sample(variables, degrees, entropy, length)
+    return _sample(variables, degrees, entropy, length)
 
   length_left = random.randint(1, length - 1)
   length_right = length - length_left
@@ -425,21 +564,21 @@ def _sample_with_brackets(depth, variables, degrees, entropy, length,
           depth + 1, variables, degrees, entropy_right, length_right, False)
       if random.choice([False, True]):
         left, right = right, left
-      result = ops.Add(left, right)
+      coefficients = add_coefficients(left[1], right[1])
       all_ok = True
-      for variable, degree in zip(variables, degrees):
-        if _degree_of_variable(result, variable) != degree:
+      for axis, degree_ in enumerate(degrees):
+        if degree(coefficients, axis) != degree_:
           all_ok = False
           break
       if all_ok:
-        return result
+        return ops.Add(left[0], right[0]), coefficients
   else:
     # Multiply two.
     def sample_with_zero_check(degrees_, entropy_, length_):
       while True:
         result = _sample_with_brackets(
             depth + 1, variables, degrees_, entropy_, length_, False)
-        if degrees_.sum() > 0 or not result.sympy().is_zero:
+        if degrees_.sum() > 0 or np.any(np.not_equal(result[1], 0)):
           return result
     degrees = np.asarray(degrees)
 
@@ -453,7 +592,8 @@ def _sample_with_brackets(depth, variables, degrees, entropy, length,
     degrees_right = degrees - degrees_left
     left = sample_with_zero_check(degrees_left, entropy_left, length_left)
     right = sample_with_zero_check(degrees_right, entropy_right, length_right)
-    return ops.Mul(left, right)
+    return (ops.Mul(left[0], right[0]),
+            multiply_coefficients(left[1], right[1]))
 
 
 def sample_with_brackets(variables, degrees, entropy, length=None):
@@ -470,6 +610,18 @@ def sample_with_brackets(variables, degrees, entropy, length=None):
   Returns:
     Instance of `ops.Op` containing the polynomial.
   """
+  return sample_with_brackets_and_coefficients(
+      variables, degrees, entropy, length)[0]
+
+
+def sample_with_brackets_and_coefficients(
+    variables, degrees, entropy, length=None):
+  """As `sample_with_brackets`, but also returns the expanded coefficients.
+
+  Returns:
+    Pair `(expression, coefficients)`, where `coefficients` is an array of
+    shape `degrees + 1` holding the coefficients of the expanded `expression`.
+  """
   if isinstance(degrees, int):
     degrees = [degrees]
   if not isinstance(variables, (list, tuple)):
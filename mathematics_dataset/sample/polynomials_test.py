@@ -99,6 +99,71 @@ class ExpressionWithValueTest(tf.test.TestCase, parameterized.TestCase):
     actual = polynomials.add_coefficients(coeffs1, coeffs2)
     self.assertAllEqual(target, actual)
 
+  def testMultiplyCoefficients(self):
+    # Multiply (x + 2*y) and (3*x*y - 1).
+    coeffs1 = [[0, 2], [1, 0]]
+    coeffs2 = [[-1, 0], [0, 3]]
+    target = [[0, -2, 0], [-1, 0, 6], [0, 3, 0]]
+    actual = polynomials.multiply_coefficients(coeffs1, coeffs2)
+    self.assertAllEqual(target, actual)
+
+  def testComposeCoefficients(self):
+    x = sympy.Symbol('x')
+    outer = [1, -2, 3]
+    inner = [4, 0, 5]
+    composed = polynomials.compose_coefficients(outer, inner)
+    expected = (3*x**2 - 2*x + 1).subs(x, 5*x**2 + 4).expand()
+    self.assertEqual(polynomials.coefficients_to_sympy(composed, x), expected)
+
+  def testDegree(self):
+    coeffs = [[0, 0, 1], [2, 0, 0], [0, 0, 0]]
+    self.assertEqual(polynomials.degree(coeffs, 0), 1)
+    self.assertEqual(polynomials.degree(coeffs, 1), 2)
+    self.assertEqual(polynomials.degree([0, 0], 0), 0)
+
+  def testCoefficientsToSympy(self):
+    x, y = sympy.symbols('x y')
+    coeffs = [[5, 0, 3], [-1, sympy.Rational(2, 3), 0]]
+    self.assertEqual(
+        polynomials.coefficients_to_sympy(coeffs, [x, y]),
+        5 + 3*y**2 - x + sympy.Rational(2, 3)*x*y)
+    self.assertEqual(polynomials.coefficients_to_sympy([0], [x]), 0)
+
+  def testCoefficientsToString(self):
+    x, y, a = sympy.symbols('x y a')
+    self.assertEqual(polynomials.coefficients_to_string([], [x]), '0')
+    self.assertEqual(polynomials.coefficients_to_string([0, 0], [x]), '0')
+    self.assertEqual(
+        polynomials.coefficients_to_string([-3, 0, 1], [x]), 'x**2 - 3')
+    self.assertEqual(
+        polynomials.coefficients_to_string(
+            [sympy.Rational(-1, 2), -1, sympy.Rational(5, 3)], [x]),
+        '5*x**2/3 - x - 1/2')
+    self.assertEqual(
+        polynomials.coefficients_to_string([[0, 2], [-1, 0]], [x, a]),
+        '2*a - x')
+    self.assertEqual(
+        polynomials.coefficients_to_string([2, 0, -1], [x]), '2 - x**2')
+    self.assertEqual(
+        polynomials.coefficients_to_string([[2, 0], [0, -1]], [x, y]),
+        '-x*y + 2')
+
+  def testCoefficientsToString_matchesSympy(self):
+    x, y, a = sympy.symbols('x y a')
+    values = [0, 0, 1, -1, 2, -7, 12, sympy.Rational(1, 2),
+              sympy.Rational(-1, 3), sympy.Rational(22, 7),
+              sympy.Rational(-15, 4)]
+    for _ in range(1000):
+      num_variables = random.randint(1, 3)
+      variables = random.sample([x, y, a], num_variables)
+      shape = np.random.randint(1, 4, [num_variables])
+      coefficients = np.empty(shape, dtype=object)
+      for index in np.ndindex(*shape):
+        coefficients[index] = random.choice(values)
+      self.assertEqual(
+          polynomials.coefficients_to_string(coefficients, variables),
+          str(polynomials.coefficients_to_sympy(coefficients, variables)))
+
   def testCoefficientsLinearSplit(self):
     for degree in range(3):
       for ndims in range(3):
@@ -126,6 +191,18 @@ class ExpressionWithValueTest(tf.test.TestCase, parameterized.TestCase):
       self.assertEqual(poly.degree(x), degrees[0])
       self.assertEqual(poly.degree(y), degrees[1])
 
+  def testSampleWithBracketsAndCoefficients(self):
+    x, y = sympy.symbols('x y')
+    for _ in range(20):
+      degrees = np.random.randint(1, 4, [2])
+      entropy = random.uniform(0, 4)
+      polynomial, coefficients = (
+          polynomials.sample_with_brackets_and_coefficients(
+              variables=[x, y], degrees=degrees, entropy=entropy))
+      self.assertEqual(
+          sympy.sympify(polynomial).expand(),
+          polynomials.coefficients_to_sympy(coefficients, [x, y]))
+
   def testTrim(self):
     self.assertAllEqual(polynomials.trim([1]), [1])
     self.assertAllEqual(polynomials.trim([1, 0]), [1])
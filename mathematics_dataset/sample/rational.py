@@ -0,0 +1,253 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Integers and rationals as python `int`s and `fractions.Fraction`s.
+
+Arithmetic on sympy numbers is slow compared to the python types (each
+operation goes through sympy's dispatch and caching), which matters for the
+samplers that do many operations on small values, such as `sample/arithmetic`.
+This provides the number samplers of `sample/number` returning python values
+(from the same random choices, so they sample the same values), and conversions
+to and from sympy, so that values need only be converted to sympy when they are
+displayed in a question or answer.
+
+The batched samplers (`integers`, etc.) sample a value for each of an array of
+entropies, with the same distribution as the corresponding scalar sampler. At
+least `MIN_BATCH_SIZE` values are drawn together from `np.random`; fewer are
+drawn one at a time by the scalar sampler, which is faster for a handful of
+values (given the fixed overhead of the numpy calls).
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import fractions
+import math
+import numbers
+import random
+
+# Dependency imports
+from mathematics_dataset.util import factorization
+import numpy as np
+import six
+import sympy
+
+
+# Batches with fewer values than this are sampled one value at a time.
+MIN_BATCH_SIZE = 32
+
+# Batches with values this large are sampled one value at a time instead (so
+# that the batched arithmetic fits in int64).
+_MAX_BATCH_VALUE = 2**60
+
+# Batched values are sampled as `low + r % span`, for `r` uniform in
+# `[0, _RANDOM_RANGE)`; `r` is rejected if above the largest multiple of `span`,
+# so that the values are exactly uniform.
+_RANDOM_RANGE = 2**62
+
+
+try:
+  gcd = math.gcd
+except AttributeError:  # Python 2
+  def gcd(a, b):
+    """Returns the (non-negative) greatest common divisor of `a` and `b`."""
+    return abs(fractions.gcd(a, b))
+
+
+def is_integer(value):
+  """Returns whether the python int or `Fraction` `value` is an integer."""
+  return value.denominator == 1
+
+
+def numer(value):
+  """Returns the numerator of a python int or `Fraction`."""
+  return value.numerator
+
+
+def denom(value):
+  """Returns the denominator of a python int or `Fraction`."""
+  return value.denominator
+
+
+def from_sympy(value):
+  """Returns a python int or `Fraction` for a sympy (or python) rational."""
+  if isinstance(value, sympy.Integer):
+    return int(value)
+  if isinstance(value, sympy.Rational):
+    return fractions.Fraction(int(value.p), int(value.q))
+  if isinstance(value, numbers.Rational):
+    return value
+  raise ValueError('Unhandled value {} of type {}'.format(value, type(value)))
+
+
+def to_sympy(value):
+  """Returns `sympy.Integer` or `sympy.Rational` for a python int or rational."""
+  if isinstance(value, six.integer_types):
+    return sympy.Integer(value)
+  if isinstance(value, fractions.Fraction):
+    return sympy.Rational(value.numerator, value.denominator)
+  return sympy.sympify(value)
+
+
+def coprime_density(value):
+  """Returns float > 0; asymptotic density of integers coprime to `value`."""
+  factors = factorization.factorint(value)
+  density = 1.0
+  for prime in six.iterkeys(factors):
+    density *= 1 - 1 / prime
+  return density
+
+
+def integer(entropy, signed, min_abs=0, coprime_to=1):
+  """As `number.integer`, but returns a python int."""
+  assert isinstance(min_abs, int) and not isinstance(min_abs, bool)
+  coprime_to = abs(int(coprime_to))
+  assert min_abs >= 0
+
+  max_ = math.pow(10, entropy)
+  max_ += min_abs
+  if coprime_to >= 2:
+    max_ = max_ / coprime_density(coprime_to) + 1
+
+  if signed:
+    max_ = int(math.ceil(max_ / 2))
+    range_ = [-max_, max_]
+  else:
+    max_ = int(math.ceil(max_))
+    range_ = [min_abs, max_]
+
+  while True:
+    value = random.randint(*range_)
+    if abs(value) >= min_abs and gcd(value, coprime_to) == 1:
+      return value
+
+
+def non_integer_rational(entropy, signed):
+  """As `number.non_integer_rational`, but returns a `Fraction`."""
+  numer_entropy = random.uniform(0, entropy)
+  denom_entropy = entropy - numer_entropy
+  numer_ = integer(numer_entropy, signed, min_abs=1)
+  denom_ = integer(denom_entropy, False, min_abs=2, coprime_to=numer_)
+  return fractions.Fraction(numer_, denom_)
+
+
+def integer_or_rational(entropy, signed, min_abs=0):
+  """As `number.integer_or_rational`, but returns an int or `Fraction`."""
+  if random.choice([False, True]):
+    return integer(entropy, signed, min_abs=min_abs)
+  else:
+    return non_integer_rational(entropy, signed)
+
+
+def _integer_ranges(entropies, signed, min_abs, coprime_to):
+  """Returns float arrays `(low, high)` of the ranges sampled by `integer`."""
+  max_ = np.power(10.0, entropies) + min_abs
+  if any(value >= 2 for value in coprime_to):
+    densities = np.asarray([coprime_density(value) if value >= 2 else 1.0
+                            for value in coprime_to])
+    max_ = np.where(densities < 1, max_ / densities + 1, max_)
+  if signed:
+    high = np.ceil(max_ / 2)
+    return -high, high
+  return np.full(len(max_), float(min_abs)), np.ceil(max_)
+
+
+def integers(entropies, signed, min_abs=0, coprime_to=1):
+  """Returns list of ints, sampled as by `integer` for each entropy.
+
+  Args:
+    entropies: 1D array of floats >= 0.
+    signed: Boolean. Whether to also return negative numbers.
+    min_abs: Integer >= 0. The minimum absolute value.
+    coprime_to: Integer >= 1, or 1D array of them (of the same length as
+        `entropies`); each returned integer is coprime to the corresponding
+        entry.
+
+  Returns:
+    List of python ints, of the same length as `entropies`.
+  """
+  assert isinstance(min_abs, int) and not isinstance(min_abs, bool)
+  assert min_abs >= 0
+  entropies = np.asarray(entropies, dtype=np.float64)
+  count = len(entropies)
+  if count == 0:
+    return []
+  if isinstance(coprime_to, six.integer_types + (sympy.Integer,)):
+    coprime_to = [abs(int(coprime_to))] * count
+  else:
+    coprime_to = [abs(int(value)) for value in coprime_to]
+
+  if count < MIN_BATCH_SIZE:
+    return [integer(entropy, signed, min_abs=min_abs, coprime_to=coprime)
+            for entropy, coprime in zip(entropies, coprime_to)]
+  low, high = _integer_ranges(entropies, signed, min_abs, coprime_to)
+  if high.max() >= _MAX_BATCH_VALUE or max(coprime_to) >= _MAX_BATCH_VALUE:
+    return [integer(entropy, signed, min_abs=min_abs, coprime_to=coprime)
+            for entropy, coprime in zip(entropies, coprime_to)]
+
+  low = low.astype(np.int64)
+  span = high.astype(np.int64) - low + 1
+  limit = (_RANDOM_RANGE // span) * span
+  check_coprime = max(coprime_to) >= 2
+  coprime_to = np.asarray(coprime_to, dtype=np.int64)
+  values = np.zeros(count, dtype=np.int64)
+  pending = np.arange(count)
+  while pending.size:
+    # Resample any values rejected (as for `integer`) until all are accepted.
+    random_ = np.random.randint(_RANDOM_RANGE, size=pending.size,
+                                dtype=np.int64)
+    sampled = low[pending] + random_ % span[pending]
+    accepted = random_ < limit[pending]
+    if min_abs > 0:
+      accepted &= np.abs(sampled) >= min_abs
+    if check_coprime:
+      accepted &= np.gcd(sampled, coprime_to[pending]) == 1
+    values[pending[accepted]] = sampled[accepted]
+    pending = pending[~accepted]
+  return values.tolist()
+
+
+def non_integer_rationals(entropies, signed):
+  """Returns list of `Fraction`s, as by `non_integer_rational` per entropy."""
+  entropies = np.asarray(entropies, dtype=np.float64)
+  if len(entropies) < MIN_BATCH_SIZE:
+    return [non_integer_rational(entropy, signed) for entropy in entropies]
+  numer_entropies = np.random.uniform(0, entropies)
+  denom_entropies = entropies - numer_entropies
+  numers = integers(numer_entropies, signed, min_abs=1)
+  denoms = integers(denom_entropies, False, min_abs=2, coprime_to=numers)
+  return [fractions.Fraction(numer_, denom_)
+          for numer_, denom_ in zip(numers, denoms)]
+
+
+def integers_or_rationals(entropies, signed, min_abs=0):
+  """Returns list, sampled as by `integer_or_rational` for each entropy."""
+  entropies = np.asarray(entropies, dtype=np.float64)
+  if len(entropies) < MIN_BATCH_SIZE:
+    return [integer_or_rational(entropy, signed, min_abs=min_abs)
+            for entropy in entropies]
+  is_integer_ = np.random.randint(2, size=len(entropies)).astype(bool)
+  values = [None] * len(entropies)
+  integer_indices = np.flatnonzero(is_integer_)
+  rational_indices = np.flatnonzero(~is_integer_)
+  for i, value in zip(
+      integer_indices,
+      integers(entropies[integer_indices], signed, min_abs=min_abs)):
+    values[i] = value
+  for i, value in zip(
+      rational_indices,
+      non_integer_rationals(entropies[rational_indices], signed)):
+    values[i] = value
+  return values
@@ -0,0 +1,133 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.sample.rational."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import fractions
+import random
+
+# Dependency imports
+from absl.testing import absltest
+from absl.testing import parameterized
+from mathematics_dataset.sample import number
+from mathematics_dataset.sample import rational
+import numpy as np
+from six.moves import range
+import sympy
+
+
+class RationalTest(parameterized.TestCase):
+
+  def testCoprimeDensity(self):
+    self.assertEqual(rational.coprime_density(1), 1.0)
+    self.assertEqual(rational.coprime_density(2), 0.5)
+    self.assertLess(abs(rational.coprime_density(3) - 2/3), 1e-6)
+    self.assertLess(abs(rational.coprime_density(6) - 1/3), 1e-6)
+
+  def testGcd(self):
+    self.assertEqual(rational.gcd(12, 18), 6)
+    self.assertEqual(rational.gcd(-12, 18), 6)
+    self.assertEqual(rational.gcd(0, 5), 5)
+    self.assertEqual(rational.gcd(0, 1), 1)
+
+  @parameterized.parameters(0, 1, 2, 3)
+  def testSympyRoundTrip(self, seed):
+    random.seed(seed)
+    for _ in range(100):
+      value = rational.integer_or_rational(4, signed=True)
+      sympy_value = rational.to_sympy(value)
+      self.assertIsInstance(sympy_value, sympy.Rational)
+      self.assertEqual(sympy_value, value)
+      self.assertEqual(str(sympy_value), str(value))
+      round_trip = rational.from_sympy(sympy_value)
+      self.assertEqual(round_trip, value)
+      self.assertEqual(type(round_trip), type(value))
+
+  def testFromSympyInvalid(self):
+    with self.assertRaises(ValueError):
+      rational.from_sympy(sympy.sqrt(2))
+
+  def testIsInteger(self):
+    self.assertTrue(rational.is_integer(3))
+    self.assertTrue(rational.is_integer(fractions.Fraction(6, 2)))
+    self.assertFalse(rational.is_integer(fractions.Fraction(1, 2)))
+    self.assertEqual(rational.numer(fractions.Fraction(-6, 4)), -3)
+    self.assertEqual(rational.denom(fractions.Fraction(-6, 4)), 2)
+
+  @parameterized.parameters(
+      ('integer', (3, True)),
+      ('integer', (5, False, 2, 6)),
+      ('non_integer_rational', (4, True)),
+      ('integer_or_rational', (4, True)),
+  )
+  def testSameAsNumber(self, name, args):
+    """Samples the same values (from the same random state) as `number`."""
+    for seed in range(20):
+      random.seed(seed)
+      expected = getattr(number, name)(*args)
+      random.seed(seed)
+      self.assertEqual(getattr(rational, name)(*args), expected)
+
+  @parameterized.parameters(1, rational.MIN_BATCH_SIZE, 1000)
+  def testIntegers(self, count):
+    entropies = np.random.uniform(0, 4, size=count)
+    values = rational.integers(entropies, signed=False, min_abs=2,
+                               coprime_to=6)
+    self.assertLen(values, count)
+    for value in values:
+      self.assertIsInstance(value, int)
+      self.assertGreaterEqual(value, 2)
+      self.assertEqual(rational.gcd(value, 6), 1)
+
+  def testIntegersDistribution(self):
+    """Batched values have the same distribution as from `integer`."""
+    count = 20000
+    batched = collections.Counter(rational.integers([1] * count, signed=True))
+    scalar = collections.Counter(
+        rational.integer(1, signed=True) for _ in range(count))
+    self.assertEqual(set(batched), set(range(-5, 6)))
+    for value in range(-5, 6):
+      self.assertLess(abs(batched[value] - scalar[value]) / count, 0.02)
+
+  def testIntegersLarge(self):
+    # Too large for int64, so sampled one value at a time.
+    values = rational.integers([30] * rational.MIN_BATCH_SIZE, signed=True)
+    self.assertGreater(max(abs(value) for value in values), 2**64)
+
+  def testIntegersCoprimeToArray(self):
+    numers = list(range(1, 101))
+    values = rational.integers(np.full(100, 2.0), False, min_abs=2,
+                               coprime_to=numers)
+    for numer_, value in zip(numers, values):
+      self.assertEqual(rational.gcd(numer_, value), 1)
+
+  def testNonIntegerRationals(self):
+    values = rational.non_integer_rationals(np.full(100, 3.0), signed=True)
+    for value in values:
+      self.assertIsInstance(value, fractions.Fraction)
+      self.assertNotEqual(value.denominator, 1)
+
+  def testIntegersOrRationals(self):
+    values = rational.integers_or_rationals(np.full(200, 3.0), signed=True)
+    self.assertTrue(any(rational.is_integer(value) for value in values))
+    self.assertFalse(all(rational.is_integer(value) for value in values))
+
+
+if __name__ == '__main__':
+  absltest.main()
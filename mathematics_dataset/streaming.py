@@ -0,0 +1,184 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lazily generates questions from many modules, e.g., to feed a training loop.
+
+Example usage:
+
+```
+for record in mathematics_dataset.stream(
+    regimes=['train'], filter_='algebra', seed=1):
+  print(record.module, record.question, record.answer)
+```
+
+Nothing is written to disk, and memory use does not grow with the number of
+examples generated. Each module samples from its own random stream (derived from
+`seed`), so the examples of a module do not depend on how the modules are
+interleaved, nor on which other modules are included.
+
+Passing a `dedup.Deduplicator` checks each question for duplicates (within its
+module) and for leaks (test questions also generated for training), counting
+them per module; with `drop_duplicates=True`, such records are not yielded.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import itertools
+import random
+
+# Dependency imports
+from mathematics_dataset import generation
+from mathematics_dataset.util import seeding
+from six.moves import range
+
+
+INTERLEAVE_RANDOM = 'random'
+INTERLEAVE_ROUND_ROBIN = 'round_robin'
+INTERLEAVE_SEQUENTIAL = 'sequential'
+
+_INTERLEAVE_MODES = (
+    INTERLEAVE_RANDOM, INTERLEAVE_ROUND_ROBIN, INTERLEAVE_SEQUENTIAL)
+
+
+class Record(collections.namedtuple(
+    'Record', ('regime', 'module', 'question', 'answer'))):
+  """A generated question and answer (as strings), with where it came from."""
+
+
+class _ModuleStream(object):
+  """Samples problems from one module in one regime, with its own seed."""
+
+  def __init__(self, generator, regime, module_name):
+    self.regime = regime
+    self.module_name = module_name
+    self._generator = generator
+
+  def sample(self):
+    problem, _ = self._generator.sample(self.regime, self.module_name)
+    return Record(
+        regime=self.regime, module=self.module_name,
+        question=str(problem.question), answer=str(problem.answer))
+
+
+def _module_streams(regimes, filter_, seed, train_split):
+  """Returns list of `_ModuleStream`s for the given regimes and filter."""
+  generator = generation.Generator(generation.GenerationConfig(
+      filter_=filter_, train_split=train_split, seed=seed))
+  if regimes is None:
+    regimes = generator.regimes()
+  else:
+    regimes = list(regimes)
+    for regime in regimes:
+      if regime not in generator.regimes():
+        raise ValueError('Unknown regime {}; expected one of {}'.format(
+            regime, generator.regimes()))
+
+  streams = []
+  for regime in regimes:
+    for module_name in generator.modules[regime]:
+      streams.append(_ModuleStream(generator, regime, module_name))
+  if not streams:
+    raise ValueError('No modules match regimes={} and filter_={!r}'.format(
+        regimes, filter_))
+  return streams
+
+
+def stream(regimes=None, filter_='', seed=None, train_split=False,
+           interleave=INTERLEAVE_RANDOM, per_module=None, deduplicator=None,
+           drop_duplicates=False):
+  """Yields generated questions and answers from many modules.
+
+  Args:
+    regimes: Iterable of regime names (e.g., `['train', 'interpolate']`), or
+        None for all regimes.
+    filter_: Only modules whose name contains this string are included.
+    seed: Integer seed, for reproducible streams; or None.
+    train_split: Whether to use the training regimes `train-easy`,
+        `train-medium` and `train-hard`, rather than a single `train` regime.
+    interleave: How to order the records from the different modules. One of
+        `'random'` (each record is from a module chosen uniformly at random
+        from those not yet exhausted), `'round_robin'` (one record from each
+        module in turn), or `'sequential'` (all the records of one module before
+        the next; requires `per_module`).
+    per_module: Number of records to generate from each module, or None to
+        keep generating indefinitely.
+    deduplicator: Optional `dedup.Deduplicator` to check each record with.
+    drop_duplicates: Whether to skip the records that `deduplicator` finds are
+        duplicates or leaked. These still count towards `per_module`, so fewer
+        than `per_module` records may be yielded from a module.
+
+  Yields:
+    Instances of `Record`, i.e., tuples `(regime, module, question, answer)`.
+
+  Raises:
+    ValueError: If the arguments are invalid, or no modules match.
+  """
+  if interleave not in _INTERLEAVE_MODES:
+    raise ValueError('Unknown interleave {}; expected one of {}'.format(
+        interleave, _INTERLEAVE_MODES))
+  if interleave == INTERLEAVE_SEQUENTIAL and per_module is None:
+    raise ValueError('Sequential interleaving requires per_module')
+  if per_module is not None and per_module < 0:
+    raise ValueError('per_module must be >= 0, got {}'.format(per_module))
+  if drop_duplicates and deduplicator is None:
+    raise ValueError('drop_duplicates requires a deduplicator')
+
+  streams = _module_streams(regimes, filter_, seed, train_split)
+  records = _interleaved(streams, seed, interleave, per_module)
+  if deduplicator is None:
+    for record in records:
+      yield record
+    return
+  for record in records:
+    duplicate, leaked = deduplicator.check(
+        record.regime, record.module, [record.question])
+    if drop_duplicates and (duplicate[0] or leaked[0]):
+      continue
+    yield record
+
+
+def _interleaved(streams, seed, interleave, per_module):
+  """Yields the records of the `_ModuleStream`s, as described in `stream`."""
+  if interleave == INTERLEAVE_SEQUENTIAL:
+    for module_stream in streams:
+      for _ in range(per_module):
+        yield module_stream.sample()
+    return
+
+  if interleave == INTERLEAVE_ROUND_ROBIN:
+    counts = itertools.count() if per_module is None else range(per_module)
+    for _ in counts:
+      for module_stream in streams:
+        yield module_stream.sample()
+    return
+
+  # Random interleaving, with the choice of module drawn from its own stream.
+  if seed is None:
+    chooser = random.Random(seeding.random_seed())
+  else:
+    chooser = random.Random(seeding.derive_seed(seed, 'interleave'))
+  remaining = [per_module] * len(streams)
+  active = [index for index in range(len(streams))
+            if per_module is None or remaining[index] > 0]
+  while active:
+    position = chooser.randrange(len(active))
+    index = active[position]
+    yield streams[index].sample()
+    if per_module is not None:
+      remaining[index] -= 1
+      if remaining[index] == 0:
+        active.pop(position)
@@ -0,0 +1,102 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.streaming."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import itertools
+import shutil
+import tempfile
+
+# Dependency imports
+from absl.testing import absltest
+from absl.testing import parameterized
+from mathematics_dataset import dedup
+from mathematics_dataset import generate_settings
+from mathematics_dataset import streaming
+
+
+class StreamTest(parameterized.TestCase):
+
+  @parameterized.parameters('random', 'round_robin', 'sequential')
+  def testCounts(self, interleave):
+    records = list(streaming.stream(
+        regimes=['train', 'interpolate'], filter_='numbers__gcd', seed=1,
+        interleave=interleave, per_module=3))
+    self.assertLen(records, 12)
+    counts = {}
+    for record in records:
+      self.assertIn(record.regime, ('train', 'interpolate'))
+      self.assertIn('numbers__gcd', record.module)
+      self.assertLessEqual(
+          len(record.question), generate_settings.MAX_QUESTION_LENGTH)
+      self.assertLessEqual(
+          len(record.answer), generate_settings.MAX_ANSWER_LENGTH)
+      key = (record.regime, record.module)
+      counts[key] = counts.get(key, 0) + 1
+    self.assertEqual(set(counts.values()), {3})
+
+  @parameterized.parameters('random', 'round_robin', 'sequential')
+  def testNoneFromEachModule(self, interleave):
+    records = streaming.stream(
+        regimes=['interpolate'], filter_='numbers__gcd', seed=1,
+        interleave=interleave, per_module=0)
+    self.assertEmpty(list(itertools.islice(records, 5)))
+
+  def testModulesIndependentOfInterleaving(self):
+    def by_module(interleave):
+      records = streaming.stream(
+          filter_='numbers__gcd', seed=2, interleave=interleave, per_module=4)
+      return sorted(records)
+    self.assertEqual(by_module('random'), by_module('round_robin'))
+    self.assertEqual(by_module('random'), by_module('sequential'))
+
+  def testUnbounded(self):
+    records = list(itertools.islice(
+        streaming.stream(regimes=['train'], filter_='numbers__gcd'), 20))
+    self.assertLen(records, 20)
+
+  def testDeduplicate(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    deduplicator = dedup.Deduplicator(directory, expected_size=100)
+    records = list(streaming.stream(
+        regimes=['train'], filter_='numbers__gcd', seed=1,
+        interleave='sequential', per_module=5, deduplicator=deduplicator,
+        drop_duplicates=True))
+    self.assertNotEmpty(records)
+    stats = deduplicator.stats()
+    self.assertEqual(sum(module_stats['examples']
+                         for module_stats in stats.values()), 10)
+    self.assertLen(records, 10 - sum(module_stats['duplicates']
+                                     for module_stats in stats.values()))
+
+  def testInvalidArguments(self):
+    with self.assertRaises(ValueError):
+      next(streaming.stream(regimes=['nonexistent']))
+    with self.assertRaises(ValueError):
+      next(streaming.stream(filter_='nonexistent'))
+    with self.assertRaises(ValueError):
+      next(streaming.stream(interleave='sequential'))
+    with self.assertRaises(ValueError):
+      next(streaming.stream(drop_duplicates=True))
+    with self.assertRaises(ValueError):
+      next(streaming.stream(per_module=-1))
+
+
+if __name__ == '__main__':
+  absltest.main()
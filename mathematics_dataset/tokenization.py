@@ -0,0 +1,164 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Converts questions and answers to and from fixed-width arrays of indices.
+
+Characters are mapped to indices via `generate_settings.CHAR_TO_INDEX`, and each
+question (answer) is padded with `generate_settings.EMPTY_INDEX` to
+`MAX_QUESTION_LENGTH` (`MAX_ANSWER_LENGTH`). A set of examples is stored as a
+`.npy` file of records with dtype `EXAMPLE_DTYPE`:
+
+*   `question`: uint8 array of shape `[MAX_QUESTION_LENGTH]`;
+*   `answer`: uint8 array of shape `[MAX_ANSWER_LENGTH]`;
+*   `question_length`, `answer_length`: the unpadded lengths.
+
+Since every record has the same size, example `i` is at a fixed offset in the
+file, so the file can be memory-mapped and sliced into batches without any
+parsing, e.g.:
+
+```
+examples = tokenization.load(path)
+batch = examples[1000:1032]
+questions = batch['question']  # uint8 array of shape [32, 160]
+```
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from mathematics_dataset import generate_settings
+import numpy as np
+import six
+
+
+EXAMPLE_DTYPE = np.dtype([
+    ('question', np.uint8, (generate_settings.MAX_QUESTION_LENGTH,)),
+    ('answer', np.uint8, (generate_settings.MAX_ANSWER_LENGTH,)),
+    ('question_length', np.uint8),
+    ('answer_length', np.uint8),
+])
+
+# Indices are stored as uint8.
+assert generate_settings.NUM_INDICES <= 256
+assert generate_settings.MAX_QUESTION_LENGTH <= 255
+
+
+# Lookup table from byte value to index, with -1 for unknown characters.
+_BYTE_TO_INDEX = np.full(256, -1, dtype=np.int16)
+for _char, _index in six.iteritems(generate_settings.CHAR_TO_INDEX):
+  if _char:
+    _BYTE_TO_INDEX[ord(_char)] = _index
+
+# Lookup table from index to byte value (with padding mapped to 0).
+_INDEX_TO_BYTE = np.zeros(generate_settings.NUM_INDICES, dtype=np.uint8)
+for _index, _char in six.iteritems(generate_settings.INDEX_TO_CHAR):
+  if _char:
+    _INDEX_TO_BYTE[_index] = ord(_char)
+
+
+def encode(text, max_length):
+  """Returns `text` as a uint8 array of indices, padded to `max_length`.
+
+  Args:
+    text: String, containing only characters in
+        `generate_settings.QUESTION_CHARS`.
+    max_length: Length of the returned array.
+
+  Returns:
+    uint8 numpy array of shape `[max_length]`.
+
+  Raises:
+    ValueError: If `text` is longer than `max_length` or contains characters not
+        in the vocabulary.
+  """
+  if len(text) > max_length:
+    raise ValueError('Text of length {} exceeds {}: {!r}'.format(
+        len(text), max_length, text))
+  try:
+    bytes_ = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+  except UnicodeEncodeError:
+    raise ValueError('Text contains non-ASCII characters: {!r}'.format(text))
+  indices = _BYTE_TO_INDEX[bytes_]
+  if np.any(indices < 0):
+    raise ValueError('Text contains characters not in vocabulary: {!r}'
+                     .format(text))
+  encoded = np.full(max_length, generate_settings.EMPTY_INDEX, dtype=np.uint8)
+  encoded[:len(indices)] = indices
+  return encoded
+
+
+def decode(indices):
+  """Returns the string for a (possibly padded) array of indices."""
+  indices = np.asarray(indices)
+  indices = indices[indices != generate_settings.EMPTY_INDEX]
+  return _INDEX_TO_BYTE[indices].tobytes().decode('ascii')
+
+
+def encode_example(question, answer):
+  """Returns a record of dtype `EXAMPLE_DTYPE` for the question and answer."""
+  example = np.zeros((), dtype=EXAMPLE_DTYPE)
+  example['question'] = encode(question, generate_settings.MAX_QUESTION_LENGTH)
+  example['answer'] = encode(answer, generate_settings.MAX_ANSWER_LENGTH)
+  example['question_length'] = len(question)
+  example['answer_length'] = len(answer)
+  return example
+
+
+def decode_example(example):
+  """Returns pair `(question, answer)` of strings for a single record."""
+  question = example['question'][:example['question_length']]
+  answer = example['answer'][:example['answer_length']]
+  return decode(question), decode(answer)
+
+
+def load(path):
+  """Returns the examples in the `.npy` file at `path`, memory-mapped."""
+  examples = np.load(path, mmap_mode='r')
+  if examples.dtype != EXAMPLE_DTYPE:
+    raise ValueError('{} has dtype {}, expected {}'.format(
+        path, examples.dtype, EXAMPLE_DTYPE))
+  return examples
+
+
+def save(path, examples):
+  """Writes the array `examples` of dtype `EXAMPLE_DTYPE` to `path`."""
+  # Written via a file object, since `np.save` would otherwise add an extension.
+  with open(path, 'wb') as file_:
+    np.save(file_, examples)
+
+
+def concatenate(paths, output_path):
+  """Writes the concatenation of the examples in `paths` to `output_path`.
+
+  The examples are copied via memory maps, so need not fit in memory.
+
+  Args:
+    paths: List of paths to `.npy` files of examples.
+    output_path: Path to write to.
+  """
+  inputs = [load(path) for path in paths]
+  total = sum(len(examples) for examples in inputs)
+  if total == 0:
+    save(output_path, np.zeros(0, dtype=EXAMPLE_DTYPE))
+    return
+  output = np.lib.format.open_memmap(
+      output_path, mode='w+', dtype=EXAMPLE_DTYPE, shape=(total,))
+  start = 0
+  for examples in inputs:
+    output[start:start + len(examples)] = examples
+    start += len(examples)
+  output.flush()
+  del output
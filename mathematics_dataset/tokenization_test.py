@@ -0,0 +1,75 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.tokenization."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+
+# Dependency imports
+from absl.testing import absltest
+from mathematics_dataset import generate_settings
+from mathematics_dataset import tokenization
+import numpy as np
+
+
+class TokenizationTest(absltest.TestCase):
+
+  def testEncodeDecode(self):
+    text = 'Let x = 2*(3 + -4). What is x?'
+    encoded = tokenization.encode(text, 40)
+    self.assertEqual(encoded.dtype, np.uint8)
+    self.assertEqual(encoded.shape, (40,))
+    self.assertEqual(encoded[0], generate_settings.CHAR_TO_INDEX['L'])
+    self.assertTrue(
+        np.all(encoded[len(text):] == generate_settings.EMPTY_INDEX))
+    self.assertEqual(tokenization.decode(encoded), text)
+
+  def testEncodeInvalid(self):
+    with self.assertRaises(ValueError):
+      tokenization.encode('too long', 3)
+    with self.assertRaises(ValueError):
+      tokenization.encode(u'é', 3)
+    with self.assertRaises(ValueError):
+      tokenization.encode('\n', 3)
+
+  def testSaveLoadConcatenate(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    pairs = [('What is 1 + 1?', '2'), ('Is 7 prime?', 'True'), ('Q', 'A')]
+    paths = []
+    for i, pairs_ in enumerate([pairs[:2], pairs[2:]]):
+      examples = np.zeros(len(pairs_), dtype=tokenization.EXAMPLE_DTYPE)
+      for j, (question, answer) in enumerate(pairs_):
+        examples[j] = tokenization.encode_example(question, answer)
+      paths.append(os.path.join(directory, 'shard{}.npy.tmp'.format(i)))
+      tokenization.save(paths[-1], examples)
+
+    output_path = os.path.join(directory, 'all.npy')
+    tokenization.concatenate(paths, output_path)
+    loaded = tokenization.load(output_path)
+    self.assertIsInstance(loaded, np.memmap)
+    self.assertEqual(loaded['question'].shape,
+                     (3, generate_settings.MAX_QUESTION_LENGTH))
+    self.assertEqual(
+        [tokenization.decode_example(example) for example in loaded], pairs)
+
+
+if __name__ == '__main__':
+  absltest.main()
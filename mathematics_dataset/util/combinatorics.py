@@ -12,7 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Combinatorics utility functions."""
+"""Combinatorics utility functions.
+
+The exact combinatorial quantities (`factorial`, `binomial`, `multinomial`) and
+`log_number_binary_trees` are looked up in tables, which are precomputed up to
+`TABLE_SIZE` (covering the sizes used by the modules) and extended as needed.
+"""
 
 from __future__ import absolute_import
 from __future__ import division
@@ -26,6 +31,10 @@ from six.moves import range
 from six.moves import zip
 
 
+# Size up to which the tables are precomputed.
+TABLE_SIZE = 64
+
+
 def uniform_positive_integers_with_sum(count, sum_):
   """Returns list of size `count` of integers >= 1, summing to `sum_`."""
   assert sum_ >= 0
@@ -35,7 +44,7 @@ def uniform_positive_integers_with_sum(count, sum_):
   if count == 0:
     return []
   # Select `count - 1` numbers from {1, ..., sum_ - 1}
-  separators = random.sample(list(range(1, sum_)), count - 1)
+  separators = random.sample(range(1, sum_), count - 1)
   separators = sorted(separators)
   return [right - left
           for left, right in zip([0] + separators, separators + [sum_])]
@@ -47,12 +56,81 @@ def uniform_non_negative_integers_with_sum(count, sum_):
   return [i - 1 for i in positive]
 
 
-def log_number_binary_trees(size):
+def partitions(sum_, count, min_part=1):
+  """Yields each non-decreasing list of `count` integers summing to `sum_`.
+
+  Args:
+    sum_: Integer >= 0.
+    count: Integer >= 0; the number of parts.
+    min_part: Integer; the minimum value of the parts.
+
+  Yields:
+    Lists of integers >= `min_part`, in lexicographic order.
+  """
+  if count == 0:
+    if sum_ == 0:
+      yield []
+    return
+  # The first part is the smallest, so is at most the average.
+  for first in range(min_part, sum_ // count + 1):
+    for rest in partitions(sum_ - first, count - 1, min_part=first):
+      yield [first] + rest
+
+
+def _log_number_binary_trees(size):
   """Returns (nat) log of number of binary trees with `size` internal nodes."""
   # This is equal to log of C_size, where C_n is the nth Catalan number.
-  assert isinstance(size, int)
-  assert size >= 0
   log = 0.0
   for k in range(2, size + 1):
     log += math.log(size + k) - math.log(k)
   return log
+
+
+# `_FACTORIALS[n]` is n!, and `_LOG_NUMBER_BINARY_TREES[n]` is
+# `_log_number_binary_trees(n)`.
+_FACTORIALS = [1]
+_LOG_NUMBER_BINARY_TREES = []
+
+
+def _extend_tables(size):
+  """Extends the tables to include entries for values up to `size`."""
+  while len(_FACTORIALS) <= size:
+    _FACTORIALS.append(_FACTORIALS[-1] * len(_FACTORIALS))
+  while len(_LOG_NUMBER_BINARY_TREES) <= size:
+    _LOG_NUMBER_BINARY_TREES.append(
+        _log_number_binary_trees(len(_LOG_NUMBER_BINARY_TREES)))
+
+
+_extend_tables(TABLE_SIZE)
+
+
+def factorial(n):
+  """Returns n! (as a python int) for integer `n >= 0`."""
+  assert n >= 0
+  if n >= len(_FACTORIALS):
+    _extend_tables(n)
+  return _FACTORIALS[n]
+
+
+def binomial(n, k):
+  """Returns `n` choose `k` (as a python int); 0 if `k < 0` or `k > n`."""
+  if k < 0 or k > n:
+    return 0
+  return factorial(n) // (factorial(k) * factorial(n - k))
+
+
+def multinomial(counts):
+  """Returns the multinomial coefficient `sum(counts)! / prod(counts[i]!)`."""
+  result = factorial(sum(counts))
+  for count in counts:
+    result //= factorial(count)
+  return result
+
+
+def log_number_binary_trees(size):
+  """Returns (nat) log of number of binary trees with `size` internal nodes."""
+  assert isinstance(size, int)
+  assert size >= 0
+  if size >= len(_LOG_NUMBER_BINARY_TREES):
+    _extend_tables(size)
+  return _LOG_NUMBER_BINARY_TREES[size]
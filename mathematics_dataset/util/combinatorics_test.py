@@ -58,6 +58,39 @@ class CombinatoricsTest(absltest.TestCase):
         combinatorics.log_number_binary_trees(3), math.log(5))
     self.assertAlmostEqual(
         combinatorics.log_number_binary_trees(4), math.log(14))
+    # Beyond the precomputed table.
+    size = combinatorics.TABLE_SIZE + 10
+    self.assertEqual(
+        combinatorics.log_number_binary_trees(size),
+        combinatorics._log_number_binary_trees(size))
+
+  def testFactorial(self):
+    self.assertEqual(combinatorics.factorial(0), 1)
+    self.assertEqual(combinatorics.factorial(5), 120)
+    size = combinatorics.TABLE_SIZE + 10
+    self.assertEqual(combinatorics.factorial(size), math.factorial(size))
+
+  def testBinomial(self):
+    self.assertEqual(combinatorics.binomial(5, 0), 1)
+    self.assertEqual(combinatorics.binomial(5, 2), 10)
+    self.assertEqual(combinatorics.binomial(5, 5), 1)
+    self.assertEqual(combinatorics.binomial(5, 6), 0)
+    self.assertEqual(combinatorics.binomial(5, -1), 0)
+
+  def testMultinomial(self):
+    self.assertEqual(combinatorics.multinomial([]), 1)
+    self.assertEqual(combinatorics.multinomial([3]), 1)
+    self.assertEqual(combinatorics.multinomial([2, 3]), 10)
+    self.assertEqual(combinatorics.multinomial([1, 2, 3]), 60)
+
+  def testPartitions(self):
+    self.assertEqual(list(combinatorics.partitions(0, 0)), [[]])
+    self.assertEqual(list(combinatorics.partitions(3, 0)), [])
+    self.assertEqual(list(combinatorics.partitions(2, 3)), [])
+    self.assertEqual(list(combinatorics.partitions(6, 3)),
+                     [[1, 1, 4], [1, 2, 3], [2, 2, 2]])
+    # Number of partitions of 20 into 4 parts.
+    self.assertLen(list(combinatorics.partitions(20, 4)), 64)
 
 
 if __name__ == '__main__':
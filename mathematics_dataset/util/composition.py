@@ -19,6 +19,7 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import contextlib
 import random
 import string
 
@@ -47,6 +48,8 @@ class Polynomial(collections.namedtuple('Polynomial', ('coefficients'))):
     coefficients: Numpy array of coefficients; see `polynomials.py`.
   """
 
+  __slots__ = ()
+
   def __new__(cls, coefficients):
     coefficients = np.asarray(coefficients)
     return super(Polynomial, cls).__new__(cls, coefficients)
@@ -63,11 +66,54 @@ def is_integer_polynomial(value):
   return all(number.is_integer(coeff) for coeff in coefficients)
 
 
+# Classes of values, as returned by `_value_class`.
+_INTEGER = 'integer'
+_RATIONAL = 'rational'
+_DECIMAL = 'decimal'
+_POLYNOMIAL = 'polynomial'
+_INTEGER_POLYNOMIAL = 'integer_polynomial'
+_OTHER = 'other'
+
+
+def _value_class(value):
+  """Returns the class of `value`, which determines the filters it passes."""
+  if number.is_integer(value):
+    return _INTEGER
+  if isinstance(value, sympy.Rational):
+    return _RATIONAL
+  if isinstance(value, display.Decimal):
+    return _DECIMAL
+  if is_polynomial(value):
+    return _INTEGER_POLYNOMIAL if is_integer_polynomial(value) else _POLYNOMIAL
+  return _OTHER
+
+
+# Map from module filter to a function that, given a value class, returns
+# whether the filter passes for all values of that class, or `None` if it
+# depends on the value. Other filters are called for each value.
+_FILTERS_BY_CLASS = {
+    number.is_integer: lambda class_: class_ == _INTEGER,
+    number.is_positive_integer:
+        lambda class_: None if class_ == _INTEGER else False,
+    number.is_integer_or_rational:
+        lambda class_: class_ in (_INTEGER, _RATIONAL),
+    number.is_integer_or_rational_or_decimal:
+        lambda class_: class_ in (_INTEGER, _RATIONAL, _DECIMAL),
+    is_polynomial: lambda class_: class_ in (_POLYNOMIAL, _INTEGER_POLYNOMIAL),
+    is_integer_polynomial: lambda class_: class_ == _INTEGER_POLYNOMIAL,
+}
+
+
 # List of pairs of `(filter, sampler)`, where `filter` is a function returning
 # True if the sampler is valid for the given value, and `sampler` returns an
 # `Entity`.
 _FILTERS_AND_SAMPLERS = []
 
+# Map from value class to the pairs `(filter, sampler)` of
+# `_FILTERS_AND_SAMPLERS` that may be valid for values of that class, in the
+# same order; `filter` is `None` if the sampler is valid for all of them.
+_CANDIDATES = {}
+
 
 def module(filter_):
   """Returns a Decorator for a module function.
@@ -83,14 +129,98 @@ def module(filter_):
   def decorator(module_fn):
     """Decorates a module function."""
     _FILTERS_AND_SAMPLERS.append((filter_, module_fn))
+    _CANDIDATES.clear()
     return module_fn
   return decorator
 
 
+def _candidates(value_class):
+  """Returns list of pairs `(filter, sampler)` for the value class."""
+  candidates = _CANDIDATES.get(value_class)
+  if candidates is None:
+    candidates = []
+    for filter_, sampler in _FILTERS_AND_SAMPLERS:
+      passes = (_FILTERS_BY_CLASS[filter_](value_class)
+                if filter_ in _FILTERS_BY_CLASS else None)
+      if passes is None:
+        candidates.append((filter_, sampler))
+      elif passes:
+        candidates.append((None, sampler))
+    _CANDIDATES[value_class] = candidates
+  return candidates
+
+
+class TooLongError(Exception):
+  """Raised to abandon a sample whose question or answer will be too long."""
+
+
+# Stack of pairs `(max_question_length, max_answer_length)`; see
+# `length_limits`.
+_LENGTH_LIMITS = []
+
+
+@contextlib.contextmanager
+def length_limits(max_question_length, max_answer_length):
+  """Context manager for abandoning samples that will be too long.
+
+  Within this context, `check_question_length` and `check_answer_length` raise
+  `TooLongError` as soon as a lower bound on the length of the question or
+  answer being sampled exceeds the given limits. This allows samples that would
+  be rejected anyway to be abandoned before the (often expensive) rendering of
+  the question or answer. Outside this context, the checks do nothing.
+
+  Args:
+    max_question_length: Maximum length of the question, or None.
+    max_answer_length: Maximum length of the answer, or None.
+
+  Yields:
+    Nothing.
+  """
+  _LENGTH_LIMITS.append((max_question_length, max_answer_length))
+  try:
+    yield
+  finally:
+    _LENGTH_LIMITS.pop()
+
+
+def check_question_length(min_length):
+  """Raises `TooLongError` if the question will be longer than allowed.
+
+  Args:
+    min_length: Lower bound on the length of the final question.
+
+  Raises:
+    TooLongError: If `min_length` exceeds the current limit.
+  """
+  if _LENGTH_LIMITS:
+    max_length = _LENGTH_LIMITS[-1][0]
+    if max_length is not None and min_length > max_length:
+      raise TooLongError(
+          'Question length at least {} > {}'.format(min_length, max_length))
+
+
+def check_answer_length(min_length):
+  """Raises `TooLongError` if the answer will be longer than allowed.
+
+  Args:
+    min_length: Lower bound on the length of the final answer.
+
+  Raises:
+    TooLongError: If `min_length` exceeds the current limit.
+  """
+  if _LENGTH_LIMITS:
+    max_length = _LENGTH_LIMITS[-1][1]
+    if max_length is not None and min_length > max_length:
+      raise TooLongError(
+          'Answer length at least {} > {}'.format(min_length, max_length))
+
+
 class SampleArgs(
     collections.namedtuple('SampleArgs', ('num_modules', 'entropy'))):
   """For sampling mathematical entities / questions."""
 
+  __slots__ = ()
+
   def peel(self, frac=1):
     """Peels one (or `frac`) of a module's entropy.
 
@@ -153,6 +283,8 @@ class PreSampleArgs(
         ('min_modules', 'max_modules', 'min_entropy', 'max_entropy'))):
   """Sample args before module count and entropy have been sampled."""
 
+  __slots__ = ()
+
   def __call__(self):
     """Samples `SampleArgs`."""
     return SampleArgs(
@@ -178,6 +310,8 @@ class FunctionHandle(object):
   stores the list of sympy functions.
   """
 
+  __slots__ = ('_functions',)
+
   def __init__(self, *function_entities):
     """Initialize a `FunctionHandle`.
 
@@ -244,6 +378,9 @@ class Context(object):
   tree-like fashion.
   """
 
+  __slots__ = ('_relation_symbols', '_self_symbols', '_child_symbols',
+               '_module_count', '_child_entities')
+
   def __init__(self, relation_symbols=None):
     """Initializes a `Context`.
 
@@ -289,7 +426,8 @@ class Context(object):
                .difference(self._child_symbols))
     if not allowed:
       raise ValueError('Ran out of symbols')
-    symbol = random.choice(list(allowed))
+    # Sorted, since set iteration order of strings varies between processes.
+    symbol = random.choice(sorted(allowed))
     self._self_symbols.add(symbol)
     return symbol
 
@@ -320,10 +458,8 @@ class Context(object):
     Raises:
       ValueError: If no valid samplers were found.
     """
-    valid = []
-    for filter_, sampler in _FILTERS_AND_SAMPLERS:
-      if filter_(value):
-        valid.append(sampler)
+    valid = [sampler for filter_, sampler in _candidates(_value_class(value))
+             if filter_ is None or filter_(value)]
     if not valid:
       raise ValueError('No valid samplers found: value={} sample_args={}'
                        .format(value, sample_args))
@@ -404,6 +540,16 @@ class Context(object):
         assert symbol not in all_symbols_
         self._child_symbols.add(symbol)
 
+    # The descriptions of the children's children always form part of the
+    # final question (whereas the children's own descriptions may be replaced
+    # by their expressions), so bound the question length before going further.
+    child_descriptions = [entity.child_description
+                          for entity in self._child_entities
+                          if entity.child_description]
+    check_question_length(
+        sum(len(description) for description in child_descriptions)
+        + max(0, len(child_descriptions) - 1))
+
     return self._child_entities
 
   def sample_by_replacing_constants(self, sample_args, expressions):
@@ -439,12 +585,15 @@ def expand_entities(context, **kwargs):
     of the entities contained in `kwargs`, and `new_kwargs` contains handles.
   """
   kwargs = kwargs.copy()
-  entities = set(context.child_entities)
-  for key, maybe_entity in six.iteritems(kwargs):
+  # Use a list rather than a set (which is ordered by object id) so that the
+  # shuffled order is reproducible.
+  entities = context.child_entities
+  for key in sorted(six.iterkeys(kwargs)):
+    maybe_entity = kwargs[key]
     if isinstance(maybe_entity, Entity):
-      entities.add(maybe_entity)
+      if maybe_entity not in entities:
+        entities.append(maybe_entity)
       kwargs[key] = maybe_entity.handle
-  entities = list(entities)
   random.shuffle(entities)
 
   child_descriptions = []
@@ -474,6 +623,10 @@ class Entity(object):
   handle.
   """
 
+  __slots__ = ('_value', '_child_description', '_description', '_handle',
+               '_expression', '_polynomial_variables', '_handle_used',
+               '_expression_used')
+
   def __init__(self, context, value, description='', handle=None,
                expression=None, polynomial_variables=None,
                **description_kwargs):
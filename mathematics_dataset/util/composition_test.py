@@ -18,12 +18,24 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import random
+
 # Dependency imports
 from absl.testing import absltest
+from mathematics_dataset.modules import modules
 from mathematics_dataset.util import composition
+from mathematics_dataset.util import display
+import numpy as np
+from six.moves import range
 import sympy
 
 
+def setUpModule():
+  # Registers the composition samplers of the module packages.
+  for name in modules.package_names():
+    modules.load(name)
+
+
 class FunctionHandleTest(absltest.TestCase):
 
   def testApply(self):
@@ -50,6 +62,57 @@ class ContextTest(absltest.TestCase):
     self.assertEqual(sum([child.num_modules for child in children]), 3)
     self.assertAlmostEqual(sum([child.entropy for child in children]), 5.0)
 
+  def testCandidatesMatchFilters(self):
+    values = [
+        0, -3, 7, np.int64(5), sympy.Integer(-2), sympy.Rational(3, 4),
+        display.Decimal(sympy.Rational(1, 4)),
+        composition.Polynomial([1, 2, 3]),
+        composition.Polynomial([[0, 1], [2, 0]]),
+        composition.Polynomial([sympy.Rational(1, 2), 1]),
+        sympy.Symbol('x'),
+    ]
+    for value in values:
+      # pylint: disable=protected-access
+      candidates = composition._candidates(composition._value_class(value))
+      expected = [sampler
+                  for filter_, sampler in composition._FILTERS_AND_SAMPLERS
+                  if filter_(value)]
+      # pylint: enable=protected-access
+      valid = [sampler for filter_, sampler in candidates
+               if filter_ is None or filter_(value)]
+      self.assertEqual(valid, expected)
+
+
+class LengthLimitsTest(absltest.TestCase):
+
+  def testChecks(self):
+    # No limits outside the context.
+    composition.check_question_length(1000)
+    with composition.length_limits(10, 5):
+      composition.check_question_length(10)
+      composition.check_answer_length(5)
+      with self.assertRaises(composition.TooLongError):
+        composition.check_question_length(11)
+      with self.assertRaises(composition.TooLongError):
+        composition.check_answer_length(6)
+      with composition.length_limits(None, None):
+        composition.check_question_length(11)
+    composition.check_answer_length(1000)
+
+  def testSampleChecksChildDescriptions(self):
+    random.seed(1)
+    sample_args = composition.SampleArgs(num_modules=6, entropy=8)
+    num_too_long = 0
+    for _ in range(10):
+      try:
+        with composition.length_limits(1, None):
+          composition.Context().sample(
+              sample_args, [sympy.Integer(2), sympy.Integer(3)])
+      except composition.TooLongError:
+        num_too_long += 1
+    # Integers composed from several modules have non-empty child descriptions.
+    self.assertGreater(num_too_long, 0)
+
 
 class EntityTest(absltest.TestCase):
 
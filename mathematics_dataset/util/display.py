@@ -88,14 +88,17 @@ class Decimal(object):
     """
     self._value = sympy.Rational(value)
 
-    numer = int(sympy.numer(self._value))
-    denom = int(sympy.denom(self._value))
-
-    denom_factors = list(sympy.factorint(denom).keys())
-    for factor in denom_factors:
-      if factor not in [2, 5]:
-        raise ValueError('Cannot represent {} as a non-recurring decimal.'
-                         .format(value))
+    numer = int(self._value.p)
+    denom = int(self._value.q)
+
+    # The denominator must have no prime factors other than 2 and 5.
+    remaining = denom
+    for factor in [2, 5]:
+      while remaining % factor == 0:
+        remaining //= factor
+    if remaining != 1:
+      raise ValueError('Cannot represent {} as a non-recurring decimal.'
+                       .format(value))
     self._decimal = decimal.Decimal(numer) / decimal.Decimal(denom)
 
   @property
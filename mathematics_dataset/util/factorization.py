@@ -0,0 +1,156 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cached integer factorization, shared by the samplers.
+
+`factorint(n)` returns the same as `sympy.factorint(n)` (including the order of
+the factors, which the samplers' random choices depend on). Values with
+absolute value below the sieve bound are factored directly using a table of
+smallest prime factors; larger values are checked for primality via `primes`,
+and otherwise factored by sympy, with the results kept in a bounded
+least-recently-used cache (since the same integers are often factored several
+times while sampling a single problem).
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+
+# Dependency imports
+from mathematics_dataset.util import primes
+import numpy as np
+from six.moves import range
+import sympy
+
+
+# Values with absolute value below this are factored via the sieve.
+DEFAULT_SIEVE_BOUND = 2**20
+
+# Maximum number of factorizations (of values above the sieve bound) to cache.
+DEFAULT_CACHE_SIZE = 2**16
+
+
+class _State(object):
+  """Holds the configuration, the (lazily built) sieve and the cache."""
+
+  def __init__(self):
+    self.sieve_bound = DEFAULT_SIEVE_BOUND
+    self.cache_size = DEFAULT_CACHE_SIZE
+    self.smallest_prime_factor = None
+    self.cache = collections.OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+
+_STATE = _State()
+
+
+def configure(sieve_bound=DEFAULT_SIEVE_BOUND, cache_size=DEFAULT_CACHE_SIZE):
+  """Sets the sieve bound and cache size, and clears the cache.
+
+  Args:
+    sieve_bound: Integer >= 2; values with smaller absolute value are factored
+        using a sieve of this size (taking 4 bytes per entry).
+    cache_size: Maximum number of factorizations to cache (0 to disable).
+  """
+  if sieve_bound < 2:
+    raise ValueError('sieve_bound={} must be at least 2'.format(sieve_bound))
+  if cache_size < 0:
+    raise ValueError('cache_size={} must be non-negative'.format(cache_size))
+  _STATE.sieve_bound = sieve_bound
+  _STATE.cache_size = cache_size
+  _STATE.smallest_prime_factor = None
+  clear_cache()
+
+
+def clear_cache():
+  _STATE.cache.clear()
+  _STATE.hits = 0
+  _STATE.misses = 0
+
+
+def cache_info():
+  """Returns dict with the cache `hits`, `misses` and current `size`."""
+  return {'hits': _STATE.hits, 'misses': _STATE.misses,
+          'size': len(_STATE.cache)}
+
+
+def _smallest_prime_factor():
+  """Returns array mapping `n` to its smallest prime factor, for n >= 2."""
+  if _STATE.smallest_prime_factor is None:
+    bound = _STATE.sieve_bound
+    sieve = np.zeros(bound, dtype=np.int32)
+    for prime in range(2, int(bound ** 0.5) + 1):
+      if sieve[prime] == 0:
+        multiples = sieve[prime * prime::prime]
+        multiples[multiples == 0] = prime
+    unmarked = np.flatnonzero(sieve == 0)
+    sieve[unmarked] = unmarked
+    _STATE.smallest_prime_factor = sieve
+  return _STATE.smallest_prime_factor
+
+
+def _sieve_factorint(n):
+  """Returns factorization of 1 < |n| < sieve bound, as `sympy.factorint`."""
+  smallest_prime_factor = _smallest_prime_factor()
+  factors = {}
+  remaining = abs(n)
+  while remaining > 1:
+    prime = int(smallest_prime_factor[remaining])
+    multiplicity = 0
+    while remaining % prime == 0:
+      remaining //= prime
+      multiplicity += 1
+    factors[prime] = multiplicity
+  if n < 0:
+    factors[-1] = 1  # sympy lists the sign last
+  return factors
+
+
+def factorint(n):
+  """Returns dict `{prime: multiplicity}`, as for `sympy.factorint(n)`.
+
+  The returned dict is a fresh copy, so may be modified by the caller.
+
+  Args:
+    n: Integer (python or sympy).
+
+  Returns:
+    Dict mapping (python) integer factors to their multiplicities. As for
+    sympy, 0 gives `{0: 1}`, 1 gives `{}`, and negative values include the
+    factor -1.
+  """
+  n = int(n)
+  if n in (-1, 0, 1):
+    return sympy.factorint(n)
+  if abs(n) < _STATE.sieve_bound:
+    return _sieve_factorint(n)
+  if primes.is_prime(abs(n)):
+    return {abs(n): 1, -1: 1} if n < 0 else {n: 1}
+
+  cache = _STATE.cache
+  factors = cache.pop(n, None)
+  if factors is None:
+    _STATE.misses += 1
+    factors = sympy.factorint(n)
+    if _STATE.cache_size == 0:
+      return factors
+    if len(cache) >= _STATE.cache_size:
+      cache.popitem(last=False)  # least recently used
+  else:
+    _STATE.hits += 1
+  cache[n] = factors  # (re)insert as most recently used
+  return dict(factors)
@@ -0,0 +1,80 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.util.factorization."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from absl.testing import absltest
+from mathematics_dataset.util import factorization
+from six.moves import range
+import sympy
+
+
+class FactorizationTest(absltest.TestCase):
+
+  def setUp(self):
+    super(FactorizationTest, self).setUp()
+    factorization.configure(sieve_bound=1000, cache_size=2)
+    self.addCleanup(factorization.configure)
+
+  def assertSameAsSympy(self, n):
+    factors = factorization.factorint(n)
+    expected = sympy.factorint(n)
+    # The order matters, since samplers make random choices over the factors.
+    self.assertEqual(list(factors.items()), list(expected.items()))
+
+  def testSameAsSympy(self):
+    for n in range(-2000, 2000):
+      self.assertSameAsSympy(n)
+    for n in [sympy.Integer(360), 2**40, -2**40 * 3, 999983 * 1000003,
+              1000003, -1000003,
+              2 * 3 * 5 * 7 * 11 * 13 * 17 * 19 * 23 * 29 * 31]:
+      self.assertSameAsSympy(n)
+
+  def testCache(self):
+    factorization.clear_cache()
+    factorization.factorint(10**6 + 2)
+    factorization.factorint(10**6 + 2)
+    self.assertEqual(factorization.cache_info(),
+                     {'hits': 1, 'misses': 1, 'size': 1})
+    # The least recently used value is evicted.
+    factorization.factorint(10**6 + 4)
+    factorization.factorint(10**6 + 2)
+    factorization.factorint(10**6 + 6)
+    self.assertEqual(factorization.cache_info()['size'], 2)
+    factorization.factorint(10**6 + 2)
+    self.assertEqual(factorization.cache_info()['hits'], 3)
+    # Primes are not factored, so not cached.
+    factorization.factorint(10**6 + 3)
+    self.assertEqual(factorization.cache_info()['misses'], 3)
+
+  def testReturnsCopy(self):
+    for n in [360, 10**6 + 8]:
+      factors = factorization.factorint(n)
+      factors.clear()
+      self.assertEqual(factorization.factorint(n), sympy.factorint(n))
+
+  def testConfigureInvalid(self):
+    with self.assertRaises(ValueError):
+      factorization.configure(sieve_bound=1)
+    with self.assertRaises(ValueError):
+      factorization.configure(cache_size=-1)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,237 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Primality tests and prime searches, backed by a table of primes.
+
+The primes below a configurable bound are held in a sorted table, built by a
+segmented sieve the first time it is needed (or memory-mapped from a `.npy`
+file written by `save_table`), so that `is_prime`, `next_prime` and `prev_prime`
+are binary searches for values below the bound. Above the bound, primality is
+tested by Miller-Rabin (deterministic for values below 3.3 * 10**24, and
+falling back to `sympy.isprime` beyond that).
+
+`next_prime`, `prev_prime` and `random_prime` give the same results as sympy's
+`nextprime`, `prevprime` and `randprime` (the latter also consuming the same
+values from `random`), so they can be substituted without changing the
+generated data.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import random
+
+# Dependency imports
+import numpy as np
+from six.moves import range
+import sympy
+
+
+# Primes below this are held in the table.
+DEFAULT_BOUND = 2**22
+
+# Number of values sieved at a time when building the table.
+_SEGMENT_SIZE = 2**18
+
+# Bases for which Miller-Rabin is deterministic for values below
+# `_MILLER_RABIN_LIMIT` (Sorenson and Webster, 2015).
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+_MILLER_RABIN_LIMIT = 3317044064679887385961981
+
+
+class _State(object):
+  """Holds the configuration and the (lazily built or loaded) table."""
+
+  def __init__(self):
+    self.bound = DEFAULT_BOUND
+    self.path = None
+    self.table = None
+
+
+_STATE = _State()
+
+
+def configure(bound=DEFAULT_BOUND, path=None):
+  """Sets the size of the prime table, and where to memory-map it from.
+
+  Args:
+    bound: Integer >= 3; the table holds the primes below this (taking 8 bytes
+        per prime). Ignored if `path` exists.
+    path: Optional path of a `.npy` file written by `save_table`. If it exists,
+        the table is memory-mapped from it (so is shared between processes);
+        otherwise the table is built and then saved there.
+  """
+  if bound < 3:
+    raise ValueError('bound={} must be at least 3'.format(bound))
+  _STATE.bound = bound
+  _STATE.path = path
+  _STATE.table = None
+
+
+def build_table(bound):
+  """Returns int64 array of the primes below `bound`, by a segmented sieve."""
+  if bound < 3:
+    raise ValueError('bound={} must be at least 3'.format(bound))
+  root = int(bound ** 0.5) + 1
+  # The primes up to sqrt(bound), which are enough to sieve each segment.
+  base_sieve = np.ones(root + 1, dtype=bool)
+  base_sieve[:2] = False
+  for prime in range(2, int(root ** 0.5) + 1):
+    if base_sieve[prime]:
+      base_sieve[prime * prime::prime] = False
+  base_primes = np.flatnonzero(base_sieve)
+
+  segments = []
+  for low in range(0, bound, _SEGMENT_SIZE):
+    high = min(low + _SEGMENT_SIZE, bound)
+    segment = np.ones(high - low, dtype=bool)
+    if low == 0:
+      segment[:2] = False
+    for prime in base_primes:
+      prime = int(prime)
+      if prime * prime >= high:
+        break
+      first_multiple = max(prime * prime, -(-low // prime) * prime)
+      segment[first_multiple - low::prime] = False
+    segments.append(np.flatnonzero(segment).astype(np.int64) + low)
+  return np.concatenate(segments)
+
+
+def save_table(path, bound=DEFAULT_BOUND):
+  """Writes the table of primes below `bound` to the `.npy` file `path`."""
+  # Written via a file object, since `np.save` would otherwise add an extension.
+  with open(path, 'wb') as file_:
+    np.save(file_, build_table(bound))
+
+
+def _table():
+  """Returns the sorted int64 array of primes, building or loading it."""
+  if _STATE.table is None:
+    path = _STATE.path
+    if path is not None:
+      try:
+        _STATE.table = np.load(path, mmap_mode='r')
+      except IOError:
+        save_table(path, _STATE.bound)
+        _STATE.table = np.load(path, mmap_mode='r')
+    else:
+      _STATE.table = build_table(_STATE.bound)
+  return _STATE.table
+
+
+def _largest_tabulated():
+  """Returns the largest prime in the table; all smaller primes are in it."""
+  return int(_table()[-1])
+
+
+def _miller_rabin(n):
+  """Returns whether `n` (with no factor in the bases) is prime."""
+  d = n - 1
+  s = 0
+  while d % 2 == 0:
+    d //= 2
+    s += 1
+  for base in _MILLER_RABIN_BASES:
+    x = pow(base, d, n)
+    if x == 1 or x == n - 1:
+      continue
+    for _ in range(s - 1):
+      x = x * x % n
+      if x == n - 1:
+        break
+    else:
+      return False
+  return True
+
+
+def is_prime(n):
+  """Returns whether the integer `n` is prime."""
+  n = int(n)
+  if n <= _largest_tabulated():
+    table = _table()
+    index = np.searchsorted(table, n)
+    return bool(table[index] == n)
+  for prime in _MILLER_RABIN_BASES:
+    if n % prime == 0:
+      return n == prime
+  if n < _MILLER_RABIN_LIMIT:
+    return _miller_rabin(n)
+  return bool(sympy.isprime(n))
+
+
+def next_prime(n):
+  """Returns the smallest prime greater than `n`, as `sympy.nextprime(n)`."""
+  n = int(n)
+  if n < 2:
+    return 2
+  if n < _largest_tabulated():
+    table = _table()
+    return int(table[np.searchsorted(table, n, side='right')])
+  n += 1 + n % 2  # the next odd value
+  while not is_prime(n):
+    n += 2
+  return n
+
+
+def prev_prime(n):
+  """Returns the largest prime less than `n`, as `sympy.prevprime(n)`.
+
+  Args:
+    n: Integer (or value to round up to an integer).
+
+  Returns:
+    Integer.
+
+  Raises:
+    ValueError: If `n` < 3 (so there is no smaller prime).
+  """
+  n = int(sympy.ceiling(n))
+  if n < 3:
+    raise ValueError('No primes less than {}'.format(n))
+  if n <= _largest_tabulated() + 1:
+    table = _table()
+    return int(table[np.searchsorted(table, n) - 1])
+  n -= 1 + n % 2  # the previous odd value
+  while not is_prime(n):
+    n -= 2
+  return n
+
+
+def random_prime(a, b):
+  """Returns a random prime in `[a, b)`, as `sympy.ntheory.generate.randprime`.
+
+  As for sympy, this takes the next prime after a uniformly sampled integer (so
+  primes following larger gaps are more likely), using the global `random`.
+
+  Args:
+    a: Lower bound (inclusive); converted to an integer.
+    b: Upper bound (exclusive); converted to an integer.
+
+  Returns:
+    Integer.
+
+  Raises:
+    ValueError: If there are no primes in the range.
+  """
+  if a >= b:
+    raise ValueError('Empty range [{}, {})'.format(a, b))
+  a, b = int(a), int(b)
+  n = random.randint(a - 1, b)
+  prime = next_prime(n)
+  if prime >= b:
+    prime = prev_prime(b)
+  if prime < a:
+    raise ValueError('No primes in [{}, {})'.format(a, b))
+  return prime
@@ -0,0 +1,96 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.util.primes."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import random
+import shutil
+import tempfile
+
+# Dependency imports
+from absl.testing import absltest
+from absl.testing import parameterized
+from mathematics_dataset.util import primes
+import numpy as np
+from six.moves import range
+import sympy
+
+
+# Values around the table bound used below, and some beyond it.
+_VALUES = (list(range(-3, 1200))
+           + [10**9 + i for i in range(-50, 50)]
+           + [2**61 - 1, 2**61 + 1, 2**89 - 1, 2**89 + 1])
+
+
+class PrimesTest(parameterized.TestCase):
+
+  def setUp(self):
+    super(PrimesTest, self).setUp()
+    self.addCleanup(primes.configure)
+
+  def testBuildTable(self):
+    expected = list(sympy.sieve.primerange(2, 10**5))
+    self.assertEqual(primes.build_table(10**5).tolist(), expected)
+    self.assertEqual(primes.build_table(3).tolist(), [2])
+
+  @parameterized.parameters(3, 4, 100, 1000, primes.DEFAULT_BOUND)
+  def testSameAsSympy(self, bound):
+    primes.configure(bound=bound)
+    for n in _VALUES:
+      self.assertEqual(primes.is_prime(n), sympy.isprime(n), n)
+      self.assertEqual(primes.next_prime(n), sympy.nextprime(n), n)
+      if n >= 3:
+        self.assertEqual(primes.prev_prime(n), sympy.prevprime(n), n)
+
+  def testPrevPrimeInvalid(self):
+    with self.assertRaises(ValueError):
+      primes.prev_prime(2)
+
+  def testRandomPrimeSameAsSympy(self):
+    for _ in range(1000):
+      approx = sympy.Integer(random.randint(2, 10**random.randint(1, 12)))
+      state = random.getstate()
+      expected = sympy.ntheory.generate.randprime(approx / 2, approx * 2)
+      expected_state = random.getstate()
+      random.setstate(state)
+      self.assertEqual(primes.random_prime(approx / 2, approx * 2), expected)
+      # The same values are consumed from `random`.
+      self.assertEqual(random.getstate(), expected_state)
+
+  def testRandomPrimeInvalid(self):
+    with self.assertRaises(ValueError):
+      primes.random_prime(24, 28)
+    with self.assertRaises(ValueError):
+      primes.random_prime(5, 5)
+
+  def testMemoryMapped(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    path = os.path.join(directory, 'primes.npy')
+    primes.configure(bound=1000, path=path)
+    self.assertTrue(primes.is_prime(997))
+    self.assertTrue(os.path.exists(path))
+    # A second configuration loads the saved table (ignoring the bound).
+    primes.configure(bound=10, path=path)
+    self.assertEqual(primes.next_prime(990), 991)
+    self.assertIsInstance(primes._table(), np.memmap)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -35,9 +35,11 @@ from __future__ import division
 from __future__ import print_function
 
 import abc
+import collections
 import itertools
 
 # Dependency imports
+from mathematics_dataset.util import combinatorics
 import six
 from six.moves import zip
 import sympy
@@ -167,6 +169,38 @@ class CountLevelSetEvent(Event):
     return self._all_sequences
 
 
+class SetCountLevelSetEvent(Event):
+  """Event of all sequences with fixed number of values from disjoint sets.
+
+  This is the inverse image of a `CountLevelSetEvent` under a product of copies
+  of the same `DiscreteRandomVariable`: e.g., the sequences of balls giving two
+  red and one green is the event of sequences containing two balls from the set
+  of red balls, and one from the set of green balls.
+  """
+
+  def __init__(self, counts):
+    """Initializes `SetCountLevelSetEvent`.
+
+    Args:
+      counts: Dictionary mapping disjoint frozensets of values to the number of
+          values from that set that occur in a sequence.
+    """
+    self._counts = counts
+    self._all_sequences = None
+
+  @property
+  def counts(self):
+    return self._counts
+
+  def all_sequences(self):
+    """Returns set of all sequences (possibly with repeated values)."""
+    if self._all_sequences is None:
+      self._all_sequences = set()
+      for sets in CountLevelSetEvent(self._counts).all_sequences():
+        self._all_sequences.update(itertools.product(*sets))
+    return self._all_sequences
+
+
 class SequenceEvent(Event):
   """Collection of sequences."""
 
@@ -243,11 +277,8 @@ class FiniteProductSpace(ProbabilitySpace):
 
       num_events = sum(six.itervalues(counts))
       assert num_events == len(self._spaces)
-      # Multinomial coefficient:
-      coeff = (
-          sympy.factorial(num_events) / sympy.prod(
-              [sympy.factorial(i) for i in six.itervalues(counts)]))
-      return coeff * sympy.prod([
+      coeff = combinatorics.multinomial(list(six.itervalues(counts)))
+      return sympy.Integer(coeff) * sympy.prod([
           pow(probabilities[value], counts[value])
           for value in six.iterkeys(counts)
       ])
@@ -284,7 +315,107 @@ class SampleWithoutReplacementSpace(ProbabilitySpace):
     """Number of samples to draw."""
     return self._n_samples
 
+  def _is_uniform(self):
+    """Returns whether all values with non-zero weight are equally likely."""
+    return len(set(six.itervalues(self._weights)) - {0}) <= 1
+
+  def _support(self, values):
+    """Returns the values in `values` with non-zero probability."""
+    return frozenset(value for value in values
+                     if self._weights.get(value, 0) != 0)
+
+  def _num_support(self):
+    return len(self._support(six.iterkeys(self._weights)))
+
+  def _product_probability(self, event):
+    """Returns the probability of a `FiniteProductEvent`."""
+    if not all(isinstance(event_, DiscreteEvent) for event_ in event.events):
+      raise ValueError('Not all component events are DiscreteEvents')
+    sets = [self._support(event_.values) for event_ in event.events]
+
+    if self._is_uniform() and all(set_ == other or not set_ & other
+                                  for set_ in sets for other in sets):
+      # Closed form: at each draw, the values of the set not yet drawn (by an
+      # earlier draw from the same set) are favourable.
+      num_support = self._num_support()
+      probability = sympy.Integer(1)
+      for i, set_ in enumerate(sets):
+        num_favourable = len(set_) - sets[:i].count(set_)
+        if num_favourable <= 0:
+          return sympy.Integer(0)
+        probability *= sympy.Rational(num_favourable, num_support - i)
+      return probability
+
+    def allowed(removed):
+      return sets[len(removed)] - removed
+
+    return self._sequential_probability(allowed, len(sets))
+
+  def _level_set_probability(self, event):
+    """Returns the probability of a `SetCountLevelSetEvent`."""
+    counts = collections.defaultdict(int)
+    for set_, count in six.iteritems(event.counts):
+      counts[self._support(set_)] += count
+    length = sum(six.itervalues(counts))
+    if length > self._num_support():
+      return sympy.Integer(0)
+
+    if self._is_uniform():
+      # Multivariate hypergeometric distribution.
+      num_ways = 1
+      for set_, count in six.iteritems(counts):
+        num_ways *= combinatorics.binomial(len(set_), count)
+      return sympy.Rational(
+          num_ways, combinatorics.binomial(self._num_support(), length))
+
+    def allowed(removed):
+      values = set()
+      for set_, count in six.iteritems(counts):
+        if len(set_ & removed) < count:
+          values.update(set_ - removed)
+      return values
+
+    return self._sequential_probability(allowed, length)
+
+  def _sequential_probability(self, allowed, length):
+    """Returns probability of drawing sequences where each draw is allowed.
+
+    This is computed by dynamic programming over the set of values drawn so
+    far, so orders of drawing the same values are only evaluated once.
+
+    Args:
+      allowed: Function mapping the frozenset of values drawn so far to the set
+          of values allowed for the next draw.
+      length: Number of draws in each sequence.
+
+    Returns:
+      The probability (as a `sympy.Rational`).
+    """
+    cache = {}
+
+    def probability(removed):
+      """Returns the probability of completing the event, given `removed`."""
+      if len(removed) == length:
+        return sympy.Integer(1)
+      if removed in cache:
+        return cache[removed]
+      remaining_weight = 1 - sum(self._weights[value] for value in removed)
+      total = sympy.Integer(0)
+      for value in allowed(removed):
+        total += (self._weights[value] / remaining_weight
+                  * probability(removed | {value}))
+      cache[removed] = total
+      return total
+
+    return probability(frozenset())
+
   def probability(self, event):
+    # Specializations, avoiding enumerating all of the sequences.
+    if isinstance(event, FiniteProductEvent):
+      return self._product_probability(event)
+    if isinstance(event, SetCountLevelSetEvent):
+      return self._level_set_probability(event)
+
     try:
       all_sequences = event.all_sequences()
     except AttributeError:
@@ -388,6 +519,21 @@ class FiniteProductRandomVariable(RandomVariable):
           random_variable.inverse(sub_event)
           for random_variable, sub_event in zipped))
 
+    # Specialization for copies of the same discrete random variable.
+    if (isinstance(event, CountLevelSetEvent)
+        and isinstance(self._random_variables[0], DiscreteRandomVariable)
+        and all(random_variable is self._random_variables[0]
+                for random_variable in self._random_variables)):
+      assert sum(six.itervalues(event.counts)) == len(self._random_variables)
+      random_variable = self._random_variables[0]
+      counts = collections.defaultdict(int)
+      for value, count in six.iteritems(event.counts):
+        if count > 0:
+          # (Values not in the range all map to the empty set.)
+          counts[frozenset(
+              random_variable.inverse(DiscreteEvent({value})).values)] += count
+      return SetCountLevelSetEvent(dict(counts))
+
     # Try fallback of mapping each sequence separately.
     try:
       all_sequences = event.all_sequences()
@@ -21,6 +21,7 @@ from __future__ import print_function
 # Dependency imports
 from absl.testing import absltest
 from mathematics_dataset.util import probability
+from six.moves import range
 import sympy
 
 
@@ -89,8 +90,22 @@ class FiniteProductSpaceTest(absltest.TestCase):
                      coeff * pow(p_a, 7) * pow(p_b, 2) * pow(p_c, 3))
 
 
+class SetCountLevelSetEventTest(absltest.TestCase):
+
+  def testAllSequences(self):
+    event = probability.SetCountLevelSetEvent(
+        {frozenset({1, 2}): 1, frozenset({3}): 1})
+    self.assertEqual(event.all_sequences(),
+                     {(1, 3), (2, 3), (3, 1), (3, 2)})
+
+
 class SampleWithoutReplacementSpaceTest(absltest.TestCase):
 
+  def assertSameAsEnumerated(self, space, event):
+    """Checks the probability is the same as by enumerating all sequences."""
+    enumerated = probability.SequenceEvent(set(event.all_sequences()))
+    self.assertEqual(space.probability(event), space.probability(enumerated))
+
   def testBasic(self):
     space = probability.SampleWithoutReplacementSpace({0: 1, 1: 1}, 2)
     event_0_0 = probability.FiniteProductEvent(
@@ -113,6 +128,38 @@ class SampleWithoutReplacementSpaceTest(absltest.TestCase):
     self.assertEqual(p_1, 0)
     self.assertEqual(p_2, 0)
 
+  def testLevelSet(self):
+    # Two red (0, 1) and three green (2, 3, 4); pick 3.
+    space = probability.SampleWithoutReplacementSpace(
+        {i: 1 for i in range(5)}, 3)
+    event = probability.SetCountLevelSetEvent(
+        {frozenset({0, 1}): 1, frozenset({2, 3, 4}): 2})
+    # (2 choose 1) (3 choose 2) / (5 choose 3).
+    self.assertEqual(space.probability(event), sympy.Rational(3, 5))
+    self.assertSameAsEnumerated(space, event)
+
+    event = probability.SetCountLevelSetEvent({frozenset({0, 1}): 3})
+    self.assertEqual(space.probability(event), 0)
+
+  def testWeighted(self):
+    space = probability.SampleWithoutReplacementSpace(
+        {0: 1, 1: 2, 2: 3, 3: 0, 4: 4}, 3)
+    self.assertSameAsEnumerated(space, probability.SetCountLevelSetEvent(
+        {frozenset({0, 1, 3}): 2, frozenset({2, 4}): 1}))
+    self.assertSameAsEnumerated(space, probability.FiniteProductEvent([
+        probability.DiscreteEvent({0, 1}), probability.DiscreteEvent({1, 2}),
+        probability.DiscreteEvent({2, 3, 4})]))
+
+  def testLarge(self):
+    # Would be about 10**13 sequences if enumerated.
+    space = probability.SampleWithoutReplacementSpace(
+        {i: 1 for i in range(100)}, 10)
+    event = probability.SetCountLevelSetEvent(
+        {frozenset(range(50)): 5, frozenset(range(50, 100)): 5})
+    self.assertEqual(
+        space.probability(event),
+        sympy.binomial(50, 5)**2 / sympy.binomial(100, 10))
+
 
 class DiscreteRandomVariableTest(absltest.TestCase):
 
@@ -160,6 +207,16 @@ class FiniteProductRandomVariableTest(absltest.TestCase):
     self.assertEqual(result.events[0].values, {1, 2})
     self.assertEqual(result.events[1].values, {1, 3})
 
+  def testInverse_CountLevelSetEventSameRandomVariable(self):
+    rv = probability.DiscreteRandomVariable({1: 'a', 2: 'b', 3: 'a'})
+    product_rv = probability.FiniteProductRandomVariable((rv, rv))
+    event = probability.CountLevelSetEvent({'a': 1, 'b': 1, 'c': 0})
+    result = product_rv.inverse(event)
+    self.assertIsInstance(result, probability.SetCountLevelSetEvent)
+    self.assertEqual(result.counts,
+                     {frozenset({1, 3}): 1, frozenset({2}): 1})
+    self.assertEqual(result.all_sequences(), {(1, 2), (3, 2), (2, 1), (2, 3)})
+
   def testInverse_CountLevelSetEvent(self):
     rv = self._random_variable()
     event = probability.CountLevelSetEvent({'a': 1, 'x': 1})
@@ -0,0 +1,229 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Opt-in instrumentation of the sympy functions called by the samplers.
+
+Example usage:
+
+```
+profiling.enable()
+with profiling.scope('train/numbers__is_prime'):
+  problem = module()
+print(profiling.format_stats(profiling.stats()))
+```
+
+`enable` wraps the sympy entry points used by the modules (`sympy.factorint`,
+`randprime`, `det`, `factorial`, etc.), recording the number of calls and the
+cumulative time spent in each, attributed to the innermost active `scope`.
+Nothing is recorded (or wrapped) unless `enable` is called.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import contextlib
+import functools
+import importlib
+import timeit
+
+# Dependency imports
+import six
+
+
+# Pairs `(module name, attribute)` of the functions to instrument. Attributes
+# of the form `Class.method` instrument the method of the class. These are
+# looked up by the samplers at call time (e.g., `sympy.factorint(n)`), so
+# replacing the attributes is enough to instrument them.
+_ENTRY_POINTS = (
+    ('sympy', 'det'),
+    ('sympy', 'expand'),
+    ('sympy', 'factor'),
+    ('sympy', 'factorial'),
+    ('sympy', 'factorint'),
+    ('sympy', 'gcd'),
+    ('sympy', 'lcm'),
+    ('sympy', 'poly'),
+    ('sympy', 'simplify'),
+    ('sympy', 'solve'),
+    ('sympy', 'sympify'),
+    ('sympy', 'Basic.__str__'),
+    ('sympy.ntheory.generate', 'randprime'),
+    ('mathematics_dataset.util.factorization', 'factorint'),
+    ('mathematics_dataset.util.primes', 'next_prime'),
+    ('mathematics_dataset.util.primes', 'random_prime'),
+    ('mathematics_dataset.sample.polynomials', 'diophantine_solve_linear_2d'),
+)
+
+# Name of the pseudo entry point recording the total time spent in a scope.
+TOTAL = '(total)'
+
+# Scope for calls made outside of any `scope`.
+_NO_SCOPE = '(none)'
+
+# Originals of the instrumented functions, keyed by `(module name, attribute)`;
+# empty when not enabled.
+_ORIGINALS = {}
+
+# Stack of active scope names.
+_SCOPES = []
+
+# Entry points currently being called (to avoid double counting recursion).
+_ACTIVE = set()
+
+
+def _new_stats():
+  """Returns map from scope to map from entry point to `[calls, seconds]`."""
+  return collections.defaultdict(
+      lambda: collections.defaultdict(lambda: [0, 0.0]))
+
+
+def _frozen(stats_):
+  return {
+      scope_name: {entry_point: tuple(stat)
+                   for entry_point, stat in six.iteritems(entry_points)}
+      for scope_name, entry_points in six.iteritems(stats_)}
+
+
+_STATS = _new_stats()
+
+
+def _resolve(module_name, attribute):
+  """Returns pair `(owner, name)`, where `owner.name` is the entry point."""
+  owner = importlib.import_module(module_name)
+  parts = attribute.split('.')
+  for part in parts[:-1]:
+    owner = getattr(owner, part)
+  return owner, parts[-1]
+
+
+def _record(entry_point, seconds):
+  scope_name = _SCOPES[-1] if _SCOPES else _NO_SCOPE
+  stat = _STATS[scope_name][entry_point]
+  stat[0] += 1
+  stat[1] += seconds
+
+
+def _instrument(function, entry_point):
+  """Returns `function` wrapped to record calls under `entry_point`."""
+  @functools.wraps(function)
+  def wrapper(*args, **kwargs):
+    if entry_point in _ACTIVE:
+      return function(*args, **kwargs)  # time only the outermost call
+    _ACTIVE.add(entry_point)
+    start = timeit.default_timer()
+    try:
+      return function(*args, **kwargs)
+    finally:
+      _record(entry_point, timeit.default_timer() - start)
+      _ACTIVE.discard(entry_point)
+  return wrapper
+
+
+def enabled():
+  return bool(_ORIGINALS)
+
+
+def enable():
+  """Instruments the sympy entry points (if not already instrumented)."""
+  if enabled():
+    return
+  for module_name, attribute in _ENTRY_POINTS:
+    owner, name = _resolve(module_name, attribute)
+    # Via `__dict__` for methods, so that they are restored unbound.
+    original = vars(owner).get(name, getattr(owner, name))
+    _ORIGINALS[(module_name, attribute)] = original
+    setattr(owner, name,
+            _instrument(original, entry_point=module_name + '.' + attribute))
+
+
+def disable():
+  """Restores the original (uninstrumented) entry points."""
+  for (module_name, attribute), original in six.iteritems(_ORIGINALS):
+    owner, name = _resolve(module_name, attribute)
+    setattr(owner, name, original)
+  _ORIGINALS.clear()
+
+
+@contextlib.contextmanager
+def scope(name):
+  """Context manager attributing the calls made within it to `name`.
+
+  If profiling is not enabled, this does nothing.
+
+  Args:
+    name: String, e.g., `'train/numbers__is_prime'`.
+
+  Yields:
+    Nothing.
+  """
+  if not enabled():
+    yield
+    return
+  _SCOPES.append(name)
+  start = timeit.default_timer()
+  try:
+    yield
+  finally:
+    _record(TOTAL, timeit.default_timer() - start)
+    _SCOPES.pop()
+
+
+def stats():
+  """Returns the recorded statistics.
+
+  Returns:
+    Dict mapping scope name to dict mapping entry point name to pair `(calls,
+    seconds)`. The entry point `TOTAL` gives the number of times the scope was
+    entered, and the total time spent in it.
+  """
+  return _frozen(_STATS)
+
+
+def reset():
+  """Clears the recorded statistics."""
+  _STATS.clear()
+
+
+def merge(*all_stats):
+  """Returns the sum of several dicts returned by `stats`."""
+  merged = _new_stats()
+  for stats_ in all_stats:
+    for scope_name, entry_points in six.iteritems(stats_):
+      for entry_point, (calls, seconds) in six.iteritems(entry_points):
+        stat = merged[scope_name][entry_point]
+        stat[0] += calls
+        stat[1] += seconds
+  return _frozen(merged)
+
+
+def format_stats(stats_):
+  """Returns a human-readable per-scope breakdown of `stats_`."""
+  def total_seconds(item):
+    return item[1].get(TOTAL, (0, 0.0))[1]
+
+  lines = []
+  for scope_name, entry_points in sorted(
+      six.iteritems(stats_), key=lambda item: -total_seconds(item)):
+    total = entry_points.get(TOTAL, (0, 0.0))[1]
+    lines.append('{}: {:.3f}s'.format(scope_name, total))
+    for entry_point, (calls, seconds) in sorted(
+        six.iteritems(entry_points), key=lambda item: -item[1][1]):
+      if entry_point == TOTAL:
+        continue
+      fraction = ' ({:.1f}%)'.format(100 * seconds / total) if total else ''
+      lines.append('  {:<50} {:>9d} calls {:>9.3f}s{}'.format(
+          entry_point, calls, seconds, fraction))
+  return '\n'.join(lines)
@@ -0,0 +1,75 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.util.profiling."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Dependency imports
+from absl.testing import absltest
+from mathematics_dataset.util import profiling
+import sympy
+
+
+class ProfilingTest(absltest.TestCase):
+
+  def setUp(self):
+    super(ProfilingTest, self).setUp()
+    profiling.reset()
+    self.addCleanup(profiling.reset)
+    self.addCleanup(profiling.disable)
+
+  def testDisabledRecordsNothing(self):
+    original = sympy.factorint
+    with profiling.scope('module'):
+      sympy.factorint(12)
+    self.assertEqual(profiling.stats(), {})
+    self.assertIs(sympy.factorint, original)
+
+  def testRecordsPerScope(self):
+    original = sympy.factorint
+    profiling.enable()
+    self.assertIsNot(sympy.factorint, original)
+    with profiling.scope('a'):
+      self.assertEqual(sympy.factorint(12), {2: 2, 3: 1})
+      sympy.factorint(7)
+      str(sympy.Symbol('x') + 1)
+    with profiling.scope('b'):
+      sympy.gcd(4, 6)
+
+    stats = profiling.stats()
+    self.assertEqual(stats['a']['sympy.factorint'][0], 2)
+    self.assertEqual(stats['a']['sympy.Basic.__str__'][0], 1)
+    self.assertEqual(stats['a'][profiling.TOTAL][0], 1)
+    self.assertEqual(stats['b']['sympy.gcd'][0], 1)
+    self.assertNotIn('sympy.gcd', stats['a'])
+    self.assertIn('sympy.factorint', profiling.format_stats(stats))
+
+    profiling.disable()
+    self.assertIs(sympy.factorint, original)
+
+  def testMerge(self):
+    merged = profiling.merge(
+        {'a': {'f': (1, 0.5)}},
+        {'a': {'f': (2, 0.25), 'g': (1, 1.0)}, 'b': {'f': (1, 1.0)}})
+    self.assertEqual(merged, {
+        'a': {'f': (3, 0.75), 'g': (1, 1.0)},
+        'b': {'f': (1, 1.0)},
+    })
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,125 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deterministic seeding of the random number generators used by samplers.
+
+All of the samplers draw from the global `random` and `np.random` states. To
+make generation reproducible regardless of how the work is split up between
+processes or machines, each unit of work (e.g., a shard of a module in a given
+regime) derives its own seed from a global seed and its name, and the global
+states are seeded (or swapped in) before the unit of work is sampled.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import contextlib
+import hashlib
+import random
+import threading
+
+# Dependency imports
+import numpy as np
+from sympy.core import assumptions as sympy_assumptions
+
+
+# Seeds are restricted to this range, as required by `np.random.seed`.
+_MAX_SEED = 2**32
+
+# Held while a `RandomState` is active, since the global states it is swapped
+# into are shared by all threads.
+_ACTIVE_LOCK = threading.RLock()
+
+
+def _isolate_sympy():
+  """Stops sympy's assumption system from drawing from the global `random`.
+
+  Some versions of sympy shuffle the prerequisites of an assumption query with
+  the global `random.shuffle`. Whether this happens depends on sympy's caches
+  (and so on everything sampled earlier in the process), which would otherwise
+  make the samples depend on the history of the process rather than just on
+  the seed.
+  """
+  if hasattr(sympy_assumptions, 'shuffle'):
+    sympy_assumptions.shuffle = random.Random(0).shuffle
+
+
+def derive_seed(global_seed, *keys):
+  """Returns a seed derived from `global_seed` and the sequence `keys`.
+
+  For example, `derive_seed(1, 'train-easy', 'algebra__linear_1d', 3)` gives the
+  seed for shard 3 of the easy training data for `algebra__linear_1d`.
+
+  Args:
+    global_seed: Integer.
+    *keys: Strings or integers identifying the random stream.
+
+  Returns:
+    Integer in the range [0, 2**32).
+  """
+  key = '\0'.join(str(key) for key in (global_seed,) + keys)
+  digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+  return int(digest, 16) % _MAX_SEED
+
+
+def random_seed():
+  """Returns a nondeterministic seed, for when no global seed is given."""
+  return random.SystemRandom().randrange(_MAX_SEED)
+
+
+def seed_all(seed):
+  """Seeds the global `random` and `np.random` states."""
+  _isolate_sympy()
+  random.seed(seed)
+  np.random.seed(seed)
+
+
+class RandomState(object):
+  """Independent stream of the global `random` and `np.random` states.
+
+  This allows several streams to be interleaved in a single process, e.g.:
+
+  ```
+  stream = RandomState(seed)
+  with stream.activate():
+    problem = module()
+  ```
+
+  Sampling within `activate` draws from (and advances) this stream, and the
+  previous global states are restored afterwards. Only one thread at a time
+  can be within `activate` (of any `RandomState`).
+  """
+
+  def __init__(self, seed):
+    """Initializes a `RandomState` seeded with the integer `seed`."""
+    _isolate_sympy()
+    self._python_state = random.Random(seed).getstate()
+    self._numpy_state = np.random.RandomState(seed).get_state()
+
+  @contextlib.contextmanager
+  def activate(self):
+    """Context manager swapping this stream into the global states."""
+    with _ACTIVE_LOCK:
+      python_state = random.getstate()
+      numpy_state = np.random.get_state()
+      random.setstate(self._python_state)
+      np.random.set_state(self._numpy_state)
+      try:
+        yield
+      finally:
+        self._python_state = random.getstate()
+        self._numpy_state = np.random.get_state()
+        random.setstate(python_state)
+        np.random.set_state(numpy_state)
@@ -0,0 +1,76 @@
+# Copyright 2018 DeepMind Technologies Limited.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for mathematics_dataset.util.seeding."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import random
+
+# Dependency imports
+from absl.testing import absltest
+from mathematics_dataset.util import seeding
+import numpy as np
+
+
+class SeedingTest(absltest.TestCase):
+
+  def testDeriveSeed(self):
+    seed = seeding.derive_seed(1, 'train-easy', 'algebra__linear_1d', 3)
+    self.assertEqual(
+        seed, seeding.derive_seed(1, 'train-easy', 'algebra__linear_1d', 3))
+    self.assertGreaterEqual(seed, 0)
+    self.assertLess(seed, 2**32)
+    self.assertNotEqual(
+        seed, seeding.derive_seed(2, 'train-easy', 'algebra__linear_1d', 3))
+    self.assertNotEqual(
+        seed, seeding.derive_seed(1, 'train-easy', 'algebra__linear_1d', 4))
+    self.assertNotEqual(
+        seed, seeding.derive_seed(1, 'train-hard', 'algebra__linear_1d', 3))
+
+  def testSeedAll(self):
+    seeding.seed_all(5)
+    first = (random.random(), np.random.rand())
+    seeding.seed_all(5)
+    second = (random.random(), np.random.rand())
+    self.assertEqual(first, second)
+
+  def testRandomStateIsIndependent(self):
+    def sample(state):
+      with state.activate():
+        return random.randint(0, 10**9), np.random.randint(0, 10**9)
+
+    # Interleaving two streams gives the same values as running them alone.
+    state_1 = seeding.RandomState(1)
+    state_2 = seeding.RandomState(2)
+    interleaved = [(sample(state_1), sample(state_2)) for _ in range(3)]
+    state_1 = seeding.RandomState(1)
+    alone_1 = [sample(state_1) for _ in range(3)]
+    state_2 = seeding.RandomState(2)
+    alone_2 = [sample(state_2) for _ in range(3)]
+    self.assertEqual(interleaved, list(zip(alone_1, alone_2)))
+
+  def testRandomStateRestoresGlobalState(self):
+    random.seed(3)
+    expected = random.random()
+    random.seed(3)
+    with seeding.RandomState(4).activate():
+      random.random()
+    self.assertEqual(random.random(), expected)
+
+
+if __name__ == '__main__':
+  absltest.main()